@@ -1,13 +1,19 @@
 from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from api.sms_service import process_sms_for_violation
+from api.sms_service import (
+    chunked,
+    enqueue_sms_for_violation,
+    send_sms_for_violation,
+    send_sms_for_violations,
+)
+from api.violation_pages import build_evidence_search_query, fetch_violation_page
+from database.connection_pool import get_pools
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 from typing import Optional
 from pathlib import Path
-import sqlite3
 import json
-from datetime import datetime
+from datetime import datetime, timedelta
 
 BASE_DIR = Path(__file__).resolve().parent
 PROJECT_ROOT = BASE_DIR.parent
@@ -15,6 +21,9 @@ DB_PATH = PROJECT_ROOT / "database" / "itms_production.db"
 EVIDENCE_DIR = PROJECT_ROOT / "dashboard" / "evidence"
 TRAFFIC_RESULTS_PATH = PROJECT_ROOT / "results" / "traffic_results.json"
 
+DEFAULT_PAGE_LIMIT = 50
+MAX_PAGE_LIMIT = 200
+
 app = FastAPI(title="ITMS Backend API")
 
 app.add_middleware(
@@ -49,11 +58,8 @@ class SendSmsRequest(BaseModel):
     note: Optional[str] = None
     
 
-def get_db():
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    conn.execute("PRAGMA foreign_keys = ON;")
-    return conn
+# Reusable connections: a read pool for GETs and a single serialized writer
+db_pools = get_pools(DB_PATH)
 
 
 def parse_violation_id(violation_code: str) -> int:
@@ -163,13 +169,42 @@ def write_audit_log(
 
 
 @app.get("/api/stats")
-def get_stats():
-    conn = get_db()
-    c = conn.cursor()
+def get_stats(
+    intersectionId: Optional[int] = Query(default=None),
+    dateFrom: Optional[str] = Query(default=None),
+    dateTo: Optional[str] = Query(default=None),
+):
+    with db_pools.read() as conn:
+        c = conn.cursor()
+
+        # Counts are maintained by triggers on violation (migration 4), so this
+        # reads a handful of summary rows instead of scanning violation.
+        if intersectionId is None and not dateFrom and not dateTo:
+            c.execute("SELECT status, count FROM violation_status_counts")
+        else:
+            query = """
+                SELECT status, SUM(count) as count
+                FROM violation_daily_status_counts
+                WHERE 1=1
+            """
+            params = []
 
-    c.execute("SELECT status, COUNT(*) as count FROM violation GROUP BY status")
-    rows = c.fetchall()
-    conn.close()
+            if intersectionId is not None:
+                query += " AND intersection_id = ?"
+                params.append(intersectionId)
+
+            if dateFrom:
+                query += " AND day >= DATE(?)"
+                params.append(dateFrom)
+
+            if dateTo:
+                query += " AND day <= DATE(?)"
+                params.append(dateTo)
+
+            query += " GROUP BY status"
+            c.execute(query, params)
+
+        rows = c.fetchall()
 
     stats = {"Flagged": 0, "Approved": 0, "Rejected": 0}
     for row in rows:
@@ -187,28 +222,16 @@ def get_stats():
 
 
 @app.get("/api/violations")
-def get_violations():
-    conn = get_db()
-    c = conn.cursor()
-
-    query = """
-        SELECT
-            v.violation_id,
-            v.plate_number,
-            i.name as intersection_name,
-            v.timestamp,
-            v.confidence_score,
-            v.status,
-            v.image_path,
-            v.video_path,
-            v.review_note
-        FROM violation v
-        LEFT JOIN intersection i ON v.intersection_id = i.intersection_id
-        ORDER BY v.timestamp DESC
-    """
-    c.execute(query)
-    rows = c.fetchall()
-    conn.close()
+def get_violations(
+    limit: int = Query(default=DEFAULT_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT),
+    after: Optional[str] = Query(default=None),
+    status: Optional[str] = Query(default=None),
+):
+    try:
+        with db_pools.read() as conn:
+            rows, next_cursor = fetch_violation_page(conn, limit, after, status)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
     violations = []
     for row in rows:
@@ -227,7 +250,7 @@ def get_violations():
             "reviewNote": row["review_note"] or "",
         })
 
-    return violations
+    return {"items": violations, "nextCursor": next_cursor}
 
 
 @app.get("/api/traffic-results")
@@ -239,28 +262,16 @@ def get_traffic_results():
 
 
 @app.get("/api/review-queue")
-def get_review_queue():
-    conn = get_db()
-    c = conn.cursor()
-
-    query = """
-        SELECT
-            v.violation_id,
-            v.plate_number,
-            i.name as intersection_name,
-            v.timestamp,
-            v.confidence_score,
-            v.status,
-            v.image_path,
-            v.video_path,
-            v.review_note
-        FROM violation v
-        LEFT JOIN intersection i ON v.intersection_id = i.intersection_id
-        ORDER BY v.timestamp DESC
-    """
-    c.execute(query)
-    rows = c.fetchall()
-    conn.close()
+def get_review_queue(
+    limit: int = Query(default=DEFAULT_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT),
+    after: Optional[str] = Query(default=None),
+    status: Optional[str] = Query(default=None),
+):
+    try:
+        with db_pools.read() as conn:
+            rows, next_cursor = fetch_violation_page(conn, limit, after, status)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
     cases = []
     for row in rows:
@@ -281,7 +292,7 @@ def get_review_queue():
             "videoUrl": f"/evidence/{row['video_path']}" if row["video_path"] else None,
         })
 
-    return cases
+    return {"items": cases, "nextCursor": next_cursor}
 
 
 @app.post("/api/review-queue/{violation_code}/decision")
@@ -290,77 +301,75 @@ def decide_review_case(violation_code: str, payload: ReviewDecisionRequest):
         raise HTTPException(status_code=400, detail="Decision must be 'Approved' or 'Rejected'")
 
     violation_id = parse_violation_id(violation_code)
-    conn = get_db()
-    c = conn.cursor()
+    with db_pools.write() as conn:
+        c = conn.cursor()
+
+        c.execute(
+            """
+            SELECT violation_id, status, reviewer_user_id, reviewed_at, review_note
+            FROM violation
+            WHERE violation_id = ?
+            """,
+            (violation_id,),
+        )
+        existing = c.fetchone()
 
-    c.execute(
-        """
-        SELECT violation_id, status, reviewer_user_id, reviewed_at, review_note
-        FROM violation
-        WHERE violation_id = ?
-        """,
-        (violation_id,),
-    )
-    existing = c.fetchone()
+        if not existing:
+            raise HTTPException(status_code=404, detail="Violation not found")
 
-    if not existing:
-        conn.close()
-        raise HTTPException(status_code=404, detail="Violation not found")
+        old_state = {
+            "status": existing["status"],
+            "reviewer_user_id": existing["reviewer_user_id"],
+            "reviewed_at": existing["reviewed_at"],
+            "review_note": existing["review_note"],
+        }
 
-    old_state = {
-        "status": existing["status"],
-        "reviewer_user_id": existing["reviewer_user_id"],
-        "reviewed_at": existing["reviewed_at"],
-        "review_note": existing["review_note"],
-    }
+        reviewed_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+        c.execute(
+            """
+            UPDATE violation
+            SET status = ?, reviewer_user_id = ?, reviewed_at = ?, review_note = ?
+            WHERE violation_id = ?
+            """,
+            (
+                payload.decision,
+                payload.reviewerUserId,
+                reviewed_at,
+                payload.note,
+                violation_id,
+            ),
+        )
 
-    reviewed_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        # Queued in this transaction; api/sms_worker.py calls the provider
+        sms_result = None
+        if payload.decision == "Approved":
+            sms_result = enqueue_sms_for_violation(
+                conn=conn,
+                violation_id=violation_id,
+                user_id=payload.reviewerUserId,
+                note="Automatic SMS after human approval",
+            )
+
+        new_state = {
+            "status": payload.decision,
+            "reviewer_user_id": payload.reviewerUserId,
+            "reviewed_at": reviewed_at,
+            "review_note": payload.note,
+        }
 
-    c.execute(
-        """
-        UPDATE violation
-        SET status = ?, reviewer_user_id = ?, reviewed_at = ?, review_note = ?
-        WHERE violation_id = ?
-        """,
-        (
-            payload.decision,
-            payload.reviewerUserId,
-            reviewed_at,
-            payload.note,
-            violation_id,
-        ),
-        
-    ) 
-    
-    sms_result = None
-    if payload.decision == "Approved":
-        sms_result = process_sms_for_violation(
+        write_audit_log(
             conn=conn,
-            violation_id=violation_id,
             user_id=payload.reviewerUserId,
-            note="Automatic SMS after human approval",
-        )  
-
-    new_state = {
-        "status": payload.decision,
-        "reviewer_user_id": payload.reviewerUserId,
-        "reviewed_at": reviewed_at,
-        "review_note": payload.note,
-    }
-
-    write_audit_log(
-        conn=conn,
-        user_id=payload.reviewerUserId,
-        action_type=f"Review {payload.decision}",
-        entity_type="Violation",
-        entity_id=f"V-{violation_id}",
-        old_value=old_state,
-        new_value=new_state,
-        note=payload.note or f"Violation marked as {payload.decision}",
-    )
+            action_type=f"Review {payload.decision}",
+            entity_type="Violation",
+            entity_id=f"V-{violation_id}",
+            old_value=old_state,
+            new_value=new_state,
+            note=payload.note or f"Violation marked as {payload.decision}",
+        )
 
-    conn.commit()
-    conn.close()
+        conn.commit()
 
     return {
         "message": f"Violation V-{violation_id} updated successfully",
@@ -377,54 +386,10 @@ def get_evidence_search(
     dateTo: Optional[str] = Query(default=None),
     status: Optional[str] = Query(default=None),
 ):
-    conn = get_db()
-    c = conn.cursor()
-
-    query = """
-        SELECT
-            v.violation_id,
-            v.plate_number,
-            i.name as intersection_name,
-            v.timestamp,
-            v.status,
-            v.image_path,
-            v.video_path,
-            v.review_note
-        FROM violation v
-        LEFT JOIN intersection i ON v.intersection_id = i.intersection_id
-        WHERE 1=1
-    """
-    params = []
-
-    if plateNumber:
-        query += " AND UPPER(COALESCE(v.plate_number, '')) LIKE ?"
-        params.append(f"%{plateNumber.upper()}%")
-
-    if intersection:
-        query += " AND LOWER(COALESCE(i.name, '')) LIKE ?"
-        params.append(f"%{intersection.lower()}%")
-
-    if dateFrom:
-        query += " AND DATE(v.timestamp) >= DATE(?)"
-        params.append(dateFrom)
-
-    if dateTo:
-        query += " AND DATE(v.timestamp) <= DATE(?)"
-        params.append(dateTo)
-
-    if status and status != "All":
-        if status == "Approved":
-            query += " AND v.status IN ('Approved', 'AutoApproved', 'Paid')"
-        elif status == "Flagged":
-            query += " AND v.status = 'Pending'"
-        elif status == "Rejected":
-            query += " AND v.status = 'Rejected'"
-
-    query += " ORDER BY v.timestamp DESC"
-
-    c.execute(query, params)
-    rows = c.fetchall()
-    conn.close()
+    with db_pools.read() as conn:
+        c = conn.cursor()
+        c.execute(*build_evidence_search_query(plateNumber, intersection, dateFrom, dateTo, status))
+        rows = c.fetchall()
 
     records = []
     for row in rows:
@@ -451,43 +416,41 @@ def log_evidence_access(violation_code: str, payload: EvidenceAccessRequest):
         raise HTTPException(status_code=400, detail="Action must be 'Viewed' or 'Exported'")
 
     violation_id = parse_violation_id(violation_code)
-    conn = get_db()
-    c = conn.cursor()
+    with db_pools.write() as conn:
+        c = conn.cursor()
+
+        c.execute(
+            """
+            SELECT violation_id, plate_number, image_path, video_path, timestamp
+            FROM violation
+            WHERE violation_id = ?
+            """,
+            (violation_id,),
+        )
+        row = c.fetchone()
 
-    c.execute(
-        """
-        SELECT violation_id, plate_number, image_path, video_path, timestamp
-        FROM violation
-        WHERE violation_id = ?
-        """,
-        (violation_id,),
-    )
-    row = c.fetchone()
-
-    if not row:
-        conn.close()
-        raise HTTPException(status_code=404, detail="Violation not found")
-
-    evidence_type = "Video" if row["video_path"] else "Image" if row["image_path"] else "None"
-
-    write_audit_log(
-        conn=conn,
-        user_id=payload.userId,
-        action_type="Evidence Accessed",
-        entity_type="Violation",
-        entity_id=f"V-{violation_id}",
-        old_value=None,
-        new_value={
-            "action": payload.action,
-            "evidence_type": evidence_type,
-            "plate_number": row["plate_number"],
-            "timestamp": row["timestamp"],
-        },
-        note=payload.note or f"Evidence {payload.action.lower()} for V-{violation_id}",
-    )
+        if not row:
+            raise HTTPException(status_code=404, detail="Violation not found")
+
+        evidence_type = "Video" if row["video_path"] else "Image" if row["image_path"] else "None"
+
+        write_audit_log(
+            conn=conn,
+            user_id=payload.userId,
+            action_type="Evidence Accessed",
+            entity_type="Violation",
+            entity_id=f"V-{violation_id}",
+            old_value=None,
+            new_value={
+                "action": payload.action,
+                "evidence_type": evidence_type,
+                "plate_number": row["plate_number"],
+                "timestamp": row["timestamp"],
+            },
+            note=payload.note or f"Evidence {payload.action.lower()} for V-{violation_id}",
+        )
 
-    conn.commit()
-    conn.close()
+        conn.commit()
 
     return {
         "message": f"Evidence access logged for V-{violation_id}",
@@ -498,50 +461,102 @@ def log_evidence_access(violation_code: str, payload: EvidenceAccessRequest):
 @app.post("/api/violations/{violation_code}/send-sms")
 def send_violation_sms(violation_code: str, payload: SendSmsRequest):
     violation_id = parse_violation_id(violation_code)
-    conn = get_db()
 
     try:
-        result = process_sms_for_violation(
-            conn=conn,
-            violation_id=violation_id,
-            user_id=payload.userId,
-            note=payload.note or "Manual SMS trigger from API/UI",
-        )
-        conn.commit()
-        return result
+        with db_pools.write() as conn:
+            result = send_sms_for_violation(
+                conn=conn,
+                violation_id=violation_id,
+                user_id=payload.userId,
+                note=payload.note or "Manual SMS trigger from API/UI",
+            )
+            conn.commit()
+            return result
 
     except Exception as e:
-        conn.rollback()
-        raise HTTPException(status_code=500, detail=f"Failed to send SMS: {str(e)}")
-    finally:
-        conn.close()
-        
+        raise HTTPException(status_code=500, detail=f"Failed to queue SMS: {str(e)}")
+
+
+@app.post("/api/notifications/sms/resend-approved-today")
+def resend_approved_today_sms(payload: SendSmsRequest):
+    """
+    Back-office bulk action: queue an SMS for every case approved today
+    that has not had one yet. api/sms_worker.py sends them and skips
+    exempt and unregistered cases by the usual rules. The writer is held
+    only for one short upsert batch per chunk, so review decisions are not
+    blocked behind a large resend.
+    """
+    day_start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    day_end = day_start + timedelta(days=1)
+    bounds = (day_start.strftime("%Y-%m-%d %H:%M:%S"), day_end.strftime("%Y-%m-%d %H:%M:%S"))
+    note = payload.note or "Bulk SMS resend for cases approved today"
+
+    summary = {"Queued": 0, "Skipped": 0, "Failed": 0}
+
+    try:
+        with db_pools.read() as conn:
+            c = conn.cursor()
+            c.execute(
+                """
+                SELECT violation_id
+                FROM violation
+                WHERE (status = 'Approved' AND reviewed_at >= ? AND reviewed_at < ?)
+                   OR (status = 'AutoApproved' AND timestamp >= ? AND timestamp < ?)
+                """,
+                bounds + bounds,
+            )
+            violation_ids = sorted(row["violation_id"] for row in c.fetchall())
+
+        for chunk in chunked(violation_ids):
+            with db_pools.write() as conn:
+                results = send_sms_for_violations(
+                    conn, chunk, user_id=payload.userId, note=note
+                )
+                conn.commit()
+
+            for result in results:
+                summary[result["status"]] += 1
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to queue SMS: {str(e)}")
+
+    return {
+        "message": (
+            f"Queued {summary['Queued']} of {len(violation_ids)} approved case(s) from today; "
+            f"{summary['Skipped']} already had an SMS"
+        ),
+        "total": len(violation_ids),
+        "summary": summary,
+    }
+
+
 @app.get("/api/notifications/sms")
 def get_sms_notifications():
-    conn = get_db()
-    c = conn.cursor()
-
-    c.execute(
-        """
-        SELECT
-            n.notification_id,
-            n.violation_id,
-            n.recipient_phone,
-            n.message_text,
-            n.status,
-            n.provider,
-            n.provider_message_id,
-            n.error_message,
-            n.created_at,
-            n.sent_at
-        FROM notification_log n
-        WHERE n.channel = 'SMS'
-        ORDER BY n.created_at DESC
-        """
-    )
+    with db_pools.read() as conn:
+        c = conn.cursor()
+
+        c.execute(
+            """
+            SELECT
+                n.notification_id,
+                n.violation_id,
+                n.recipient_phone,
+                n.message_text,
+                n.status,
+                n.provider,
+                n.provider_message_id,
+                n.error_message,
+                n.created_at,
+                n.sent_at,
+                n.request_count
+            FROM notification_log n
+            WHERE n.channel = 'SMS'
+              AND n.status != 'Superseded'
+            ORDER BY n.created_at DESC
+            """
+        )
 
-    rows = c.fetchall()
-    conn.close()
+        rows = c.fetchall()
 
     return [
         {
@@ -555,33 +570,33 @@ def get_sms_notifications():
             "errorMessage": row["error_message"],
             "createdAt": row["created_at"],
             "sentAt": row["sent_at"],
+            "requestCount": row["request_count"],
         }
         for row in rows
     ]
 
 @app.get("/api/audit-log")
 def get_audit_log():
-    conn = get_db()
-    c = conn.cursor()
-
-    query = """
-        SELECT
-            a.audit_id,
-            a.timestamp,
-            a.action_type,
-            a.entity_type,
-            a.entity_id,
-            a.old_value,
-            a.new_value,
-            a.note,
-            u.full_name as actor_name
-        FROM audit_log a
-        LEFT JOIN system_user u ON a.user_id = u.user_id
-        ORDER BY a.timestamp DESC
-    """
-    c.execute(query)
-    rows = c.fetchall()
-    conn.close()
+    with db_pools.read() as conn:
+        c = conn.cursor()
+
+        query = """
+            SELECT
+                a.audit_id,
+                a.timestamp,
+                a.action_type,
+                a.entity_type,
+                a.entity_id,
+                a.old_value,
+                a.new_value,
+                a.note,
+                u.full_name as actor_name
+            FROM audit_log a
+            LEFT JOIN system_user u ON a.user_id = u.user_id
+            ORDER BY a.timestamp DESC
+        """
+        c.execute(query)
+        rows = c.fetchall()
 
     events = []
     for row in rows:
@@ -618,23 +633,22 @@ def get_audit_log():
 
 @app.get("/api/config")
 def get_config():
-    conn = get_db()
-    c = conn.cursor()
-
-    query = """
-        SELECT
-            sc.config_key,
-            sc.config_value,
-            sc.updated_at,
-            sc.updated_by,
-            su.full_name as updated_by_name
-        FROM system_config sc
-        LEFT JOIN system_user su ON sc.updated_by = su.user_id
-        ORDER BY sc.config_key ASC
-    """
-    c.execute(query)
-    rows = c.fetchall()
-    conn.close()
+    with db_pools.read() as conn:
+        c = conn.cursor()
+
+        query = """
+            SELECT
+                sc.config_key,
+                sc.config_value,
+                sc.updated_at,
+                sc.updated_by,
+                su.full_name as updated_by_name
+            FROM system_config sc
+            LEFT JOIN system_user su ON sc.updated_by = su.user_id
+            ORDER BY sc.config_key ASC
+        """
+        c.execute(query)
+        rows = c.fetchall()
 
     config_items = []
     for row in rows:
@@ -651,58 +665,62 @@ def get_config():
 
 @app.put("/api/config/{config_key}")
 def update_config(config_key: str, payload: ConfigUpdateRequest):
-    conn = get_db()
-    c = conn.cursor()
-
-    c.execute(
-        """
-        SELECT config_key, config_value, updated_at, updated_by
-        FROM system_config
-        WHERE config_key = ?
-        """,
-        (config_key,),
-    )
-    existing = c.fetchone()
+    with db_pools.write() as conn:
+        c = conn.cursor()
+
+        c.execute(
+            """
+            SELECT config_key, config_value, updated_at, updated_by
+            FROM system_config
+            WHERE config_key = ?
+            """,
+            (config_key,),
+        )
+        existing = c.fetchone()
+
+        old_state = None
+        if existing:
+            old_state = {
+                "config_key": existing["config_key"],
+                "config_value": existing["config_value"],
+                "updated_at": existing["updated_at"],
+                "updated_by": existing["updated_by"],
+            }
+
+        c.execute(
+            """
+            INSERT INTO system_config (config_key, config_value, updated_at, updated_by)
+            VALUES (?, ?, CURRENT_TIMESTAMP, ?)
+            ON CONFLICT(config_key) DO UPDATE SET
+                config_value = excluded.config_value,
+                updated_at = CURRENT_TIMESTAMP,
+                updated_by = excluded.updated_by
+            """,
+            (config_key, payload.configValue, payload.updatedBy),
+        )
 
-    old_state = None
-    if existing:
-        old_state = {
-            "config_key": existing["config_key"],
-            "config_value": existing["config_value"],
-            "updated_at": existing["updated_at"],
-            "updated_by": existing["updated_by"],
+        new_state = {
+            "config_key": config_key,
+            "config_value": payload.configValue,
+            "updated_by": payload.updatedBy,
         }
 
-    c.execute(
-        """
-        INSERT INTO system_config (config_key, config_value, updated_at, updated_by)
-        VALUES (?, ?, CURRENT_TIMESTAMP, ?)
-        ON CONFLICT(config_key) DO UPDATE SET
-            config_value = excluded.config_value,
-            updated_at = CURRENT_TIMESTAMP,
-            updated_by = excluded.updated_by
-        """,
-        (config_key, payload.configValue, payload.updatedBy),
-    )
+        write_audit_log(
+            conn=conn,
+            user_id=payload.updatedBy,
+            action_type="Configuration Updated",
+            entity_type="System_Config",
+            entity_id=config_key,
+            old_value=old_state,
+            new_value=new_state,
+            note=payload.note or f"Configuration '{config_key}' updated",
+        )
 
-    new_state = {
-        "config_key": config_key,
-        "config_value": payload.configValue,
-        "updated_by": payload.updatedBy,
-    }
+        conn.commit()
 
-    write_audit_log(
-        conn=conn,
-        user_id=payload.updatedBy,
-        action_type="Configuration Updated",
-        entity_type="System_Config",
-        entity_id=config_key,
-        old_value=old_state,
-        new_value=new_state,
-        note=payload.note or f"Configuration '{config_key}' updated",
-    )
+    return {"message": f"Configuration '{config_key}' updated successfully"}
 
-    conn.commit()
-    conn.close()
 
-    return {"message": f"Configuration '{config_key}' updated successfully"}
\ No newline at end of file
+@app.get("/api/system/db-pool")
+def get_db_pool_stats():
+    return db_pools.stats()
@@ -0,0 +1,86 @@
+# api/sms_benchmark.py
+"""
+Measures sustained messages/second and tail latency of the SMS dispatch
+path against the local gateway stub. No carrier or database is involved.
+
+Run from the project root:  python -m api.sms_benchmark
+"""
+import asyncio
+import json
+import time
+
+from api.sms_gateway_stub import SmsGatewayStub
+from api.sms_providers import AsyncSmsDispatcher, HttpGatewayProvider
+
+MESSAGE_COUNT = 500
+RATE_PER_SECOND = 200.0
+MAX_IN_FLIGHT = 32
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(int(round(pct / 100 * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+async def run_benchmark(
+    message_count=MESSAGE_COUNT,
+    rate_per_second=RATE_PER_SECOND,
+    max_in_flight=MAX_IN_FLIGHT,
+    mean_latency_ms=80.0,
+    latency_jitter_ms=40.0,
+    failure_rate=0.02,
+):
+    gateway = await SmsGatewayStub(
+        port=0,
+        mean_latency_ms=mean_latency_ms,
+        latency_jitter_ms=latency_jitter_ms,
+        failure_rate=failure_rate,
+        seed=1,
+    ).start()
+
+    try:
+        dispatcher = AsyncSmsDispatcher(
+            HttpGatewayProvider(gateway.url),
+            rate_per_second=rate_per_second,
+            max_in_flight=max_in_flight,
+        )
+        messages = [
+            (f"+26377{i:07d}", f"ITMS benchmark message {i}")
+            for i in range(message_count)
+        ]
+
+        started = time.perf_counter()
+        results = await dispatcher.send_many(messages)
+        elapsed = time.perf_counter() - started
+    finally:
+        await gateway.stop()
+
+    latencies_ms = sorted(result.latency * 1000 for result in results)
+    sent = sum(1 for result in results if result.ok)
+
+    return {
+        "messages": message_count,
+        "sent": sent,
+        "failed": message_count - sent,
+        "elapsedSeconds": round(elapsed, 3),
+        "messagesPerSecond": round(message_count / elapsed, 1) if elapsed else 0.0,
+        "latencyMs": {
+            "p50": round(percentile(latencies_ms, 50), 1),
+            "p95": round(percentile(latencies_ms, 95), 1),
+            "p99": round(percentile(latencies_ms, 99), 1),
+            "max": round(latencies_ms[-1], 1) if latencies_ms else 0.0,
+        },
+        "config": {
+            "ratePerSecond": rate_per_second,
+            "maxInFlight": max_in_flight,
+            "gatewayLatencyMs": mean_latency_ms,
+            "gatewayJitterMs": latency_jitter_ms,
+            "gatewayFailureRate": failure_rate,
+        },
+    }
+
+
+if __name__ == "__main__":
+    print(json.dumps(asyncio.run(run_benchmark()), indent=2))
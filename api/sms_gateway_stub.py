@@ -0,0 +1,131 @@
+# api/sms_gateway_stub.py
+"""
+Local stand-in for a carrier SMS gateway, for load-testing the dispatch
+path. Accepts POST /send with {"to", "message"} and answers after a
+configurable latency, failing a configurable fraction of requests with 503.
+
+Run from the project root:  python -m api.sms_gateway_stub
+"""
+import asyncio
+import json
+import random
+import uuid
+
+HOST = "127.0.0.1"
+PORT = 8025
+MEAN_LATENCY_MS = 80.0
+LATENCY_JITTER_MS = 40.0
+FAILURE_RATE = 0.02
+
+
+class SmsGatewayStub:
+    def __init__(
+        self,
+        host=HOST,
+        port=PORT,
+        mean_latency_ms=MEAN_LATENCY_MS,
+        latency_jitter_ms=LATENCY_JITTER_MS,
+        failure_rate=FAILURE_RATE,
+        seed=None,
+    ):
+        self.host = host
+        self.port = port
+        self.mean_latency_ms = mean_latency_ms
+        self.latency_jitter_ms = latency_jitter_ms
+        self.failure_rate = failure_rate
+        self.random = random.Random(seed)
+
+        self.received = 0
+        self.failed = 0
+        self._server = None
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}/send"
+
+    def _latency_seconds(self):
+        jitter = self.random.uniform(-self.latency_jitter_ms, self.latency_jitter_ms)
+        return max(self.mean_latency_ms + jitter, 0.0) / 1000
+
+    async def _respond(self, writer, status, reason, payload):
+        body = json.dumps(payload).encode("utf-8")
+        writer.write(
+            (
+                f"HTTP/1.1 {status} {reason}\r\n"
+                "Content-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                "Connection: close\r\n\r\n"
+            ).encode("ascii")
+            + body
+        )
+        await writer.drain()
+
+    async def _handle(self, reader, writer):
+        try:
+            request_line = await reader.readline()
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                key, _, value = line.decode("latin-1").partition(":")
+                headers[key.strip().lower()] = value.strip()
+
+            length = int(headers.get("content-length", "0"))
+            body = await reader.readexactly(length) if length else b""
+
+            method, path = request_line.decode("latin-1").split()[:2]
+            if method != "POST" or path != "/send":
+                await self._respond(writer, 404, "Not Found", {"error": "not found"})
+                return
+
+            try:
+                message = json.loads(body)
+                message["to"], message["message"]
+            except (ValueError, KeyError, TypeError):
+                await self._respond(writer, 400, "Bad Request", {"error": "invalid payload"})
+                return
+
+            self.received += 1
+            await asyncio.sleep(self._latency_seconds())
+
+            if self.random.random() < self.failure_rate:
+                self.failed += 1
+                await self._respond(writer, 503, "Service Unavailable", {"error": "carrier busy"})
+                return
+
+            await self._respond(writer, 200, "OK", {"messageId": f"gw-{uuid.uuid4().hex[:12]}"})
+
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        # Pick up the real port when started with port=0
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def serve_forever(self):
+        await self.start()
+        print(
+            f"📡 SMS gateway stub on {self.url} "
+            f"(latency={self.mean_latency_ms}±{self.latency_jitter_ms}ms, "
+            f"failure_rate={self.failure_rate:.1%})"
+        )
+        async with self._server:
+            await self._server.serve_forever()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(SmsGatewayStub().serve_forever())
+    except KeyboardInterrupt:
+        print("🛑 SMS gateway stub stopped.")
@@ -0,0 +1,184 @@
+# api/sms_providers.py
+"""
+Pluggable SMS providers and an asyncio dispatcher that sends many messages
+concurrently under a per-second rate limit and a max in-flight limit.
+"""
+from abc import ABC, abstractmethod
+import asyncio
+import json
+import logging
+import time
+import uuid
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+
+class SmsProviderError(Exception):
+    """The provider rejected the message or could not be reached."""
+
+
+class SmsProvider(ABC):
+    """Subclasses implement `send` and return a provider message id."""
+
+    name = "Unknown"
+
+    @abstractmethod
+    async def send(self, phone_number: str, message_text: str) -> str:
+        ...
+
+
+class MockSmsProvider(SmsProvider):
+    """Sends nothing; logs each message unless verbose=False."""
+
+    name = "MockSMS"
+
+    def __init__(self, verbose=True):
+        self.verbose = verbose
+
+    async def send(self, phone_number: str, message_text: str) -> str:
+        provider_message_id = f"mock-{uuid.uuid4().hex[:12]}"
+        if self.verbose:
+            logger.info("Mock SMS %s to %s: %s", provider_message_id, phone_number, message_text)
+        return provider_message_id
+
+
+class HttpGatewayProvider(SmsProvider):
+    """
+    Minimal JSON-over-HTTP/1.1 client built on asyncio streams, so no extra
+    HTTP dependency is needed. Expects POST {"to", "message"} and a 2xx
+    JSON reply carrying "messageId".
+    """
+
+    name = "HttpGateway"
+
+    def __init__(self, url: str, timeout: float = 10.0):
+        parts = urlsplit(url)
+        if parts.scheme != "http":
+            raise ValueError("HttpGatewayProvider only supports http:// URLs")
+
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.path = parts.path or "/"
+        self.timeout = timeout
+
+    async def _post(self, body: bytes):
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            writer.write(
+                (
+                    f"POST {self.path} HTTP/1.1\r\n"
+                    f"Host: {self.host}:{self.port}\r\n"
+                    "Content-Type: application/json\r\n"
+                    f"Content-Length: {len(body)}\r\n"
+                    "Connection: close\r\n\r\n"
+                ).encode("ascii")
+                + body
+            )
+            await writer.drain()
+
+            status_line = await reader.readline()
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                key, _, value = line.decode("latin-1").partition(":")
+                headers[key.strip().lower()] = value.strip()
+
+            length = int(headers.get("content-length", "0"))
+            payload = await reader.readexactly(length) if length else await reader.read()
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+        try:
+            status = int(status_line.split()[1])
+        except (IndexError, ValueError):
+            raise SmsProviderError(f"Malformed gateway response: {status_line!r}")
+
+        return status, payload
+
+    async def send(self, phone_number: str, message_text: str) -> str:
+        body = json.dumps({"to": phone_number, "message": message_text}).encode("utf-8")
+
+        try:
+            status, payload = await asyncio.wait_for(self._post(body), self.timeout)
+        except asyncio.TimeoutError:
+            raise SmsProviderError(f"Gateway timed out after {self.timeout:.1f}s")
+        except OSError as e:
+            raise SmsProviderError(f"Gateway unreachable: {e}")
+
+        if status < 200 or status >= 300:
+            raise SmsProviderError(f"Gateway returned HTTP {status}: {payload[:200]!r}")
+
+        try:
+            return json.loads(payload)["messageId"]
+        except (ValueError, KeyError):
+            raise SmsProviderError("Gateway response had no messageId")
+
+
+class RateLimiter:
+    """
+    Spaces calls at least 1/rate seconds apart. Holds no loop-bound
+    primitives, so one limiter can be reused across asyncio.run() calls.
+    """
+
+    def __init__(self, rate_per_second: float):
+        self.interval = 1.0 / rate_per_second if rate_per_second else 0.0
+        self._next_slot = 0.0
+
+    async def acquire(self):
+        if not self.interval:
+            return
+
+        now = time.monotonic()
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + self.interval
+
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+class DispatchResult:
+    __slots__ = ("ok", "provider_message_id", "error", "latency")
+
+    def __init__(self, ok, provider_message_id=None, error=None, latency=0.0):
+        self.ok = ok
+        self.provider_message_id = provider_message_id
+        self.error = error
+        self.latency = latency
+
+
+class AsyncSmsDispatcher:
+    def __init__(self, provider: SmsProvider, rate_per_second=20.0, max_in_flight=10):
+        self.provider = provider
+        self.rate_limiter = RateLimiter(rate_per_second)
+        self.max_in_flight = max_in_flight
+
+    async def _send_one(self, semaphore, phone_number, message_text):
+        async with semaphore:
+            await self.rate_limiter.acquire()
+            started = time.perf_counter()
+            try:
+                message_id = await self.provider.send(phone_number, message_text)
+                return DispatchResult(True, message_id, latency=time.perf_counter() - started)
+            except Exception as e:
+                return DispatchResult(False, error=str(e), latency=time.perf_counter() - started)
+
+    async def send_many(self, messages):
+        """
+        messages: iterable of (phone_number, message_text).
+        Returns one DispatchResult per message, in order. Never raises for
+        a single failed message.
+        """
+        semaphore = asyncio.Semaphore(self.max_in_flight)
+        return await asyncio.gather(
+            *(self._send_one(semaphore, phone, text) for phone, text in messages)
+        )
+
+    def send_many_sync(self, messages):
+        return asyncio.run(self.send_many(list(messages)))
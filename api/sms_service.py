@@ -1,7 +1,4 @@
 # api/sms_service.py
-from datetime import datetime
-import sqlite3
-import uuid
 import json
 
 
@@ -35,6 +32,33 @@ def write_audit_log(
     )
 
 
+def write_audit_logs(conn, entries):
+    """
+    Batch form of write_audit_log: entries are tuples of its arguments
+    (user_id, action_type, entity_type, entity_id, old_value, new_value, note).
+    """
+    conn.cursor().executemany(
+        """
+        INSERT INTO audit_log (
+            user_id, action_type, entity_type, entity_id, old_value, new_value, note
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        """,
+        [
+            (
+                user_id,
+                action_type,
+                entity_type,
+                entity_id,
+                json.dumps(old_value) if old_value is not None else None,
+                json.dumps(new_value) if new_value is not None else None,
+                note,
+            )
+            for user_id, action_type, entity_type, entity_id, old_value, new_value, note in entries
+        ],
+    )
+
+
 def get_violation_sms_context(conn, violation_id: int):
     c = conn.cursor()
     c.execute(
@@ -58,238 +82,299 @@ def get_violation_sms_context(conn, violation_id: int):
     return c.fetchone()
 
 
-def latest_sms_already_sent(conn, violation_id: int) -> bool:
-    c = conn.cursor()
-    c.execute(
-        """
-        SELECT 1
-        FROM notification_log
-        WHERE violation_id = ? AND channel = 'SMS' AND status = 'Sent'
-        ORDER BY created_at DESC
-        LIMIT 1
-        """,
-        (violation_id,),
-    )
-    return c.fetchone() is not None
+# Keep IN (...) lists under SQLite's default host parameter limit (999)
+BULK_CHUNK_SIZE = 500
 
 
-def build_sms_message(row):
-    violation_code = f"V-{row['violation_id']}"
-    timestamp = row["timestamp"] or "unknown time"
+def chunked(values, size=BULK_CHUNK_SIZE):
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
 
-    fine_text = ""
-    if row["fine_amount"] is not None:
-        fine_text = f" Fine amount: ${row['fine_amount']:.2f}."
 
-    return (
-        f"ITMS Notice: A traffic violation ({violation_code}) was recorded on {timestamp}."
-        f"{fine_text} Please follow up with the traffic office if needed."
-    )
+def get_violation_sms_contexts(conn, violation_ids):
+    """
+    Bulk version of get_violation_sms_context: one joined query per chunk.
+    Returns {violation_id: row}.
+    """
+    contexts = {}
+    c = conn.cursor()
 
+    for chunk in chunked(list(violation_ids)):
+        placeholders = ", ".join("?" for _ in chunk)
+        c.execute(
+            f"""
+            SELECT
+                v.violation_id,
+                v.plate_number,
+                v.timestamp,
+                v.status AS violation_status,
+                v.fine_amount,
+                veh.is_exempt,
+                d.full_name AS driver_name,
+                d.phone_number
+            FROM violation v
+            LEFT JOIN vehicle veh ON v.plate_number = veh.plate_number
+            LEFT JOIN driver d ON veh.owner_id = d.driver_id
+            WHERE v.violation_id IN ({placeholders})
+            """,
+            chunk,
+        )
+        for row in c.fetchall():
+            contexts[row["violation_id"]] = row
 
-def insert_notification_log(
-    conn,
-    violation_id: int,
-    recipient_phone,
-    message_text,
-    status,
-    provider="MockSMS",
-    provider_message_id=None,
-    error_message=None,
-):
-    c = conn.cursor()
+    return contexts
 
-    sent_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S") if status == "Sent" else None
 
-    c.execute(
-        """
+# At most one "live" row exists per (violation, channel); see the partial
+# unique index uq_notification_log_live (migration 7). This condition must
+# match the index's WHERE clause exactly for SQLite to use the index.
+LIVE_SMS_CONDITION = "status IN ('Queued', 'Sent', 'Skipped')"
+
+
+def reserve_sms(conn, violation_ids, user_id=None, note=None):
+    """
+    Idempotent reservation keyed on (violation, 'SMS'): a single indexed
+    upsert per id either creates the live Queued row or collapses the
+    request onto the existing one by bumping request_count. A Skipped row
+    is re-armed to Queued so the rules are evaluated again; a Queued or
+    Sent row is left as it is. With no live row, the newest Failed row is
+    re-armed instead of inserting another, so retries of an SMS that keeps
+    failing stay on one row.
+
+    Returns {violation_id: live row} with a `leased` flag that is true
+    while a Queued row is claimed by a worker or waiting out a backoff.
+    """
+    violation_ids = list(violation_ids)
+    if not violation_ids:
+        return {}
+
+    c = conn.cursor()
+    c.executemany(
+        f"""
+        UPDATE notification_log
+        SET status = 'Queued',
+            requested_by = ?,
+            request_note = ?,
+            next_attempt_at = CURRENT_TIMESTAMP,
+            attempt_count = 0
+        WHERE notification_id = (
+            SELECT MAX(notification_id) FROM notification_log
+            WHERE violation_id = ? AND channel = 'SMS' AND status = 'Failed'
+        )
+          AND NOT EXISTS (
+            SELECT 1 FROM notification_log
+            WHERE violation_id = ? AND channel = 'SMS' AND {LIVE_SMS_CONDITION}
+        )
+        """,
+        [(user_id, note, violation_id, violation_id) for violation_id in violation_ids],
+    )
+    c.executemany(
+        f"""
         INSERT INTO notification_log
         (
             violation_id,
             channel,
-            recipient_phone,
-            message_text,
             status,
-            provider,
-            provider_message_id,
-            error_message,
-            sent_at
+            requested_by,
+            request_note,
+            next_attempt_at,
+            last_requested_at
         )
-        VALUES (?, 'SMS', ?, ?, ?, ?, ?, ?, ?)
+        VALUES (?, 'SMS', 'Queued', ?, ?, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
+        ON CONFLICT(violation_id, channel) WHERE {LIVE_SMS_CONDITION}
+        DO UPDATE SET
+            request_count = request_count + 1,
+            last_requested_at = CURRENT_TIMESTAMP,
+            requested_by = CASE WHEN status = 'Skipped' THEN excluded.requested_by ELSE requested_by END,
+            request_note = CASE WHEN status = 'Skipped' THEN excluded.request_note ELSE request_note END,
+            next_attempt_at = CASE WHEN status = 'Skipped' THEN CURRENT_TIMESTAMP ELSE next_attempt_at END,
+            attempt_count = CASE WHEN status = 'Skipped' THEN 0 ELSE attempt_count END,
+            status = CASE WHEN status = 'Skipped' THEN 'Queued' ELSE status END
         """,
-        (
-            violation_id,
-            recipient_phone,
-            message_text,
-            status,
-            provider,
-            provider_message_id,
-            error_message,
-            sent_at,
-        ),
+        [(violation_id, user_id, note) for violation_id in violation_ids],
     )
 
-    return c.lastrowid
+    live = {}
+    for chunk in chunked(violation_ids):
+        placeholders = ", ".join("?" for _ in chunk)
+        c.execute(
+            f"""
+            SELECT
+                notification_id,
+                violation_id,
+                status,
+                recipient_phone,
+                request_count,
+                next_attempt_at > CURRENT_TIMESTAMP AS leased
+            FROM notification_log
+            WHERE violation_id IN ({placeholders})
+              AND channel = 'SMS'
+              AND {LIVE_SMS_CONDITION}
+            """,
+            chunk,
+        )
+        for row in c.fetchall():
+            live[row["violation_id"]] = row
 
+    return live
 
-def mock_send_sms(phone_number: str, message_text: str):
-    provider_message_id = f"mock-{uuid.uuid4().hex[:12]}"
-    print("\n" + "=" * 60)
-    print("📱 MOCK SMS SENT")
-    print(f"To: {phone_number}")
-    print(f"Message: {message_text}")
-    print(f"Provider Message ID: {provider_message_id}")
-    print("=" * 60 + "\n")
-    return provider_message_id
 
+def build_sms_message(row):
+    violation_code = f"V-{row['violation_id']}"
+    timestamp = row["timestamp"] or "unknown time"
 
-def send_sms_for_violation(conn, violation_id: int):
-    row = get_violation_sms_context(conn, violation_id)
-    if not row:
-        return {
-            "ok": False,
-            "status": "Failed",
-            "message": "Violation not found.",
-            "recipientPhone": None,
-            "notificationId": None,
-        }
+    fine_text = ""
+    if row["fine_amount"] is not None:
+        fine_text = f" Fine amount: ${row['fine_amount']:.2f}."
+
+    return (
+        f"ITMS Notice: A traffic violation ({violation_code}) was recorded on {timestamp}."
+        f"{fine_text} Please follow up with the traffic office if needed."
+    )
 
-    if latest_sms_already_sent(conn, violation_id):
-        notification_id = insert_notification_log(
-            conn=conn,
-            violation_id=violation_id,
-            recipient_phone=row["phone_number"],
-            message_text=None,
-            status="Skipped",
-            error_message="SMS already sent previously for this violation.",
-        )
-        return {
-            "ok": True,
-            "status": "Skipped",
-            "message": "SMS already sent previously for this violation.",
-            "recipientPhone": row["phone_number"],
-            "notificationId": notification_id,
-        }
 
+def sms_rule_outcome(row):
+    """
+    Applies the Skipped/Failed rules to a violation's SMS context.
+    Returns (status, message, recipient_phone), or None when the SMS
+    should go out to row["phone_number"].
+
+    "Already sent" is not checked here: the live-row unique index makes a
+    second Sent row for the same violation impossible.
+    """
     if row["violation_status"] not in ["Approved", "AutoApproved"]:
-        notification_id = insert_notification_log(
-            conn=conn,
-            violation_id=violation_id,
-            recipient_phone=row["phone_number"],
-            message_text=None,
-            status="Skipped",
-            error_message=f"Violation status '{row['violation_status']}' is not eligible for SMS.",
+        return (
+            "Skipped",
+            f"Violation status '{row['violation_status']}' is not eligible for SMS.",
+            row["phone_number"],
         )
-        return {
-            "ok": True,
-            "status": "Skipped",
-            "message": f"Violation status '{row['violation_status']}' is not eligible for SMS.",
-            "recipientPhone": row["phone_number"],
-            "notificationId": notification_id,
-        }
 
     if row["is_exempt"] == 1:
-        notification_id = insert_notification_log(
-            conn=conn,
-            violation_id=violation_id,
-            recipient_phone=row["phone_number"],
-            message_text=None,
-            status="Skipped",
-            error_message="Vehicle is exempt; SMS not sent.",
-        )
-        return {
-            "ok": True,
-            "status": "Skipped",
-            "message": "Vehicle is exempt; SMS not sent.",
-            "recipientPhone": row["phone_number"],
-            "notificationId": notification_id,
-        }
+        return ("Skipped", "Vehicle is exempt; SMS not sent.", row["phone_number"])
 
     if not row["plate_number"]:
-        notification_id = insert_notification_log(
-            conn=conn,
-            violation_id=violation_id,
-            recipient_phone=None,
-            message_text=None,
-            status="Skipped",
-            error_message="Violation has no linked registered plate.",
-        )
-        return {
-            "ok": True,
-            "status": "Skipped",
-            "message": "Violation has no linked registered plate.",
-            "recipientPhone": None,
-            "notificationId": notification_id,
-        }
+        return ("Skipped", "Violation has no linked registered plate.", None)
 
     if not row["phone_number"]:
-        notification_id = insert_notification_log(
-            conn=conn,
-            violation_id=violation_id,
-            recipient_phone=None,
-            message_text=None,
-            status="Failed",
-            error_message="No driver phone number available.",
-        )
-        return {
-            "ok": False,
-            "status": "Failed",
-            "message": "No driver phone number available.",
-            "recipientPhone": None,
-            "notificationId": notification_id,
-        }
+        return ("Failed", "No driver phone number available.", None)
 
-    message_text = build_sms_message(row)
-    provider_message_id = mock_send_sms(row["phone_number"], message_text)
-
-    notification_id = insert_notification_log(
-        conn=conn,
-        violation_id=violation_id,
-        recipient_phone=row["phone_number"],
-        message_text=message_text,
-        status="Sent",
-        provider="MockSMS",
-        provider_message_id=provider_message_id,
-    )
-
-    return {
-        "ok": True,
-        "status": "Sent",
-        "message": "SMS sent successfully via mock provider.",
-        "recipientPhone": row["phone_number"],
-        "notificationId": notification_id,
-    }
+    return None
 
 
-def process_sms_for_violation(conn, violation_id: int, user_id=None, note=None):
+def enqueue_sms_for_violations(conn, violation_ids, user_id=None, note=None):
     """
-    Central helper:
-    - sends / skips / fails SMS based on current violation state
-    - writes matching audit log
+    Transactional outbox: reserves the SMS on the caller's connection so it
+    commits (or rolls back) together with the violation change. The
+    provider is called later by api/sms_worker.py. Repeat requests collapse
+    onto the existing live row.
     """
-    result = send_sms_for_violation(conn, violation_id)
-
-    action_type = (
+    violation_ids = list(violation_ids)
+    reserved = reserve_sms(conn, violation_ids, user_id, note)
+
+    results = []
+    for violation_id in violation_ids:
+        live = reserved[violation_id]
+        if live["status"] == "Sent":
+            results.append({
+                "violationId": violation_id,
+                "ok": True,
+                "status": "Skipped",
+                "message": "SMS already sent previously for this violation.",
+                "recipientPhone": live["recipient_phone"],
+                "notificationId": live["notification_id"],
+            })
+        else:
+            results.append({
+                "violationId": violation_id,
+                "ok": True,
+                "status": "Queued",
+                "message": "SMS queued for dispatch.",
+                "recipientPhone": None,
+                "notificationId": live["notification_id"],
+            })
+    return results
+
+
+def enqueue_sms_for_violation(conn, violation_id: int, user_id=None, note=None):
+    result = enqueue_sms_for_violations(conn, [violation_id], user_id, note)[0]
+    del result["violationId"]
+    return result
+
+
+def sms_audit_action(status: str) -> str:
+    return (
         "SMS Notification Sent"
-        if result["status"] == "Sent"
+        if status == "Sent"
         else "SMS Notification Skipped"
-        if result["status"] == "Skipped"
+        if status == "Skipped"
         else "SMS Notification Failed"
     )
 
-    write_audit_log(
-        conn=conn,
-        user_id=user_id,
-        action_type=action_type,
-        entity_type="Violation",
-        entity_id=f"V-{violation_id}",
-        old_value=None,
-        new_value={
-            "status": result["status"],
-            "recipientPhone": result["recipientPhone"],
-            "notificationId": result["notificationId"],
-        },
-        note=note or result["message"],
-    )
 
-    return result
\ No newline at end of file
+def existing_violation_ids(conn, violation_ids):
+    existing = set()
+    c = conn.cursor()
+    for chunk in chunked(list(violation_ids)):
+        placeholders = ", ".join("?" for _ in chunk)
+        c.execute(f"SELECT violation_id FROM violation WHERE violation_id IN ({placeholders})", chunk)
+        existing.update(row["violation_id"] for row in c.fetchall())
+    return existing
+
+
+def send_sms_for_violations(conn, violation_ids, user_id=None, note=None):
+    """
+    Bulk SMS path for manual and back-office requests. It goes through the
+    same outbox as review decisions: one existence query and one upsert
+    batch reserve the SMS here, and api/sms_worker.py sends them with the
+    configured provider, applying the Skipped/Failed rules and auditing the
+    outcome. Requests that are not queued (unknown violation, already
+    sent) are audited here with one executemany.
+    Returns one result dict per distinct violation id, in input order.
+    """
+    violation_ids = list(dict.fromkeys(violation_ids))
+    existing = existing_violation_ids(conn, violation_ids)
+
+    queued = {
+        result["violationId"]: result
+        for result in enqueue_sms_for_violations(
+            conn, [vid for vid in violation_ids if vid in existing], user_id, note
+        )
+    }
+
+    results = [
+        queued.get(violation_id) or {
+            "violationId": violation_id,
+            "ok": False,
+            "status": "Failed",
+            "message": "Violation not found.",
+            "recipientPhone": None,
+            "notificationId": None,
+        }
+        for violation_id in violation_ids
+    ]
+
+    write_audit_logs(conn, [
+        (
+            user_id,
+            sms_audit_action(result["status"]),
+            "Violation",
+            f"V-{result['violationId']}",
+            None,
+            {
+                "status": result["status"],
+                "recipientPhone": result["recipientPhone"],
+                "notificationId": result["notificationId"],
+            },
+            note or result["message"],
+        )
+        for result in results
+        if result["status"] != "Queued"
+    ])
+
+    return results
+
+
+def send_sms_for_violation(conn, violation_id: int, user_id=None, note=None):
+    result = send_sms_for_violations(conn, [violation_id], user_id, note)[0]
+    del result["violationId"]
+    return result
@@ -0,0 +1,298 @@
+# api/sms_worker.py
+"""
+Background SMS dispatcher for the notification_log outbox.
+
+Review decisions and the detector only insert Queued rows. This process
+claims due rows in batches, calls the provider outside any database
+transaction and records Sent/Skipped/Failed, retrying provider errors with
+exponential backoff.
+
+Run from the project root:  python -m api.sms_worker
+"""
+from datetime import datetime
+from pathlib import Path
+import logging
+import time
+
+from api.sms_service import (
+    build_sms_message,
+    get_violation_sms_contexts,
+    sms_audit_action,
+    sms_rule_outcome,
+    write_audit_logs,
+)
+from api.sms_providers import AsyncSmsDispatcher, HttpGatewayProvider, MockSmsProvider
+from database.connection_pool import get_pools
+
+BASE_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = BASE_DIR.parent
+DB_PATH = PROJECT_ROOT / "database" / "itms_production.db"
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 50
+POLL_INTERVAL_SECONDS = 1.0
+MAX_ATTEMPTS = 5
+BACKOFF_BASE_SECONDS = 5
+BACKOFF_MAX_SECONDS = 15 * 60
+
+# A claimed row is hidden from other workers for this long. If the worker
+# dies mid-batch the row becomes due again once the lease runs out.
+CLAIM_LEASE_SECONDS = 120
+
+# None uses the mock provider; point at a gateway, e.g. the local stand-in
+# from api/sms_gateway_stub.py: "http://127.0.0.1:8025/send"
+SMS_GATEWAY_URL = None
+RATE_LIMIT_PER_SECOND = 20.0
+MAX_IN_FLIGHT = 10
+
+
+def backoff_seconds(attempt_count: int) -> int:
+    return min(BACKOFF_BASE_SECONDS * 2 ** max(attempt_count - 1, 0), BACKOFF_MAX_SECONDS)
+
+
+def claim_batch(conn, batch_size=BATCH_SIZE):
+    """
+    Atomically claim up to batch_size due Queued rows by pushing their
+    next_attempt_at past the lease and counting the attempt.
+    """
+    c = conn.cursor()
+    c.execute("BEGIN IMMEDIATE")
+
+    c.execute(
+        """
+        SELECT notification_id, violation_id, attempt_count, requested_by, request_note
+        FROM notification_log
+        WHERE status = 'Queued'
+          AND next_attempt_at <= CURRENT_TIMESTAMP
+        ORDER BY next_attempt_at
+        LIMIT ?
+        """,
+        (batch_size,),
+    )
+    rows = c.fetchall()
+
+    if rows:
+        c.executemany(
+            """
+            UPDATE notification_log
+            SET attempt_count = attempt_count + 1,
+                next_attempt_at = DATETIME('now', ?)
+            WHERE notification_id = ?
+            """,
+            [(f"+{CLAIM_LEASE_SECONDS} seconds", row["notification_id"]) for row in rows],
+        )
+
+    conn.commit()
+
+    return [
+        {
+            "notification_id": row["notification_id"],
+            "violation_id": row["violation_id"],
+            "attempt_count": row["attempt_count"] + 1,
+            "requested_by": row["requested_by"],
+            "request_note": row["request_note"],
+        }
+        for row in rows
+    ]
+
+
+def resolve_jobs(conn, jobs):
+    """
+    Reads every job's SMS context with one bulk query and applies the send
+    rules. Each job gets either an outcome or a message to send.
+    """
+    contexts = get_violation_sms_contexts(conn, [job["violation_id"] for job in jobs])
+
+    for job in jobs:
+        row = contexts.get(job["violation_id"])
+        if not row:
+            job["outcome"] = ("Failed", "Violation not found.", None)
+            continue
+
+        job["outcome"] = sms_rule_outcome(row)
+        if job["outcome"] is None:
+            job["recipient_phone"] = row["phone_number"]
+            job["message_text"] = build_sms_message(row)
+
+    return jobs
+
+
+def build_dispatcher(gateway_url=SMS_GATEWAY_URL):
+    provider = HttpGatewayProvider(gateway_url) if gateway_url else MockSmsProvider()
+    return AsyncSmsDispatcher(
+        provider,
+        rate_per_second=RATE_LIMIT_PER_SECOND,
+        max_in_flight=MAX_IN_FLIGHT,
+    )
+
+
+def apply_dispatch_result(job, result, provider_name):
+    """Turns a provider DispatchResult into the job's outcome or a retry."""
+    if result.ok:
+        job["provider_message_id"] = result.provider_message_id
+        job["outcome"] = ("Sent", f"SMS sent successfully via {provider_name}.", job["recipient_phone"])
+    elif job["attempt_count"] >= MAX_ATTEMPTS:
+        job["outcome"] = (
+            "Failed",
+            f"Provider error after {job['attempt_count']} attempts: {result.error}",
+            job["recipient_phone"],
+        )
+    else:
+        job["retry_error"] = result.error
+
+    return job
+
+
+def record_jobs(conn, jobs, provider):
+    """
+    Writes a batch's outcomes in the caller's transaction: one executemany
+    for the retries, one for the final statuses and one for their audit
+    rows.
+    """
+    retries = [job for job in jobs if job["outcome"] is None]
+    finished = [job for job in jobs if job["outcome"] is not None]
+    c = conn.cursor()
+
+    if retries:
+        c.executemany(
+            """
+            UPDATE notification_log
+            SET error_message = ?, next_attempt_at = DATETIME('now', ?)
+            WHERE notification_id = ?
+            """,
+            [
+                (
+                    job["retry_error"],
+                    f"+{backoff_seconds(job['attempt_count'])} seconds",
+                    job["notification_id"],
+                )
+                for job in retries
+            ],
+        )
+        for job in retries:
+            logger.warning(
+                "SMS %s attempt %s failed; retrying in %ss: %s",
+                job["notification_id"],
+                job["attempt_count"],
+                backoff_seconds(job["attempt_count"]),
+                job["retry_error"],
+            )
+
+    if not finished:
+        return
+
+    sent_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    rows = []
+    audit_entries = []
+    for job in finished:
+        status, message, recipient_phone = job["outcome"]
+        sent = status == "Sent"
+        rows.append((
+            status,
+            recipient_phone,
+            job.get("message_text") if sent else None,
+            provider,
+            job.get("provider_message_id"),
+            None if sent else message,
+            sent_at if sent else None,
+            job["notification_id"],
+        ))
+        audit_entries.append((
+            job["requested_by"],
+            sms_audit_action(status),
+            "Violation",
+            f"V-{job['violation_id']}",
+            None,
+            {
+                "status": status,
+                "recipientPhone": recipient_phone,
+                "notificationId": job["notification_id"],
+            },
+            job["request_note"] or message,
+        ))
+
+    c.executemany(
+        """
+        UPDATE notification_log
+        SET status = ?,
+            recipient_phone = ?,
+            message_text = ?,
+            provider = ?,
+            provider_message_id = ?,
+            error_message = ?,
+            sent_at = ?,
+            next_attempt_at = NULL
+        WHERE notification_id = ?
+        """,
+        rows,
+    )
+    write_audit_logs(conn, audit_entries)
+
+
+def process_batch(pools, dispatcher, batch_size=BATCH_SIZE):
+    """Claims, dispatches and records one batch. Returns the number of jobs handled."""
+    with pools.write() as conn:
+        jobs = claim_batch(conn, batch_size)
+
+    if not jobs:
+        return 0
+
+    with pools.read() as conn:
+        jobs = resolve_jobs(conn, jobs)
+
+    # All provider calls for the batch go out concurrently, rate limited
+    to_send = [job for job in jobs if job["outcome"] is None]
+    if to_send:
+        results = dispatcher.send_many_sync(
+            (job["recipient_phone"], job["message_text"]) for job in to_send
+        )
+        for job, result in zip(to_send, results):
+            apply_dispatch_result(job, result, dispatcher.provider.name)
+
+    # Every outcome of the batch lands in one short write transaction
+    with pools.write() as conn:
+        record_jobs(conn, jobs, provider=dispatcher.provider.name)
+        conn.commit()
+
+    return len(jobs)
+
+
+def run_worker(
+    db_path=DB_PATH,
+    batch_size=BATCH_SIZE,
+    poll_interval=POLL_INTERVAL_SECONDS,
+    gateway_url=SMS_GATEWAY_URL,
+):
+    pools = get_pools(db_path)
+    dispatcher = build_dispatcher(gateway_url)
+    logger.info(
+        "SMS worker started (provider=%s, batch=%s, poll=%ss, rate=%s/s, in_flight=%s)",
+        dispatcher.provider.name,
+        batch_size,
+        poll_interval,
+        RATE_LIMIT_PER_SECOND,
+        MAX_IN_FLIGHT,
+    )
+
+    try:
+        while True:
+            try:
+                handled = process_batch(pools, dispatcher, batch_size)
+            except Exception:
+                logger.exception("SMS worker error")
+                handled = 0
+
+            # Keep draining while there is a backlog; otherwise poll
+            if handled < batch_size:
+                time.sleep(poll_interval)
+
+    except KeyboardInterrupt:
+        logger.info("SMS worker stopped.")
+    finally:
+        pools.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s: %(message)s")
+    run_worker()
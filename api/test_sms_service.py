@@ -0,0 +1,125 @@
+# api/test_sms_service.py
+import sqlite3
+
+import pytest
+
+from api.sms_service import reserve_sms, send_sms_for_violations
+from database.migrate import migrate
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = sqlite3.connect(tmp_path / "itms.db")
+    conn.row_factory = sqlite3.Row
+    migrate(conn)
+    conn.executemany(
+        "INSERT INTO violation (violation_id, status) VALUES (?, 'Approved')",
+        [(1,), (2,)],
+    )
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+def audit_actions(conn):
+    return [
+        (row["entity_id"], row["action_type"])
+        for row in conn.execute("SELECT entity_id, action_type FROM audit_log ORDER BY audit_id")
+    ]
+
+
+def test_bulk_send_queues_known_violations_and_fails_unknown_ones(conn):
+    results = send_sms_for_violations(conn, [2, 1, 99, 1], user_id=None, note="bulk")
+
+    assert [(r["violationId"], r["status"]) for r in results] == [
+        (2, "Queued"), (1, "Queued"), (99, "Failed"),
+    ]
+    # Queued requests are audited by the worker once they are sent
+    assert audit_actions(conn) == [("V-99", "SMS Notification Failed")]
+
+
+def test_bulk_send_reports_already_sent_as_skipped(conn):
+    send_sms_for_violations(conn, [1])
+    conn.execute("UPDATE notification_log SET status = 'Sent' WHERE violation_id = 1")
+
+    (result,) = send_sms_for_violations(conn, [1])
+
+    assert result["status"] == "Skipped"
+    assert audit_actions(conn) == [("V-1", "SMS Notification Skipped")]
+
+
+def sms_rows(conn, violation_id):
+    return [
+        tuple(row)
+        for row in conn.execute(
+            """
+            SELECT status, request_count FROM notification_log
+            WHERE violation_id = ? ORDER BY notification_id
+            """,
+            (violation_id,),
+        )
+    ]
+
+
+def set_status(conn, violation_id, status):
+    conn.execute(
+        "UPDATE notification_log SET status = ? WHERE violation_id = ?",
+        (status, violation_id),
+    )
+
+
+def test_repeat_requests_collapse_onto_one_live_row(conn):
+    first = reserve_sms(conn, [1, 2])
+    again = reserve_sms(conn, [1, 1])
+
+    assert again[1]["notification_id"] == first[1]["notification_id"]
+    assert sms_rows(conn, 1) == [("Queued", 3)]
+    assert sms_rows(conn, 2) == [("Queued", 1)]
+
+
+def test_sent_row_is_never_requeued(conn):
+    reserve_sms(conn, [1])
+    set_status(conn, 1, "Sent")
+
+    live = reserve_sms(conn, [1])
+
+    assert live[1]["status"] == "Sent"
+    assert sms_rows(conn, 1) == [("Sent", 2)]
+
+
+def test_skipped_row_is_rearmed(conn):
+    reserve_sms(conn, [1])
+    set_status(conn, 1, "Skipped")
+
+    live = reserve_sms(conn, [1])
+
+    assert live[1]["status"] == "Queued"
+    assert sms_rows(conn, 1) == [("Queued", 2)]
+
+
+def test_failed_row_is_rearmed_instead_of_duplicated(conn):
+    for _ in range(3):
+        reserve_sms(conn, [1])
+        set_status(conn, 1, "Failed")
+
+    assert sms_rows(conn, 1) == [("Failed", 3)]
+
+
+def test_partial_index_rejects_a_second_live_row(conn):
+    reserve_sms(conn, [1])
+
+    with pytest.raises(sqlite3.IntegrityError):
+        conn.execute(
+            "INSERT INTO notification_log (violation_id, channel, status) VALUES (1, 'SMS', 'Sent')"
+        )
+
+    # Rows outside the live set are not part of the key
+    conn.execute(
+        "INSERT INTO notification_log (violation_id, channel, status) VALUES (1, 'SMS', 'Superseded')"
+    )
+
+
+def test_fresh_reservation_is_due_immediately(conn):
+    live = reserve_sms(conn, [1])
+
+    assert live[1]["leased"] == 0
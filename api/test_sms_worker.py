@@ -0,0 +1,147 @@
+# api/test_sms_worker.py
+import sqlite3
+
+import pytest
+
+from api.sms_providers import AsyncSmsDispatcher, MockSmsProvider
+from api.sms_service import reserve_sms
+from api.sms_worker import (
+    BACKOFF_BASE_SECONDS,
+    BACKOFF_MAX_SECONDS,
+    backoff_seconds,
+    claim_batch,
+    process_batch,
+)
+from database.connection_pool import DatabasePools
+from database.migrate import migrate
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = sqlite3.connect(tmp_path / "itms.db")
+    conn.row_factory = sqlite3.Row
+    migrate(conn)
+    conn.executemany(
+        "INSERT INTO violation (violation_id, status) VALUES (?, 'Approved')",
+        [(violation_id,) for violation_id in range(1, 6)],
+    )
+    reserve_sms(conn, range(1, 6))
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+def expire_leases(conn):
+    conn.execute("UPDATE notification_log SET next_attempt_at = DATETIME('now', '-1 seconds')")
+    conn.commit()
+
+
+def test_claim_respects_batch_size(conn):
+    first = claim_batch(conn, batch_size=3)
+    second = claim_batch(conn, batch_size=3)
+
+    assert len(first) == 3
+    assert len(second) == 2
+    assert not {job["notification_id"] for job in first} & {job["notification_id"] for job in second}
+
+
+def test_claimed_rows_are_leased(conn):
+    jobs = claim_batch(conn)
+
+    assert [job["attempt_count"] for job in jobs] == [1] * 5
+    assert claim_batch(conn) == []
+
+    leased = conn.execute(
+        "SELECT COUNT(*) FROM notification_log WHERE next_attempt_at > CURRENT_TIMESTAMP"
+    ).fetchone()[0]
+    assert leased == 5
+
+
+def test_expired_lease_is_claimed_again(conn):
+    claim_batch(conn)
+    expire_leases(conn)
+
+    jobs = claim_batch(conn)
+
+    assert len(jobs) == 5
+    assert [job["attempt_count"] for job in jobs] == [2] * 5
+
+
+def test_only_queued_rows_are_claimed(conn):
+    conn.execute("UPDATE notification_log SET status = 'Sent' WHERE violation_id <= 2")
+    conn.commit()
+
+    assert sorted(job["violation_id"] for job in claim_batch(conn)) == [3, 4, 5]
+
+
+def test_backoff_doubles_up_to_the_cap():
+    delays = [backoff_seconds(attempt) for attempt in range(1, 12)]
+
+    assert delays[:3] == [BACKOFF_BASE_SECONDS, BACKOFF_BASE_SECONDS * 2, BACKOFF_BASE_SECONDS * 4]
+    assert delays == sorted(delays)
+    assert delays[-1] == BACKOFF_MAX_SECONDS
+    assert backoff_seconds(0) == BACKOFF_BASE_SECONDS
+
+
+class FailingProvider:
+    name = "Failing"
+
+    async def send(self, phone_number, message_text):
+        raise RuntimeError("gateway down")
+
+
+def seed_recipients(conn):
+    """Violation 1 has a phone, 2 has a driver without one, 3 has no plate."""
+    conn.execute(
+        "INSERT INTO driver (driver_id, full_name, national_id, phone_number) "
+        "VALUES (1, 'A', 'N1', '+100'), (2, 'B', 'N2', NULL)"
+    )
+    conn.execute("INSERT INTO vehicle (plate_number, owner_id) VALUES ('AAA-1', 1), ('BBB-2', 2)")
+    conn.execute("UPDATE violation SET plate_number = 'AAA-1' WHERE violation_id = 1")
+    conn.execute("UPDATE violation SET plate_number = 'BBB-2' WHERE violation_id = 2")
+    conn.execute("DELETE FROM notification_log WHERE violation_id > 3")
+    conn.commit()
+
+
+def notification_statuses(conn):
+    return {
+        row["violation_id"]: row["status"]
+        for row in conn.execute("SELECT violation_id, status FROM notification_log")
+    }
+
+
+def test_process_batch_records_every_outcome_in_one_transaction(tmp_path, conn):
+    seed_recipients(conn)
+    pools = DatabasePools(tmp_path / "itms.db")
+    dispatcher = AsyncSmsDispatcher(MockSmsProvider(verbose=False), rate_per_second=1000)
+
+    try:
+        assert process_batch(pools, dispatcher) == 3
+    finally:
+        pools.close()
+
+    assert notification_statuses(conn) == {1: "Sent", 2: "Failed", 3: "Skipped"}
+    audited = conn.execute("SELECT COUNT(*) FROM audit_log").fetchone()[0]
+    assert audited == 3
+
+
+def test_provider_errors_are_rescheduled_with_backoff(tmp_path, conn):
+    seed_recipients(conn)
+    pools = DatabasePools(tmp_path / "itms.db")
+    dispatcher = AsyncSmsDispatcher(FailingProvider(), rate_per_second=1000)
+
+    try:
+        process_batch(pools, dispatcher)
+    finally:
+        pools.close()
+
+    row = conn.execute(
+        """
+        SELECT status, error_message,
+               CAST(strftime('%s', next_attempt_at) - strftime('%s', 'now') AS INTEGER) AS delay
+        FROM notification_log WHERE violation_id = 1
+        """
+    ).fetchone()
+    assert row["status"] == "Queued"
+    assert "gateway down" in row["error_message"]
+    assert BACKOFF_BASE_SECONDS - 2 <= row["delay"] <= BACKOFF_BASE_SECONDS
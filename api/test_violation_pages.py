@@ -0,0 +1,146 @@
+# api/test_violation_pages.py
+import sqlite3
+
+import pytest
+
+from api.violation_pages import (
+    STATUS_FILTERS,
+    build_evidence_search_query,
+    build_status_filter,
+    decode_cursor,
+    encode_cursor,
+    fetch_violation_page,
+)
+from database.migrate import migrate
+
+# (timestamp, status): ties on timestamp and rows without one on purpose
+VIOLATIONS = [
+    ("2026-01-01 08:00:00", "Pending"),
+    ("2026-01-01 09:00:00", "Approved"),
+    ("2026-01-01 09:00:00", "AutoApproved"),
+    (None, "Pending"),
+    ("2026-01-01 09:00:00", "Rejected"),
+    ("2026-01-02 07:30:00", "Pending"),
+    (None, "Approved"),
+    ("2026-01-01 08:00:00", "Paid"),
+    (None, "Pending"),
+    ("2026-01-03 12:00:00", "Approved"),
+]
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = sqlite3.connect(tmp_path / "itms.db")
+    conn.row_factory = sqlite3.Row
+    migrate(conn)
+    conn.execute("INSERT INTO intersection (intersection_id, name) VALUES (1, 'Main St')")
+    conn.executemany(
+        "INSERT INTO violation (intersection_id, timestamp, status) VALUES (1, ?, ?)",
+        VIOLATIONS,
+    )
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+def expected_ids(statuses=None):
+    rows = [
+        (timestamp, violation_id)
+        for violation_id, (timestamp, status) in enumerate(VIOLATIONS, start=1)
+        if statuses is None or status in statuses
+    ]
+    dated = sorted((row for row in rows if row[0] is not None), reverse=True)
+    undated = sorted((row for row in rows if row[0] is None), key=lambda row: row[1], reverse=True)
+    return [violation_id for _, violation_id in dated + undated]
+
+
+def page_through(conn, limit, status=None):
+    ids, after, pages = [], None, 0
+    while True:
+        rows, after = fetch_violation_page(conn, limit, after, status)
+        assert len(rows) <= limit
+        ids.extend(row["violation_id"] for row in rows)
+        pages += 1
+        if after is None:
+            return ids, pages
+
+
+@pytest.mark.parametrize("limit", [1, 2, 3, 4, 7, 10, 11])
+def test_pages_cover_every_row_once_in_order(conn, limit):
+    ids, pages = page_through(conn, limit)
+
+    assert ids == expected_ids()
+    assert pages == max(-(-len(VIOLATIONS) // limit), 1)
+
+
+def test_exact_multiple_of_limit_has_no_empty_last_page(conn):
+    rows, after = fetch_violation_page(conn, 5, None, None)
+    rows, after = fetch_violation_page(conn, 5, after, None)
+
+    assert len(rows) == 5
+    assert after is None
+
+
+def test_cursor_on_last_dated_row_continues_into_undated_rows(conn):
+    dated = sum(1 for timestamp, _ in VIOLATIONS if timestamp is not None)
+    rows, after = fetch_violation_page(conn, dated, None, None)
+
+    assert all(row["timestamp"] is not None for row in rows)
+    assert decode_cursor(after)[0] is not None
+
+    rows, after = fetch_violation_page(conn, dated, after, None)
+    assert [row["violation_id"] for row in rows] == [9, 7, 4]
+    assert after is None
+
+
+@pytest.mark.parametrize("status, stored", [
+    ("Flagged", {"Pending"}),
+    ("Approved", {"Approved", "AutoApproved", "Paid"}),
+])
+def test_status_filter_pages(conn, status, stored):
+    ids, _ = page_through(conn, 2, status)
+
+    assert ids == expected_ids(stored)
+
+
+def test_cursor_round_trip_keeps_null_distinct_from_empty():
+    assert decode_cursor(encode_cursor(None, 7)) == (None, 7)
+    assert decode_cursor(encode_cursor("", 7)) == ("", 7)
+    assert decode_cursor(encode_cursor("2026-01-01 08:00:00", 7)) == ("2026-01-01 08:00:00", 7)
+
+
+@pytest.mark.parametrize("cursor", ["not base64!", encode_cursor("x", 1)[:-4], "WzEsIDJd"])
+def test_bad_cursor_raises_value_error(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_unknown_status_is_strict_by_default():
+    with pytest.raises(ValueError):
+        build_status_filter("Bogus")
+
+    assert build_status_filter("Bogus", strict=False) == ("", [])
+    assert build_status_filter("All") == ("", [])
+
+
+@pytest.mark.parametrize("date_from, date_to, status", [
+    ("2026-01-01", "2026-01-01", None),
+    ("2026-01-02", None, None),
+    (None, "2026-01-02", "Approved"),
+    ("2026-01-01", "2026-01-03", "Flagged"),
+])
+def test_evidence_search_date_bounds_match_whole_days(conn, date_from, date_to, status):
+    c = conn.cursor()
+    c.execute(*build_evidence_search_query(date_from=date_from, date_to=date_to, status=status))
+    ids = sorted(row["violation_id"] for row in c.fetchall())
+
+    stored = STATUS_FILTERS.get(status)
+    expected = sorted(
+        violation_id
+        for violation_id, (timestamp, row_status) in enumerate(VIOLATIONS, start=1)
+        if timestamp is not None
+        and (date_from is None or timestamp[:10] >= date_from)
+        and (date_to is None or timestamp[:10] <= date_to)
+        and (stored is None or row_status in stored)
+    )
+    assert ids == expected
@@ -0,0 +1,189 @@
+# api/violation_pages.py
+"""
+Keyset pagination over violations for the list endpoints, and the SQL
+builders they and the evidence search run (database/check_query_plans.py
+explains the same SQL). Plain SQLite, no FastAPI: a bad cursor or status
+label raises ValueError, which the API turns into a 400.
+"""
+from typing import Optional
+import base64
+import json
+
+# UI status label -> stored violation.status values
+STATUS_FILTERS = {
+    "Flagged": ["Pending"],
+    "Pending": ["Pending"],
+    "Approved": ["Approved", "AutoApproved", "Paid"],
+    "Rejected": ["Rejected"],
+}
+
+
+def encode_cursor(timestamp: Optional[str], violation_id: int) -> str:
+    # JSON keeps a NULL timestamp distinct from an empty string
+    raw = json.dumps([timestamp, violation_id])
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        timestamp, violation_id = json.loads(raw)
+        if timestamp is not None and not isinstance(timestamp, str):
+            raise ValueError("bad timestamp")
+        return timestamp, int(violation_id)
+    except (ValueError, TypeError, UnicodeError):
+        raise ValueError("Invalid cursor")
+
+
+def build_status_filter(status: Optional[str], strict: bool = True):
+    """
+    Returns an SQL fragment + params restricting violation.status to the
+    stored values behind a UI status label. An unknown label raises ValueError,
+    or applies no filter at all when strict is False.
+    """
+    if not status or status == "All":
+        return "", []
+
+    db_statuses = STATUS_FILTERS.get(status)
+    if db_statuses is None:
+        if not strict:
+            return "", []
+        raise ValueError(f"Unknown status filter '{status}'")
+
+    if len(db_statuses) == 1:
+        return " AND v.status = ?", list(db_statuses)
+
+    # Several statuses cannot be merged in (timestamp, violation_id) order
+    # from the status index, so keep the planner on the timestamp index
+    placeholders = ", ".join("?" for _ in db_statuses)
+    return f" AND +v.status IN ({placeholders})", list(db_statuses)
+
+
+VIOLATION_PAGE_SELECT = """
+    SELECT
+        v.violation_id,
+        v.plate_number,
+        i.name as intersection_name,
+        v.timestamp,
+        v.confidence_score,
+        v.status,
+        v.image_path,
+        v.video_path,
+        v.review_note
+    FROM violation v
+    LEFT JOIN intersection i ON v.intersection_id = i.intersection_id
+    WHERE 1=1
+"""
+
+EVIDENCE_SEARCH_SELECT = """
+    SELECT
+        v.violation_id,
+        v.plate_number,
+        i.name as intersection_name,
+        v.timestamp,
+        v.status,
+        v.image_path,
+        v.video_path,
+        v.review_note
+    FROM violation v
+    LEFT JOIN intersection i ON v.intersection_id = i.intersection_id
+    WHERE 1=1
+"""
+
+
+def build_page_query(limit: int, status: Optional[str] = None, cursor=None, dated: bool = True):
+    """
+    One segment of a violation page as (sql, params). The dated segment
+    walks (timestamp, violation_id) DESC from a (timestamp, violation_id)
+    cursor; the undated one walks the NULL-timestamp tail by violation_id
+    DESC from a (None, violation_id) cursor.
+    """
+    status_sql, status_params = build_status_filter(status)
+    query = VIOLATION_PAGE_SELECT
+    params = []
+
+    if dated:
+        query += " AND v.timestamp IS NOT NULL"
+        if cursor is not None:
+            query += " AND (v.timestamp, v.violation_id) < (?, ?)"
+            params.extend(cursor)
+        order_by = " ORDER BY v.timestamp DESC, v.violation_id DESC LIMIT ?"
+    else:
+        query += " AND v.timestamp IS NULL"
+        if cursor is not None:
+            query += " AND v.violation_id < ?"
+            params.append(cursor[1])
+        order_by = " ORDER BY v.violation_id DESC LIMIT ?"
+
+    return query + status_sql + order_by, params + status_params + [limit]
+
+
+def fetch_violation_page(conn, limit: int, after: Optional[str], status: Optional[str]):
+    """
+    Keyset page over violations ordered by (timestamp, violation_id) DESC,
+    with rows that have no timestamp last (by violation_id DESC). Each page
+    seeks straight past the cursor, so its cost does not grow with the
+    size of the table.
+    """
+    cursor = decode_cursor(after) if after else None
+    c = conn.cursor()
+
+    # Fetch one extra row to know whether another page exists
+    rows = []
+    if cursor is None or cursor[0] is not None:
+        c.execute(*build_page_query(limit + 1, status, cursor, dated=True))
+        rows = c.fetchall()
+
+    # A row-value comparison never matches NULL, so timestamp-less rows
+    # are paged separately once the timestamped ones run out
+    if len(rows) <= limit:
+        tail_cursor = cursor if cursor is not None and cursor[0] is None else None
+        c.execute(*build_page_query(limit + 1 - len(rows), status, tail_cursor, dated=False))
+        rows += c.fetchall()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(last["timestamp"], last["violation_id"])
+
+    return rows, next_cursor
+
+
+def build_evidence_search_query(
+    plate_number: Optional[str] = None,
+    intersection: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    status: Optional[str] = None,
+):
+    """
+    Evidence search as (sql, params), newest first. Unknown status labels
+    are ignored here, as they always were. The date bounds compare the raw
+    timestamp so the timestamp index can seek to the range.
+    """
+    query = EVIDENCE_SEARCH_SELECT
+    params = []
+
+    if plate_number:
+        query += " AND UPPER(COALESCE(v.plate_number, '')) LIKE ?"
+        params.append(f"%{plate_number.upper()}%")
+
+    if intersection:
+        query += " AND LOWER(COALESCE(i.name, '')) LIKE ?"
+        params.append(f"%{intersection.lower()}%")
+
+    # Same days as DATE(v.timestamp) >= DATE(?) / <= DATE(?), but sargable
+    if date_from:
+        query += " AND v.timestamp >= DATE(?)"
+        params.append(date_from)
+
+    if date_to:
+        query += " AND v.timestamp < DATE(?, '+1 day')"
+        params.append(date_to)
+
+    status_sql, status_params = build_status_filter(status, strict=False)
+    query += status_sql
+    params.extend(status_params)
+
+    return query + " ORDER BY v.timestamp DESC", params
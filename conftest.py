@@ -0,0 +1,6 @@
+# conftest.py
+"""
+Puts the project root on sys.path so the tests next to each module import
+it as api.*, cv_module.* or database.*, with bare `pytest` as well as
+`python -m pytest`.
+"""
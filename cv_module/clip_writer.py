@@ -0,0 +1,236 @@
+# cv_module/clip_writer.py
+"""
+Evidence clip writing: MJPG AVI (raw frames via OpenCV, JPEG frames muxed
+as-is), one-pass H.264 faststart MP4 through an ffmpeg pipe, and the JPEG
+frame spool the evidence service reads back. Free of model imports so the
+evidence service's worker processes stay light.
+"""
+from pathlib import Path
+import struct
+import subprocess
+
+import cv2
+import numpy as np
+
+from cv_module.mjpeg_avi import write_mjpeg_avi
+
+# Evidence clips are piped straight into ffmpeg; a fast preset keeps the
+# encoder ahead of the clip rate so ring slots are released quickly
+FFMPEG_PRESET = "veryfast"
+FFMPEG_TIMEOUT_SECONDS = 60
+
+# Spooled clips are length-prefixed JPEG frames: the evidence worker pipes
+# them straight into ffmpeg (or muxes them into an AVI) without decoding
+SPOOL_JPEG_QUALITY = 90
+_SPOOL_LENGTH = struct.Struct("<I")
+
+
+def ffmpeg_available():
+    try:
+        result = subprocess.run(
+            ["ffmpeg", "-version"],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            check=False,
+        )
+        return result.returncode == 0
+    except FileNotFoundError:
+        return False
+
+
+def save_video_clip(frames, output_path, fps):
+    """
+    Save raw AVI clip using MJPG.
+    This is more reliable than writing MP4 directly with OpenCV.
+    Frames that are already JPEG bytes are muxed as-is, without re-encoding.
+    """
+    if not frames:
+        print("❌ No frames available for video clip.")
+        return False
+
+    if isinstance(frames[0], bytes):
+        try:
+            write_mjpeg_avi(frames, output_path, fps)
+        except (OSError, ValueError) as e:
+            print(f"❌ Failed to mux MJPG clip {output_path}: {e}")
+            return False
+        return check_clip_file(output_path)
+
+    height, width = frames[0].shape[:2]
+
+    writer = cv2.VideoWriter(
+        str(output_path),
+        cv2.VideoWriter_fourcc(*"MJPG"),
+        fps,
+        (width, height),
+    )
+
+    if not writer.isOpened():
+        print(f"❌ Failed to open VideoWriter for: {output_path}")
+        return False
+
+    for frame in frames:
+        writer.write(frame)
+
+    writer.release()
+
+    return check_clip_file(output_path)
+
+
+def check_clip_file(output_path):
+    if not output_path.exists():
+        print(f"❌ Raw clip file was not created: {output_path}")
+        return False
+
+    file_size = output_path.stat().st_size
+    if file_size <= 0:
+        print(f"❌ Raw clip file is empty: {output_path}")
+        return False
+
+    print(f"✅ Raw AVI clip saved: {output_path.name} ({file_size} bytes)")
+    return True
+
+
+def ffmpeg_input_args(frames, fps):
+    if isinstance(frames[0], bytes):
+        return ["-f", "mjpeg", "-framerate", f"{fps}", "-i", "-"]
+
+    height, width = frames[0].shape[:2]
+    return [
+        "-f", "rawvideo",
+        "-pix_fmt", "bgr24",
+        "-s", f"{width}x{height}",
+        "-framerate", f"{fps}",
+        "-i", "-",
+    ]
+
+
+def run_ffmpeg(input_args, output_path, frames=None):
+    """
+    Encodes to browser-friendly H.264 faststart MP4. With frames, they are
+    written to ffmpeg's stdin; otherwise input_args name an input file.
+    """
+    command = [
+        "ffmpeg",
+        "-y",
+        "-loglevel", "error",
+        *input_args,
+        # yuv420p needs even dimensions
+        "-vf", "scale=trunc(iw/2)*2:trunc(ih/2)*2",
+        "-c:v", "libx264",
+        "-preset", FFMPEG_PRESET,
+        "-pix_fmt", "yuv420p",
+        "-movflags", "+faststart",
+        str(output_path),
+    ]
+
+    try:
+        process = subprocess.Popen(
+            command,
+            stdin=subprocess.PIPE if frames is not None else subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+        )
+    except OSError as e:
+        print(f"❌ Could not start FFmpeg: {e}")
+        return False
+
+    try:
+        if frames is not None:
+            for frame in frames:
+                if isinstance(frame, bytes):
+                    process.stdin.write(frame)
+                else:
+                    process.stdin.write(np.ascontiguousarray(frame).data)
+            process.stdin.close()
+        _, stderr = process.communicate(timeout=FFMPEG_TIMEOUT_SECONDS)
+
+    except BrokenPipeError:
+        _, stderr = process.communicate()
+
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.communicate()
+        print(f"❌ FFmpeg timed out writing {output_path.name}")
+        output_path.unlink(missing_ok=True)
+        return False
+
+    if process.returncode != 0:
+        print("❌ FFmpeg encode failed.")
+        print(stderr.decode("utf-8", errors="replace"))
+        output_path.unlink(missing_ok=True)
+        return False
+
+    if not output_path.exists() or output_path.stat().st_size <= 0:
+        print(f"❌ FFmpeg output file missing or empty: {output_path}")
+        output_path.unlink(missing_ok=True)
+        return False
+
+    print(f"✅ Browser MP4 created: {output_path.name} ({output_path.stat().st_size} bytes)")
+    return True
+
+
+def stream_clip_to_mp4(frames, output_path, fps):
+    """
+    Pipe frames (BGR arrays or JPEG bytes) into ffmpeg over stdin and get a
+    browser-friendly MP4 in one pass, with no intermediate AVI on disk.
+    One short-lived ffmpeg process per clip keeps a crash from affecting
+    other clips.
+    """
+    if not frames:
+        print("❌ No frames available for video clip.")
+        return False
+
+    return run_ffmpeg(ffmpeg_input_args(frames, fps), output_path, frames=frames)
+
+
+def transcode_clip_file(input_path, output_path):
+    """Re-encodes a spooled clip file (e.g. MJPG AVI) to browser-friendly MP4."""
+    return run_ffmpeg(["-i", str(input_path)], output_path)
+
+
+def write_jpeg_spool(frames, output_path, quality=SPOOL_JPEG_QUALITY):
+    """
+    Spools clip frames as length-prefixed JPEGs. JPEG bytes are written
+    as-is; BGR arrays are encoded once here, as the MJPG writer would.
+    """
+    if not frames:
+        print("❌ No frames available for video clip.")
+        return False
+
+    try:
+        with open(output_path, "wb") as spool:
+            for frame in frames:
+                if not isinstance(frame, bytes):
+                    ok, buffer = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+                    if not ok:
+                        raise ValueError("JPEG encode failed")
+                    frame = buffer.tobytes()
+                spool.write(_SPOOL_LENGTH.pack(len(frame)))
+                spool.write(frame)
+    except (OSError, ValueError) as e:
+        print(f"❌ Could not spool clip {output_path}: {e}")
+        Path(output_path).unlink(missing_ok=True)
+        return False
+
+    return True
+
+
+def read_jpeg_spool(path):
+    """Returns the JPEG frames written by write_jpeg_spool."""
+    data = Path(path).read_bytes()
+
+    frames = []
+    pos = 0
+    while pos < len(data):
+        if pos + _SPOOL_LENGTH.size > len(data):
+            raise ValueError(f"Truncated clip spool {path}")
+        (length,) = _SPOOL_LENGTH.unpack_from(data, pos)
+        pos += _SPOOL_LENGTH.size
+
+        if pos + length > len(data):
+            raise ValueError(f"Truncated clip spool {path}")
+        frames.append(data[pos:pos + length])
+        pos += length
+
+    return frames
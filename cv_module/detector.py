@@ -1,22 +1,31 @@
+import time
+
+# Reference point for the startup-time breakdown, taken before the imports
+STARTUP_STARTED = time.perf_counter()
+
 import cv2
+import json
+import logging
 import numpy as np
-import easyocr
 import sqlite3
 import os
-import sys
-import time
+import queue
+import signal
 import subprocess
+import sys
+import threading
 from datetime import datetime
-from collections import deque
 from pathlib import Path
-from ultralytics import YOLO
-import tensorflow as tf
 
 # =========================================================
 # CONFIGURATION
 # =========================================================
 VIDEO_SOURCE = "test_traffic.mp4"   # Change to 0 for webcam
-MODEL_PATH = "zimbabwe_traffic_model.h5"
+
+# Inference backends, see cv_module/inference_backends.py. Export the
+# ONNX/TFLite models first with: python -m cv_module.model_export
+YOLO_BACKEND = "pytorch"   # "pytorch" | "onnx" | "onnx-int8"
+CNN_BACKEND = "keras"      # "keras" | "tflite" | "tflite-int8"
 
 BASE_DIR = Path(__file__).resolve().parent
 PROJECT_ROOT = BASE_DIR.parent
@@ -28,16 +37,117 @@ EVIDENCE_DIR = PROJECT_ROOT / "dashboard" / "evidence"
 if str(PROJECT_ROOT) not in sys.path:
     sys.path.append(str(PROJECT_ROOT))
 
-from api.sms_service import process_sms_for_violation
+from api.sms_service import enqueue_sms_for_violations
+from database.connection_pool import get_pools
+from cv_module.pipeline import (
+    BLOCK,
+    DROP_OLDEST,
+    STOP,
+    Stage,
+    StageQueue,
+    StageStats,
+    format_pipeline_report,
+)
+from cv_module.inference_backends import (
+    CNN_CLASSES,
+    CNN_MODELS,
+    cnn_input_batch,
+    load_cnn,
+    load_yolo,
+    warm_up_cnn,
+    warm_up_yolo,
+)
+from cv_module.model_loader import BackgroundLoader, StartupTimer
+from cv_module.tracker import IouTracker
+from cv_module.roi_detection import DetectionScheduler, MotionGate, roi_band
+from cv_module.plate_cache import TrackPlateCache
+from cv_module.plate_ocr import read_plate, warm_up as warm_up_ocr
+from cv_module.frame_ring import EvidenceRecorder, FrameRing, JpegFrameStore
+from cv_module.clip_writer import ffmpeg_available, save_video_clip, stream_clip_to_mp4
+from cv_module.evidence_service import enqueue_evidence_jobs, remove_spool_files, spool_event
+from cv_module.preview_server import PreviewServer
+from cv_module.metrics import MetricsRegistry
+from cv_module.violation_writer import ViolationWriter
 
 CONFIDENCE_THRESHOLD = 96.0
 DEFAULT_INTERSECTION_ID = 1
+# Enforcement line height as a fraction of the frame height
+LINE_POSITION = 0.7
 
 PRE_EVENT_SECONDS = 2
 POST_EVENT_SECONDS = 3
-TRIGGER_COOLDOWN_SECONDS = 2.5
 
-CNN_CLASSES = ["ambulance", "civilian_car", "fire_truck", "police_car"]
+# A track survives this many detection frames without a match before it is
+# dropped; a vehicle that reappears after that gets a new ID
+TRACK_IOU_THRESHOLD = 0.3
+TRACK_MAX_MISSES = 15
+
+# "full": YOLO on every whole frame at the model's default size.
+# "roi": YOLO only on a band around the enforcement line (ROI_*_LINE are
+# fractions of the frame height), letterboxed to DETECT_IMGSZ, and only on
+# every DETECT_STRIDE-th frame unless there is motion at the line or a
+# track is within TRACK_NEAR_LINE_FRACTION of it. The tracker predicts
+# boxes on the frames in between.
+DETECTION_MODE = "roi"
+DETECT_IMGSZ = 416
+DETECT_STRIDE = 3
+ROI_ABOVE_LINE = 0.45
+ROI_BELOW_LINE = 0.15
+TRACK_NEAR_LINE_FRACTION = 0.1
+
+# OCR only the localized plate ROI (see cv_module/plate_ocr.py); fall back
+# to the whole vehicle crop when no plate is found or read
+PLATE_LOCALIZATION = True
+PLATE_OCR_FALLBACK = True
+
+# Pipeline queue sizes (items). Small queues keep latency low; a full detect
+# queue drops the oldest frame on live sources and throttles file sources.
+DETECT_QUEUE_SIZE = 4
+CLASSIFY_QUEUE_SIZE = 4
+EVIDENCE_QUEUE_SIZE = 16
+DISPLAY_QUEUE_SIZE = 2
+
+# How far detection may fall behind capture and still find its trigger
+# frame's pre-event footage in the rolling buffer
+MAX_DETECTION_LAG_SECONDS = 1.0
+STATS_INTERVAL_SECONDS = 10
+# Latency histograms and counters (cv_module/metrics.py) are always on;
+# the JSON summary is logged this often and served with Prometheus text
+# on the preview port (/metrics.json, /metrics)
+METRICS_SUMMARY_INTERVAL_SECONDS = 60
+
+# "raw" keeps clip frames as BGR arrays in the frame ring; "jpeg" encodes
+# each frame on a worker thread and keeps only the JPEG bytes, which are
+# muxed into the evidence AVI without re-encoding. See
+# cv_module/frame_buffer_benchmark.py for the memory/CPU trade-off.
+FRAME_BUFFER_MODE = "raw"
+
+# "service": spool finished events to disk and let cv_module/evidence_service.py
+# encode snapshots and MP4s in a process pool (jobs survive crashes).
+# "inline": encode on the detector's evidence thread.
+EVIDENCE_MODE = "service"
+# Start the evidence service as a child process; set False when it runs
+# separately (e.g. one service shared by several detectors)
+START_EVIDENCE_SERVICE = True
+EVIDENCE_SERVICE_STOP_TIMEOUT_SECONDS = 120
+JPEG_QUALITY = 90
+ENCODE_QUEUE_SIZE = 8
+
+# Headless by default: no frame is drawn unless SHOW_WINDOW opens a HighGUI
+# window (needs a display) or a client is watching the local preview at
+# http://127.0.0.1:PREVIEW_PORT/ (None disables it). The preview is a
+# low-rate MJPEG stream (/stream.mjpg) or the latest JPEG (/latest.jpg).
+SHOW_WINDOW = False
+PREVIEW_PORT = 8090
+PREVIEW_MAX_WIDTH = 960
+PREVIEW_JPEG_QUALITY = 70
+
+# A violation write that still finds the database locked after busy_timeout
+# (SQLite does not wait on a lock upgrade) is retried after a short pause
+WRITE_BUSY_RETRIES = 3
+WRITE_BUSY_BACKOFF_SECONDS = 0.2
+
+logger = logging.getLogger(__name__)
 
 
 # =========================================================
@@ -47,474 +157,897 @@ def ensure_directories():
     EVIDENCE_DIR.mkdir(parents=True, exist_ok=True)
 
 
-def ffmpeg_available():
+def start_evidence_service():
+    """Runs cv_module/evidence_service.py as a child process."""
     try:
-        result = subprocess.run(
-            ["ffmpeg", "-version"],
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL,
-            check=False,
+        process = subprocess.Popen(
+            [sys.executable, "-m", "cv_module.evidence_service"],
+            cwd=str(PROJECT_ROOT),
         )
-        return result.returncode == 0
-    except FileNotFoundError:
-        return False
-
+    except OSError as e:
+        print(f"⚠️ Could not start evidence service: {e}. Jobs stay queued until it runs.")
+        return None
 
-def save_video_clip(frames, output_path, fps):
-    """
-    Save raw AVI clip using MJPG.
-    This is more reliable than writing MP4 directly with OpenCV.
-    """
-    if not frames:
-        print("❌ No frames available for video clip.")
-        return False
+    print(f"🎞️ Evidence service started (pid={process.pid})")
+    return process
 
-    height, width = frames[0].shape[:2]
 
-    writer = cv2.VideoWriter(
-        str(output_path),
-        cv2.VideoWriter_fourcc(*"MJPG"),
-        fps,
-        (width, height),
-    )
-
-    if not writer.isOpened():
-        print(f"❌ Failed to open VideoWriter for: {output_path}")
-        return False
-
-    for frame in frames:
-        writer.write(frame)
-
-    writer.release()
-
-    if not output_path.exists():
-        print(f"❌ Raw clip file was not created: {output_path}")
-        return False
-
-    file_size = output_path.stat().st_size
-    if file_size <= 0:
-        print(f"❌ Raw clip file is empty: {output_path}")
-        return False
-
-    print(f"✅ Raw AVI clip saved: {output_path.name} ({file_size} bytes)")
-    return True
-
-
-def convert_to_browser_mp4(input_path, output_path):
+def stop_evidence_service(process):
     """
-    Convert raw AVI to browser-friendly H.264 MP4.
+    Asks the service to finish its in-flight jobs and exit. Anything still
+    queued is picked up the next time a service runs.
     """
-    try:
-        result = subprocess.run(
-            [
-                "ffmpeg",
-                "-y",
-                "-i", str(input_path),
-                "-c:v", "libx264",
-                "-pix_fmt", "yuv420p",
-                "-movflags", "+faststart",
-                str(output_path),
-            ],
-            check=False,
-            capture_output=True,
-            text=True,
-        )
-
-        if result.returncode != 0:
-            print("❌ FFmpeg conversion failed.")
-            print(result.stderr)
-            return False
-
-        if not output_path.exists():
-            print(f"❌ FFmpeg output file not found: {output_path}")
-            return False
-
-        file_size = output_path.stat().st_size
-        if file_size <= 0:
-            print(f"❌ Converted MP4 is empty: {output_path}")
-            return False
+    if process is None or process.poll() is not None:
+        return
 
-        print(f"✅ Browser MP4 created: {output_path.name} ({file_size} bytes)")
-        return True
+    if os.name == "nt":
+        process.terminate()
+    else:
+        process.send_signal(signal.SIGINT)
 
-    except Exception as e:
-        print(f"❌ FFmpeg conversion exception: {e}")
-        return False
+    try:
+        process.wait(timeout=EVIDENCE_SERVICE_STOP_TIMEOUT_SECONDS)
+    except subprocess.TimeoutExpired:
+        print("⚠️ Evidence service did not stop in time; terminating.")
+        process.terminate()
+        process.wait()
 
 
 # =========================================================
 # DATABASE HELPERS
 # =========================================================
+db_pools = get_pools(DB_PATH)
+
+
 def get_db_connection():
-    conn = sqlite3.connect(DB_PATH, timeout=10)
-    conn.row_factory = sqlite3.Row
-    conn.execute("PRAGMA foreign_keys = ON;")
-    conn.execute("PRAGMA journal_mode = WAL;")
-    return conn
+    """Checks out the shared, WAL-configured writer connection."""
+    return db_pools.write()
 
 
-def vehicle_exists(conn, plate_number):
-    if not plate_number:
-        return False
+def existing_vehicles(conn, plate_numbers):
+    """The registered plates among plate_numbers, in one query."""
+    plate_numbers = [plate for plate in set(plate_numbers) if plate]
+    if not plate_numbers:
+        return set()
 
+    placeholders = ", ".join("?" * len(plate_numbers))
     c = conn.cursor()
-    c.execute("SELECT 1 FROM vehicle WHERE plate_number = ? LIMIT 1", (plate_number,))
-    return c.fetchone() is not None
+    c.execute(
+        f"SELECT plate_number FROM vehicle WHERE plate_number IN ({placeholders})",
+        plate_numbers,
+    )
+    return {row[0] for row in c.fetchall()}
 
 
-def intersection_exists(conn, intersection_id):
+def existing_intersections(conn, intersection_ids):
+    intersection_ids = list(set(intersection_ids))
+    placeholders = ", ".join("?" * len(intersection_ids))
     c = conn.cursor()
     c.execute(
-        "SELECT 1 FROM intersection WHERE intersection_id = ? LIMIT 1",
-        (intersection_id,),
+        f"SELECT intersection_id FROM intersection WHERE intersection_id IN ({placeholders})",
+        intersection_ids,
     )
-    return c.fetchone() is not None
+    return {row[0] for row in c.fetchall()}
 
 
-def normalize_plate_text(plate_text):
-    if not plate_text:
-        return "UNKNOWN"
+def violation_decision(v_class, conf):
+    """(status, decision_type) for a classified vehicle."""
+    if v_class == "civilian_car":
+        return "AutoApproved", "Auto"
+    if conf < CONFIDENCE_THRESHOLD:
+        return "Pending", "Flagged"
+    # In current schema this represents exempt / no fine
+    return "Rejected", "Auto"
 
-    cleaned = plate_text.upper().strip()
-    cleaned = cleaned.replace(" ", "")
-    return cleaned if cleaned else "UNKNOWN"
 
-
-def log_violation(plate, v_class, conf, frame_img, video_filename):
+def violation_record(plate, v_class, conf, video_filename, evidence_spool=None,
+                     intersection_id=DEFAULT_INTERSECTION_ID, event_id=None):
     """
-    Log violation to SQLite with image + video evidence.
-    Also auto-process SMS when status becomes AutoApproved.
+    One violation ready for insert_violations. event_id names the snapshot
+    like the clip, so several cameras logging in the same millisecond do
+    not collide.
     """
-    conn = None
-    try:
-        conn = get_db_connection()
-        c = conn.cursor()
-
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        unique_id = int(time.time() * 1000)
-
-        # Save image snapshot
-        img_filename = f"violation_{unique_id}.jpg"
-        img_path = EVIDENCE_DIR / img_filename
-        cv2.imwrite(str(img_path), frame_img)
+    unique_id = event_id or int(time.time() * 1000)
+    return {
+        "plate": plate.strip().upper() if plate else "UNKNOWN",
+        "v_class": v_class,
+        "conf": float(conf),
+        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "image_filename": f"violation_{unique_id}.jpg",
+        "video_filename": video_filename,
+        "evidence_spool": evidence_spool,
+        "intersection_id": intersection_id,
+    }
+
+
+def insert_violations(conn, records):
+    """
+    Inserts violation records in the caller's transaction: one lookup for
+    their intersections and one for their plates, then one executemany per
+    table. Evidence jobs (for spooled records) and SMS for AutoApproved
+    ones are queued in the same transaction. Returns violation ids in
+    record order, None for records whose intersection does not exist.
+    """
+    intersections = existing_intersections(conn, [r["intersection_id"] for r in records])
+    vehicles = existing_vehicles(conn, [r["plate"] for r in records if r["plate"] != "UNKNOWN"])
 
-        # Validate intersection
-        if not intersection_exists(conn, DEFAULT_INTERSECTION_ID):
+    rows = []
+    accepted = []
+    for index, record in enumerate(records):
+        if record["intersection_id"] not in intersections:
             print(
-                f"❌ Database Error: intersection_id={DEFAULT_INTERSECTION_ID} "
+                f"❌ Database Error: intersection_id={record['intersection_id']} "
                 f"does not exist in intersection table"
             )
-            return
+            continue
 
         # Plate FK handling
-        raw_plate = plate.strip().upper() if plate else "UNKNOWN"
-        safe_plate_for_fk = None
-
-        if raw_plate != "UNKNOWN" and vehicle_exists(conn, raw_plate):
-            safe_plate_for_fk = raw_plate
-
-        # Decision logic
-        status = "Pending"
-        decision = "LoggedOnly"
-
-        if v_class == "civilian_car":
-            status = "AutoApproved"
-            decision = "Auto"
-        elif conf < CONFIDENCE_THRESHOLD:
-            status = "Pending"
-            decision = "Flagged"
-        else:
-            # In current schema this represents exempt / no fine
-            status = "Rejected"
-            decision = "Auto"
+        safe_plate_for_fk = record["plate"] if record["plate"] in vehicles else None
+        status, decision = violation_decision(record["v_class"], record["conf"])
+        record["stored_plate"] = safe_plate_for_fk
+        record["status"] = status
 
         note = (
-            f"Detected Class: {v_class}; OCR: {raw_plate}; "
+            f"Detected Class: {record['v_class']}; OCR: {record['plate']}; "
             f"Stored Plate FK: {safe_plate_for_fk if safe_plate_for_fk else 'NULL'}"
         )
+        rows.append((
+            safe_plate_for_fk,
+            record["intersection_id"],
+            record["timestamp"],
+            # A spooled snapshot does not exist yet; complete_job sets it
+            record["image_filename"] if record["evidence_spool"] is None else None,
+            record["video_filename"],
+            record["conf"],
+            decision,
+            status,
+            note,
+        ))
+        accepted.append(index)
+
+    violation_ids = [None] * len(records)
+    if not rows:
+        return violation_ids
 
-        c.execute(
-            """
-            INSERT INTO violation
-            (
-                plate_number,
-                intersection_id,
-                timestamp,
-                image_path,
-                video_path,
-                confidence_score,
-                decision_type,
-                status,
-                review_note
-            )
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-            (
-                safe_plate_for_fk,
-                DEFAULT_INTERSECTION_ID,
-                timestamp,
-                img_filename,
-                video_filename,
-                float(conf),
-                decision,
-                status,
-                note,
-            ),
+    c = conn.cursor()
+    c.executemany(
+        """
+        INSERT INTO violation
+        (
+            plate_number,
+            intersection_id,
+            timestamp,
+            image_path,
+            video_path,
+            confidence_score,
+            decision_type,
+            status,
+            review_note
         )
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        rows,
+    )
 
-        new_violation_id = c.lastrowid
+    # The transaction holds the write lock from the first row on, so the
+    # AUTOINCREMENT ids of this batch are consecutive and end at the last one
+    c.execute("SELECT last_insert_rowid()")
+    first_id = c.fetchone()[0] - len(rows) + 1
+    for offset, index in enumerate(accepted):
+        violation_ids[index] = first_id + offset
+
+    enqueue_evidence_jobs(conn, [
+        {
+            "violation_id": violation_ids[index],
+            "image_filename": records[index]["image_filename"],
+            **records[index]["evidence_spool"],
+        }
+        for index in accepted
+        if records[index]["evidence_spool"] is not None
+    ])
+
+    approved = [index for index in accepted if records[index]["status"] == "AutoApproved"]
+    sms_results = enqueue_sms_for_violations(
+        conn,
+        [violation_ids[index] for index in approved],
+        user_id=None,
+        note="Automatic SMS after AutoApproved detector decision",
+    )
+    for index, sms_result in zip(approved, sms_results):
+        records[index]["sms_result"] = sms_result
+
+    return violation_ids
+
+
+def is_busy_error(error):
+    message = str(error).lower()
+    return isinstance(error, sqlite3.OperationalError) and ("locked" in message or "busy" in message)
+
+
+def commit_violations(records):
+    """insert_violations in its own transaction, retried while the database is busy."""
+    for attempt in range(WRITE_BUSY_RETRIES + 1):
+        try:
+            with get_db_connection() as conn:
+                violation_ids = insert_violations(conn, records)
+                conn.commit()
+            return violation_ids
+
+        except sqlite3.OperationalError as e:
+            if not is_busy_error(e) or attempt == WRITE_BUSY_RETRIES:
+                raise
+            delay = WRITE_BUSY_BACKOFF_SECONDS * 2 ** attempt
+            logger.warning("Violation write found the database busy (%s); retrying in %.1fs", e, delay)
+            time.sleep(delay)
+
+
+def keep_for_replay(record):
+    """Logs a record that could not be written; its evidence spool is left in place."""
+    spool = record["evidence_spool"] or {}
+    logger.error(
+        "Violation not logged: plate=%s class=%s conf=%.1f timestamp=%s intersection_id=%s "
+        "clip_spool=%s snapshot_spool=%s",
+        record["plate"],
+        record["v_class"],
+        record["conf"],
+        record["timestamp"],
+        record["intersection_id"],
+        spool.get("clip_spool_path"),
+        spool.get("snapshot_spool_path"),
+    )
 
-        sms_result = None
-        if status == "AutoApproved":
-            sms_result = process_sms_for_violation(
-                conn=conn,
-                violation_id=new_violation_id,
-                user_id=None,
-                note="Automatic SMS after AutoApproved detector decision",
-            )
 
-        conn.commit()
+def write_violations(records):
+    """
+    Inserts records in one transaction with a single commit on the shared
+    writer connection, retrying with a short backoff while the database is
+    locked. If the batch still fails, each record is retried on its own so
+    one bad row cannot lose the rest. Returns violation ids in record order
+    (None where nothing was logged). A record that hit a database error
+    keeps its spool files so it can be replayed; only records skipped for
+    an unknown intersection have theirs removed.
+    """
+    failed = False
+    try:
+        violation_ids = commit_violations(records)
+
+    except sqlite3.Error as e:
+        if len(records) > 1:
+            logger.warning("Batch of %d violations failed (%s); retrying one at a time.", len(records), e)
+            return [write_violations([record])[0] for record in records]
+        logger.error("Database error writing violation: %s", e)
+        violation_ids = [None]
+        failed = True
+
+    except Exception:
+        logger.exception("Database error writing %d violations", len(records))
+        violation_ids = [None] * len(records)
+        failed = True
+
+    for record, violation_id in zip(records, violation_ids):
+        if violation_id is None:
+            if failed:
+                keep_for_replay(record)
+            elif record["evidence_spool"] is not None:
+                # Never inserted, so no evidence job will read the spool
+                remove_spool_files(record["evidence_spool"])
+            continue
 
         print(
-            f"💾 [DATABASE] Logged: V-{new_violation_id} | OCR={raw_plate} | "
-            f"stored_plate={safe_plate_for_fk} | class={v_class} | "
-            f"conf={conf:.1f}% | status={status} | video={video_filename}"
+            f"💾 [DATABASE] Logged: V-{violation_id} | OCR={record['plate']} | "
+            f"stored_plate={record['stored_plate']} | class={record['v_class']} | "
+            f"conf={record['conf']:.1f}% | status={record['status']} | "
+            f"video={record['video_filename']}"
         )
 
+        sms_result = record.get("sms_result")
         if sms_result:
             print(
-                f"📨 Auto SMS result for V-{new_violation_id}: "
+                f"📨 Auto SMS result for V-{violation_id}: "
                 f"{sms_result['status']} | {sms_result['message']}"
             )
 
-    except sqlite3.OperationalError as e:
-        print(f"❌ Database Operational Error: {e}")
+    return violation_ids
+
+
+def save_snapshot(record, frame_img):
+    cv2.imwrite(str(EVIDENCE_DIR / record["image_filename"]), frame_img)
 
-    except sqlite3.IntegrityError as e:
-        print(f"❌ Database Integrity Error: {e}")
 
-    except Exception as e:
-        print(f"❌ Database Error: {e}")
+def log_violation(plate, v_class, conf, frame_img, video_filename, evidence_spool=None,
+                  intersection_id=DEFAULT_INTERSECTION_ID, event_id=None):
+    """
+    Log one violation to SQLite with image + video evidence, in its own
+    transaction. The pipeline batches its events through ViolationWriter.
+    Also queues an SMS in the same transaction when status becomes AutoApproved.
+    With evidence_spool (see spool_event), the snapshot and clip are encoded
+    later by the evidence service; its job is queued in the same transaction.
+    Returns the new violation_id, or None.
+    """
+    record = violation_record(
+        plate, v_class, conf, video_filename, evidence_spool, intersection_id, event_id
+    )
 
-    finally:
-        if conn is not None:
-            conn.close()
+    # Save image snapshot (the evidence service writes it when spooled)
+    if evidence_spool is None:
+        save_snapshot(record, frame_img)
+
+    return write_violations([record])[0]
 
 
 # =========================================================
 # AI HELPERS
 # =========================================================
-def load_models():
-    print("Initializing ITMS Edge AI...")
-
-    print("... Loading YOLOv8 ...")
-    yolo_model = YOLO("yolov8n.pt")
+def load_ocr_reader():
+    # Imported here: easyocr pulls in torch, which takes seconds
+    import easyocr
 
-    print("... Loading Custom Exemption CNN ...")
-    if not os.path.exists(MODEL_PATH):
-        raise FileNotFoundError(f"{MODEL_PATH} not found")
+    return easyocr.Reader(["en"], gpu=False)
 
-    cnn_model = tf.keras.models.load_model(MODEL_PATH)
 
-    print("... Loading OCR Engine ...")
-    reader = easyocr.Reader(["en"], gpu=False)
+def load_models(timer):
+    """
+    Starts loading and warming up YOLO, the exemption CNN and EasyOCR on
+    background threads, each importing its own runtime. Returns at once;
+    models.get(name) waits for one model.
+    """
+    print("Initializing ITMS Edge AI...")
+    print(
+        f"... Loading YOLOv8 ({YOLO_BACKEND}), Custom Exemption CNN "
+        f"({CNN_BACKEND}: {CNN_MODELS[CNN_BACKEND]}) and OCR Engine in the background ..."
+    )
 
-    return yolo_model, cnn_model, reader
+    return BackgroundLoader(
+        {
+            "yolo": (
+                lambda: load_yolo(YOLO_BACKEND),
+                lambda yolo: warm_up_yolo(
+                    yolo, imgsz=DETECT_IMGSZ if DETECTION_MODE == "roi" else None
+                ),
+            ),
+            "cnn": (lambda: load_cnn(CNN_BACKEND), warm_up_cnn),
+            "ocr": (load_ocr_reader, warm_up_ocr),
+        },
+        timer,
+    )
 
 
-def extract_plate_text(reader, car_crop):
-    plate_text = "UNKNOWN"
-    try:
-        ocr_res = reader.readtext(car_crop)
-        if ocr_res:
-            plate_text = normalize_plate_text(ocr_res[0][1])
-    except Exception:
-        pass
-    return plate_text
+def classify_vehicles(cnn_predict, car_crops):
+    """
+    Classify every crop in a single batched call.
+    Returns [(pred_class, confidence), ...] in the same order as car_crops.
+    """
+    if not car_crops:
+        return []
 
+    scores = cnn_predict(cnn_input_batch(car_crops))
 
-def classify_vehicle(cnn_model, car_crop):
-    img_resized = cv2.resize(car_crop, (150, 150))
-    img_array = tf.expand_dims(img_resized / 255.0, 0)
+    pred_indices = np.argmax(scores, axis=1)
+    confidences = 100 * np.max(scores, axis=1)
 
-    preds = cnn_model.predict(img_array, verbose=0)
-    score = tf.nn.softmax(preds[0]).numpy()
+    return [
+        (CNN_CLASSES[int(index)], float(confidence))
+        for index, confidence in zip(pred_indices, confidences)
+    ]
 
-    pred_index = int(np.argmax(score))
-    pred_class = CNN_CLASSES[pred_index]
-    confidence = float(100 * np.max(score))
 
-    return pred_class, confidence
+def classify_vehicle(cnn_predict, car_crop):
+    return classify_vehicles(cnn_predict, [car_crop])[0]
 
 
 # =========================================================
-# MAIN
+# EVIDENCE RECORDING
 # =========================================================
-def main():
-    ensure_directories()
-
-    ffmpeg_ok = ffmpeg_available()
+def write_evidence_clip(frames, event_id, fps, ffmpeg_ok):
+    """
+    Streams the clip straight to MP4 when FFmpeg is available, otherwise
+    (or if that fails) saves a raw MJPG AVI. Returns the filename to store.
+    """
     if ffmpeg_ok:
-        print("✅ FFmpeg detected. Browser-friendly MP4 conversion enabled.")
+        final_video_filename = f"violation_{event_id}.mp4"
+        if stream_clip_to_mp4(frames, EVIDENCE_DIR / final_video_filename, fps):
+            return final_video_filename
+        print("⚠️ Streaming to MP4 failed. Falling back to raw AVI.")
     else:
-        print("⚠️ FFmpeg not found. Videos will still be saved, but browser playback may fail.")
+        print("⚠️ FFmpeg unavailable. Storing raw AVI only.")
 
-    try:
-        yolo_model, cnn_model, reader = load_models()
-    except Exception as e:
-        print(f"❌ Failed to load models: {e}")
-        return
+    raw_video_filename = f"violation_{event_id}_raw.avi"
+    if save_video_clip(frames, EVIDENCE_DIR / raw_video_filename, fps):
+        return raw_video_filename
 
-    cap = cv2.VideoCapture(VIDEO_SOURCE)
-    if not cap.isOpened():
-        print(f"❌ ERROR: Could not open video source: {VIDEO_SOURCE}")
-        return
+    print("❌ Could not save raw AVI video clip.")
+    return None
 
-    fps = cap.get(cv2.CAP_PROP_FPS)
-    if not fps or fps <= 1:
-        fps = 20.0
 
-    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+# =========================================================
+# PIPELINE
+# =========================================================
+def is_live_source(source):
+    return isinstance(source, int) or str(source).startswith(("rtsp://", "http://", "https://"))
 
-    line_y = int(height * 0.7)
-    pre_event_frames = int(PRE_EVENT_SECONDS * fps)
-    post_event_frames = int(POST_EVENT_SECONDS * fps)
 
-    frame_buffer = deque(maxlen=pre_event_frames)
-    pending_events = []
-    recent_trigger_times = {}
+class DetectorPipeline:
+    """
+    capture -> detect -> classify/OCR -> evidence/DB, one thread per stage
+    with bounded queues in between. Capture and display run on the calling
+    thread's side: capture on its own thread, display on the main thread
+    (HighGUI needs it). Frames are only drawn for the window or a watched
+    preview; otherwise they are released untouched.
+    """
 
-    print("✅ System Online. Processing Video...")
+    def __init__(self, cap, models, fps, ffmpeg_ok, live_source, startup=None,
+                 camera_id=None, intersection_id=DEFAULT_INTERSECTION_ID,
+                 line_position=LINE_POSITION, display=SHOW_WINDOW, preview=None,
+                 on_stats=None, metrics=None):
+        """
+        models: BackgroundLoader with "yolo", "cnn" and "ocr"; each stage
+        waits only for the model it needs, so capture can start first.
+        preview: optional PreviewServer, fed only while someone watches.
+        on_stats(summary) receives the per-camera summary of every report.
+        metrics: MetricsRegistry to record into (one is created if omitted).
+        """
+        self.cap = cap
+        self.models = models
+        self.startup = startup or StartupTimer()
+        self.fps = fps
+        self.ffmpeg_ok = ffmpeg_ok
+        self.camera_id = camera_id
+        self.intersection_id = intersection_id
+        self.display = display
+        self.preview = preview
+        self.on_stats = on_stats
+        self.metrics = metrics or MetricsRegistry({"camera": camera_id or "default"})
+
+        self.width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        self.line_y = int(self.height * line_position)
+
+        pre_event_frames = int(PRE_EVENT_SECONDS * fps)
+        post_event_frames = int(POST_EVENT_SECONDS * fps)
+
+        # Clip frames cover one clip window plus detection lag; the ring must
+        # also hold every packet in flight between capture and display.
+        # Frames of overlapping clips beyond that are spilled, not overwritten.
+        clip_window = pre_event_frames + post_event_frames + int(MAX_DETECTION_LAG_SECONDS * fps)
+        in_flight = DETECT_QUEUE_SIZE + CLASSIFY_QUEUE_SIZE + DISPLAY_QUEUE_SIZE + 4
+
+        if FRAME_BUFFER_MODE == "jpeg":
+            self.ring = FrameRing(in_flight + ENCODE_QUEUE_SIZE + 2)
+            self.clip_store = JpegFrameStore(clip_window + in_flight)
+            self.encode_queue = StageQueue("encode", ENCODE_QUEUE_SIZE)
+        else:
+            self.ring = FrameRing(clip_window + in_flight)
+            self.clip_store = self.ring
+            self.encode_queue = None
+
+        self.recorder = EvidenceRecorder(self.clip_store, pre_event_frames, post_event_frames)
+        self.violations = ViolationWriter(self.write_violations, on_written=self.violation_written)
+        self.plates = TrackPlateCache(self.read_plate)
+        self.tracker = IouTracker(
+            iou_threshold=TRACK_IOU_THRESHOLD,
+            max_misses=TRACK_MAX_MISSES,
+            on_removed=lambda track: self.plates.evict(track.track_id),
+        )
 
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
-            break
+        if DETECTION_MODE == "roi":
+            self.band = roi_band(self.height, self.line_y, ROI_ABOVE_LINE, ROI_BELOW_LINE)
+            self.scheduler = DetectionScheduler(
+                DETECT_STRIDE, MotionGate(self.height, self.line_y)
+            )
+        else:
+            self.band = None
+            self.scheduler = DetectionScheduler(1)
+        self.near_line = int(TRACK_NEAR_LINE_FRACTION * self.height)
+
+        # A live camera must never wait on detection, so the oldest waiting
+        # frame is dropped; a file source is throttled instead so every
+        # frame is analysed. Events are never dropped.
+        capture_policy = DROP_OLDEST if live_source else BLOCK
+        self.detect_queue = StageQueue(
+            "detect", DETECT_QUEUE_SIZE, capture_policy, on_drop=self.release_packet
+        )
+        self.classify_queue = StageQueue("classify", CLASSIFY_QUEUE_SIZE)
+        self.evidence_queue = StageQueue("evidence", EVIDENCE_QUEUE_SIZE)
+        self.display_queue = StageQueue(
+            "display", DISPLAY_QUEUE_SIZE, DROP_OLDEST, on_drop=self.release_packet
+        )
 
-        raw_frame = frame.copy()
-        now = time.time()
+        self.stop_event = threading.Event()
+        self.capture_stats = StageStats("capture", self.stage_histogram("capture"))
+        self.capture_thread = threading.Thread(target=self.capture, name="itms-capture", daemon=True)
 
-        # -------------------------------------------------
-        # 1. Continue recording pending events
-        # -------------------------------------------------
-        finished_events = []
+        self.stages = [
+            Stage(
+                "detect", self.detect, self.detect_queue, self.classify_queue,
+                on_drop=self.release_packet, histogram=self.stage_histogram("detect"),
+            ),
+            Stage(
+                "classify", self.classify, self.classify_queue,
+                on_stop=self.finish_classify, on_drop=self.release_packet,
+                histogram=self.stage_histogram("classify"),
+            ),
+            Stage(
+                "evidence", self.record_evidence, self.evidence_queue,
+                on_drop=self.release_event, histogram=self.stage_histogram("evidence"),
+            ),
+        ]
+        if self.encode_queue is not None:
+            self.stages.append(
+                Stage(
+                    "encode", self.encode_frame, self.encode_queue,
+                    on_drop=self.drop_encode, histogram=self.stage_histogram("encode"),
+                )
+            )
 
-        for event in pending_events:
-            event["frames"].append(raw_frame.copy())
-            event["remaining_frames"] -= 1
+        self.register_metrics()
 
-            if event["remaining_frames"] <= 0:
-                finished_events.append(event)
+    def stage_histogram(self, stage):
+        return self.metrics.histogram("itms_stage_seconds", stage=stage)
 
-        for event in finished_events:
-            pending_events.remove(event)
+    def register_metrics(self):
+        """Counters and gauges that are read only when metrics are scraped."""
+        metrics = self.metrics
+        for q in self.queues():
+            metrics.callback("itms_queue_depth", q.depth, queue=q.name)
+            metrics.callback("itms_frames_dropped_total", lambda q=q: q.dropped, queue=q.name)
 
-            raw_video_filename = f"violation_{event['event_id']}_raw.avi"
-            raw_video_path = EVIDENCE_DIR / raw_video_filename
+        metrics.callback("itms_frames_captured_total", lambda: self.capture_stats.processed)
+        metrics.callback("itms_frames_detected_total", lambda: self.scheduler.detections)
+        metrics.callback("itms_ocr_calls_total", lambda: self.plates.ocr_calls)
+        metrics.callback(
+            "itms_events_queued",
+            lambda: self.recorder.pending() + self.evidence_queue.depth() + self.violations.pending(),
+        )
+        stores = [("ring", self.ring)]
+        if self.clip_store is not self.ring:
+            stores.append(("jpeg", self.clip_store))
+        for name, store in stores:
+            metrics.callback("itms_ring_stalls_total", lambda s=store: s.stalls, store=name)
+            metrics.callback("itms_ring_spills_total", lambda s=store: s.spills, store=name)
+            metrics.callback(
+                "itms_ring_forced_overwrites_total", lambda s=store: s.forced_overwrites, store=name
+            )
 
-            final_video_filename = f"violation_{event['event_id']}.mp4"
-            final_video_path = EVIDENCE_DIR / final_video_filename
+    def queues(self):
+        queues = [self.detect_queue, self.classify_queue, self.evidence_queue, self.display_queue]
+        if self.encode_queue is not None:
+            queues.append(self.encode_queue)
+        return queues
+
+    def read_plate(self, crop):
+        """One OCR pass for the plate cache (evidence stage thread)."""
+        with self.metrics.time("ocr"):
+            return read_plate(
+                self.models.get("ocr"), crop,
+                localize=PLATE_LOCALIZATION, fallback=PLATE_OCR_FALLBACK,
+            )
 
-            saved = save_video_clip(event["frames"], raw_video_path, fps)
+    def event_id(self, track_id):
+        event_id = f"{int(time.time() * 1000)}_{track_id}"
+        return f"{self.camera_id}_{event_id}" if self.camera_id else event_id
 
-            video_filename_to_store = None
+    def release_packet(self, packet):
+        self.ring.unhold(packet["seq"])
 
-            if not saved:
-                print("❌ Could not save raw AVI video clip.")
-            else:
-                if ffmpeg_ok:
-                    converted = convert_to_browser_mp4(raw_video_path, final_video_path)
-                    if converted:
-                        video_filename_to_store = final_video_filename
+    def release_event(self, event):
+        # Safe to call twice (e.g. again from on_drop after a handler error)
+        self.clip_store.release(event.pop("frame_seqs", []))
 
-                        try:
-                            os.remove(raw_video_path)
-                            print(f"🧹 Removed raw file: {raw_video_filename}")
-                        except Exception as e:
-                            print(f"⚠️ Could not remove raw AVI: {e}")
-                    else:
-                        print("⚠️ Conversion failed. Raw AVI will be kept.")
-                        video_filename_to_store = raw_video_filename
-                else:
-                    print("⚠️ FFmpeg unavailable. Storing raw AVI only.")
-                    video_filename_to_store = raw_video_filename
-
-            log_violation(
-                plate=event["plate"],
-                v_class=event["pred_class"],
-                conf=event["confidence"],
-                frame_img=event["snapshot"],
-                video_filename=video_filename_to_store,
+    def encode_frame(self, seq):
+        with self.metrics.time("jpeg_encode"):
+            ok, buffer = cv2.imencode(
+                ".jpg", self.ring.frame(seq), [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY]
             )
+        self.clip_store.put(seq, buffer.tobytes() if ok else None)
+        self.ring.unhold(seq)
+        return None
+
+    def drop_encode(self, seq):
+        self.clip_store.put(seq, None)
+        self.ring.unhold(seq)
+
+    def read_frame(self):
+        """
+        Reads the next frame straight into a ring slot and returns its
+        sequence number (held for the packet), or None at end of stream.
+        """
+        if not self.ring.allocated:
+            ret, frame = self.cap.read()
+            if not ret:
+                return None
+            self.ring.allocate(frame.shape, frame.dtype)
+            seq, slot = self.ring.reserve()
+            np.copyto(slot, frame)
+        else:
+            seq, slot = self.ring.reserve()
+            ret, frame = self.cap.read(slot)
+            if not ret:
+                return None
+            # OpenCV allocates a new array when the slot does not fit
+            if not np.shares_memory(frame, slot):
+                np.copyto(slot, frame)
+
+        self.ring.publish(seq, hold=True)
+        return seq
+
+    # -------------------------------------------------
+    # Stage 0: capture
+    # -------------------------------------------------
+    def capture(self):
+        try:
+            while not self.stop_event.is_set():
+                started = time.perf_counter()
+                with self.metrics.time("capture_read"):
+                    seq = self.read_frame()
+                if seq is None:
+                    break
+                self.startup.mark("first frame")
+
+                if self.encode_queue is not None:
+                    # The encoder reads the slot in place, so it holds it
+                    # (capture waits) rather than pinning it (spillable)
+                    # until the JPEG is stored
+                    self.clip_store.reserve(seq)
+                    self.ring.hold(seq)
+                    self.encode_queue.put(seq)
+
+                for event in self.recorder.push(seq):
+                    self.evidence_queue.put(event)
+
+                self.detect_queue.put(
+                    {"seq": seq, "timestamp": time.time(), "frame": self.ring.frame(seq)}
+                )
+                self.capture_stats.record(time.perf_counter() - started)
+
+        except Exception as e:
+            print(f"❌ Capture error: {e}")
+
+        finally:
+            if self.encode_queue is not None:
+                self.encode_queue.put(STOP)
+            self.detect_queue.put(STOP)
+
+    # -------------------------------------------------
+    # Stage 1: YOLO detection, tracking, line crossing
+    # -------------------------------------------------
+    def run_yolo(self, frame):
+        """Vehicle boxes in full-frame coordinates: [((x1, y1, x2, y2), cls)]."""
+        if self.band is None:
+            boxes = self.models.get("yolo").detect(frame)
+            offset = 0
+        else:
+            # A view, not a copy; YOLO letterboxes it to DETECT_IMGSZ
+            top, bottom = self.band
+            boxes = self.models.get("yolo").detect(frame[top:bottom], imgsz=DETECT_IMGSZ)
+            offset = top
 
-        # -------------------------------------------------
-        # 2. Cleanup expired cooldown keys
-        # -------------------------------------------------
-        expired_keys = [
-            key for key, ts in recent_trigger_times.items()
-            if now - ts > TRIGGER_COOLDOWN_SECONDS
-        ]
-        for key in expired_keys:
-            del recent_trigger_times[key]
+        detections = []
 
-        # -------------------------------------------------
-        # 3. Draw enforcement line
-        # -------------------------------------------------
-        cv2.line(frame, (0, line_y), (width, line_y), (0, 0, 255), 3)
-        cv2.putText(
-            frame,
-            "ENFORCEMENT ZONE",
-            (10, line_y - 15),
-            cv2.FONT_HERSHEY_SIMPLEX,
-            0.8,
-            (0, 0, 255),
-            2,
+        for (x1, y1, x2, y2), cls, _ in boxes:
+            # YOLO classes of interest: car, motorcycle, bus, truck
+            if cls not in [2, 3, 5, 7]:
+                continue
+
+            detections.append(((x1, y1 + offset, x2, y2 + offset), cls))
+
+        return detections
+
+    def track_near_line(self):
+        return any(
+            abs(track.bbox[3] - self.line_y) <= self.near_line
+            for track in self.tracker.tracks.values()
+            if track.misses == 0 and not track.crossed
         )
 
-        # -------------------------------------------------
-        # 4. YOLO detection
-        # -------------------------------------------------
-        results = yolo_model(frame, verbose=False)
+    def detect(self, packet):
+        frame = packet["frame"]
 
-        for box in results[0].boxes:
-            x1, y1, x2, y2 = map(int, box.xyxy[0])
-            cls = int(box.cls[0])
+        # Tracking runs on this single thread, so frames are seen in order
+        if not self.scheduler.should_detect(frame, self.track_near_line()):
+            packet["tracks"] = [(track.track_id, track.bbox) for track in self.tracker.predict()]
+            packet["crossings"] = []
+            return packet
 
-            # YOLO classes of interest: car, motorcycle, bus, truck
-            if cls not in [2, 3, 5, 7]:
-                continue
+        with self.metrics.time("yolo"):
+            detections = self.run_yolo(frame)
+        with self.metrics.time("track"):
+            tracks = self.tracker.update(detections)
 
-            # Trigger when the bottom of the vehicle crosses the line
-            if not (y2 > line_y and y2 < line_y + 10):
-                continue
+        if not self.startup.reported:
+            self.startup.mark("first detection")
+            self.startup.report_once()
 
-            car_crop = raw_frame[y1:y2, x1:x2]
+        crossings = []
+        for track in tracks:
+            x1, y1, x2, y2 = track.bbox
+            car_crop = frame[max(y1, 0):y2, max(x1, 0):x2]
             if car_crop.size == 0:
                 continue
 
-            pred_class, confidence = classify_vehicle(cnn_model, car_crop)
-            plate_text = extract_plate_text(reader, car_crop)
+            # Keep the track's best few crops for OCR later
+            self.plates.offer(track.track_id, car_crop)
 
-            # Deduplicate repeated triggers nearby
-            center_x_bucket = ((x1 + x2) // 2) // 80
-            center_y_bucket = ((y1 + y2) // 2) // 80
-            trigger_key = f"{plate_text}_{pred_class}_{center_x_bucket}_{center_y_bucket}"
-
-            if trigger_key in recent_trigger_times:
+            # Each track triggers once, when its bottom edge crosses the line
+            if not track.crossed_line(self.line_y):
                 continue
 
-            recent_trigger_times[trigger_key] = now
+            # Claimed here, on the tracker's thread, so the entry cannot be
+            # evicted before the event resolves its plate
+            self.plates.claim(track.track_id)
+            crossings.append((track.track_id, track.bbox, car_crop))
+
+        packet["tracks"] = [(track.track_id, track.bbox) for track in tracks]
+        packet["crossings"] = crossings
+        self.metrics.histogram("itms_frame_age_seconds").observe(time.time() - packet["timestamp"])
+        return packet
+
+    # -------------------------------------------------
+    # Stage 2: CNN classification, OCR, event start
+    # -------------------------------------------------
+    def classify(self, packet):
+        crossings = packet.pop("crossings")
+        annotations = []
+
+        # Only newly crossed tracks get here, so each vehicle is classified
+        # once; the CNN runs on a stacked batch per frame. OCR is deferred to
+        # the evidence stage, which votes over the track's best crops.
+        predictions = []
+        if crossings:
+            # Waits for the CNN only once a vehicle actually needs it
+            cnn_predict = self.models.get("cnn")
+            with self.metrics.time("cnn"):
+                predictions = classify_vehicles(cnn_predict, [crop for _, _, crop in crossings])
+
+        for (track_id, bbox, car_crop), (pred_class, confidence) in zip(crossings, predictions):
+            self.plates.set_classification(track_id, pred_class, confidence)
 
-            # Visual feedback
             color = (0, 0, 255)
             if pred_class != "civilian_car":
                 color = (0, 255, 0)
+            annotations.append((bbox, f"{pred_class.upper()} {confidence:.1f}%", color))
+
+            event = {
+                "event_id": self.event_id(track_id),
+                "triggered_at": time.perf_counter(),
+                "snapshot": car_crop.copy(),
+                "track_id": track_id,
+                "pred_class": pred_class,
+                "confidence": confidence,
+            }
+            for finished in self.recorder.start_event(event, packet["seq"]):
+                self.evidence_queue.put(finished)
+            self.metrics.counter("itms_events_triggered_total").inc()
+
+            print(
+                f"🎥 Triggered evidence capture: track={track_id} | "
+                f"class={pred_class} | conf={confidence:.1f}%"
+            )
+
+        packet["annotations"] = annotations
+        self.display_queue.put(packet)
+        return None
+
+    def finish_classify(self):
+        # No more frames are coming: save what unfinished clips have
+        for event in self.recorder.flush():
+            self.evidence_queue.put(event)
+        self.evidence_queue.put(STOP)
+        self.display_queue.put(STOP)
+
+    # -------------------------------------------------
+    # Stage 3: clip writing, transcode, database insert
+    # -------------------------------------------------
+    def record_evidence(self, event):
+        # OCR for the whole track happens here, once, off the capture path
+        try:
+            with self.metrics.time("plate_resolve"):
+                plate = self.plates.resolve(event["track_id"])
+        except Exception as e:
+            print(f"⚠️ Plate OCR failed for track {event['track_id']}: {e}")
+            plate = None
+
+        evidence_spool = None
+        video_filename = None
+
+        # Frames stay pinned until they are spooled or encoded. Without a
+        # clip the violation is still logged, just without video.
+        try:
+            with self.metrics.time("clip_frames"):
+                frames = self.clip_store.frames(event["frame_seqs"])
+
+            if not frames:
+                print(f"⚠️ No clip frames for event {event['event_id']}; logging without video.")
+
+            elif EVIDENCE_MODE == "service":
+                with self.metrics.time("spool"):
+                    evidence_spool = spool_event(
+                        frames, event["snapshot"], event["event_id"], self.fps
+                    )
+                if evidence_spool is None:
+                    print("⚠️ Could not spool evidence. Encoding inline instead.")
+
+            if frames and evidence_spool is None:
+                with self.metrics.time("clip_write"):
+                    video_filename = write_evidence_clip(
+                        frames, event["event_id"], self.fps, self.ffmpeg_ok
+                    )
+        except Exception as e:
+            print(f"❌ Evidence clip for event {event['event_id']} failed: {e}; logging without video.")
+        finally:
+            self.release_event(event)
+
+        # With a spool, image_path and video_path are filled in by the evidence service
+        record = violation_record(
+            plate=plate,
+            v_class=event["pred_class"],
+            conf=event["confidence"],
+            video_filename=video_filename,
+            evidence_spool=evidence_spool,
+            intersection_id=self.intersection_id,
+            event_id=event["event_id"],
+        )
+        if evidence_spool is None:
+            save_snapshot(record, event["snapshot"])
+
+        # Inserted with whatever else finishes in the same flush window
+        record["triggered_at"] = event["triggered_at"]
+        self.violations.submit(record)
+        return None
+
+    def write_violations(self, records):
+        """One transaction per batch (violation writer thread)."""
+        with self.metrics.time("db_write"):
+            return write_violations(records)
+
+    def violation_written(self, record, violation_id):
+        if violation_id is not None:
+            self.metrics.counter("itms_events_logged_total").inc()
+            self.metrics.histogram("itms_event_seconds").observe(
+                time.perf_counter() - record["triggered_at"]
+            )
+
+    # -------------------------------------------------
+    # Display (main thread)
+    # -------------------------------------------------
+    def draw(self, packet):
+        # The only per-frame copy: overlays must not touch the ring slot
+        frame = packet["frame"].copy()
+        self.release_packet(packet)
+
+        cv2.line(frame, (0, self.line_y), (self.width, self.line_y), (0, 0, 255), 3)
+        cv2.putText(
+            frame,
+            "ENFORCEMENT ZONE",
+            (10, self.line_y - 15),
+            cv2.FONT_HERSHEY_SIMPLEX,
+            0.8,
+            (0, 0, 255),
+            2,
+        )
 
+        for track_id, (x1, y1, x2, y2) in packet["tracks"]:
+            # Classified tracks keep their label after the crossing frame
+            classification = self.plates.classification(track_id)
+            label = f"#{track_id}"
+            if classification is not None:
+                label += f" {classification[0].upper()}"
+
+            cv2.rectangle(frame, (x1, y1), (x2, y2), (255, 200, 0), 1)
+            cv2.putText(
+                frame,
+                label,
+                (x1, max(12, y1 - 4)),
+                cv2.FONT_HERSHEY_SIMPLEX,
+                0.4,
+                (255, 200, 0),
+                1,
+            )
+
+        for (x1, y1, x2, y2), label, color in packet["annotations"]:
             cv2.rectangle(frame, (x1, y1), (x2, y2), color, 3)
             cv2.putText(
                 frame,
-                f"{pred_class.upper()} {confidence:.1f}%",
+                label,
                 (x1, max(20, y1 - 10)),
                 cv2.FONT_HERSHEY_SIMPLEX,
                 0.5,
@@ -522,38 +1055,228 @@ def main():
                 2,
             )
 
-            event_id = int(time.time() * 1000)
-
-            pending_events.append(
-                {
-                    "event_id": event_id,
-                    "frames": list(frame_buffer) + [raw_frame.copy()],
-                    "remaining_frames": post_event_frames,
-                    "snapshot": car_crop.copy(),
-                    "plate": plate_text,
-                    "pred_class": pred_class,
-                    "confidence": confidence,
-                }
-            )
+        return frame
 
-            print(
-                f"🎥 Triggered evidence capture: plate={plate_text} | "
-                f"class={pred_class} | conf={confidence:.1f}%"
+    def report(self):
+        queues = self.queues()
+
+        # Snapshots reset the rate window, so take each once per report
+        snapshots = [self.capture_stats.snapshot()] + [
+            stage.stats.snapshot() for stage in self.stages
+        ]
+        line = format_pipeline_report(snapshots, queues)
+        if self.camera_id:
+            line = f"[{self.camera_id}] {line}"
+        stores = [("ring", self.ring)]
+        if self.clip_store is not self.ring:
+            stores.append(("jpeg", self.clip_store))
+
+        for name, store in stores:
+            stats = store.stats()
+            line += (
+                f" || {name}: {stats['pinnedSlots']}/{stats['capacity']} pinned, "
+                f"{stats['bytes'] / 1e6:.0f} MB, stalls={stats['stalls']}, "
+                f"spilled={stats['spilledFrames']}"
             )
+        detection = self.scheduler.stats()
+        line += (
+            f" || yolo: {detection['detections']}/{detection['frames']} frames, "
+            f"{detection['forced']} extra near the line"
+        )
+        plates = self.plates.stats()
+        line += (
+            f" || ocr: {plates['ocrCalls']} calls for {plates['resolved']} plates, "
+            f"{plates['tracks']} cached"
+        )
+        violations = self.violations.stats()
+        line += (
+            f" || db: {violations['written']} violations in {violations['batches']} batches, "
+            f"{violations['pending']} pending"
+        )
+        print(line)
+
+        if self.on_stats is not None:
+            self.on_stats({
+                "camera": self.camera_id,
+                "fps": snapshots[0]["perSecond"],
+                "stages": {s["stage"]: s["perSecond"] for s in snapshots[1:]},
+                "queues": {q.name: q.depth() for q in queues},
+                "dropped": sum(q.dropped for q in queues),
+                "yoloFrames": detection["detections"],
+                "frames": detection["frames"],
+            })
+
+    def log_metrics_summary(self):
+        print(f"📈 {json.dumps(self.metrics.summary())}")
+
+    def publish_preview(self, frame):
+        if frame.shape[1] > PREVIEW_MAX_WIDTH:
+            scale = PREVIEW_MAX_WIDTH / frame.shape[1]
+            frame = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+        ok, buffer = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, PREVIEW_JPEG_QUALITY])
+        if ok:
+            self.preview.publish(buffer.tobytes())
+
+    def start(self):
+        """Starts capture and the stage threads; frames buffer while models load."""
+        self.violations.start()
+        for stage in self.stages:
+            stage.start()
+        self.capture_thread.start()
+
+    def run(self):
+        """Display loop on the calling thread until the pipeline drains."""
+        next_report = time.monotonic() + STATS_INTERVAL_SECONDS
+        next_summary = time.monotonic() + METRICS_SUMMARY_INTERVAL_SECONDS
+
+        while True:
+            try:
+                packet = self.display_queue.get(timeout=0.1)
+            except queue.Empty:
+                packet = None
+
+            if packet is STOP:
+                break
+
+            if packet is not None:
+                preview_wanted = self.preview is not None and self.preview.wants_frame()
+                if self.display or preview_wanted:
+                    with self.metrics.time("draw"):
+                        frame = self.draw(packet)
+                    if self.display:
+                        cv2.imshow("ITMS Camera Feed", frame)
+                    if preview_wanted:
+                        with self.metrics.time("preview_encode"):
+                            self.publish_preview(frame)
+                else:
+                    self.release_packet(packet)
+
+            if self.display and cv2.waitKey(1) & 0xFF == ord("q"):
+                self.stop_event.set()
+
+            if time.monotonic() >= next_report:
+                self.report()
+                next_report = time.monotonic() + STATS_INTERVAL_SECONDS
+
+            if time.monotonic() >= next_summary:
+                self.log_metrics_summary()
+                next_summary = time.monotonic() + METRICS_SUMMARY_INTERVAL_SECONDS
+
+        # Display is done; wait for the evidence stage and the last batch
+        self.capture_thread.join()
+        for stage in self.stages:
+            stage.join()
+        self.violations.close()
 
-        # -------------------------------------------------
-        # 5. Add current frame to rolling pre-event buffer
-        # -------------------------------------------------
-        frame_buffer.append(raw_frame.copy())
+        self.report()
+        self.log_metrics_summary()
 
-        cv2.imshow("ITMS Camera Feed", frame)
-        if cv2.waitKey(1) & 0xFF == ord("q"):
-            break
+
+# =========================================================
+# MAIN
+# =========================================================
+def run_detector(source=VIDEO_SOURCE, intersection_id=DEFAULT_INTERSECTION_ID,
+                 line_position=LINE_POSITION, camera_id=None, display=SHOW_WINDOW,
+                 preview_port=PREVIEW_PORT, start_service=START_EVIDENCE_SERVICE,
+                 on_stats=None):
+    """
+    Runs one camera until its stream ends or it is stopped (q / Ctrl+C).
+    Returns False when it could not run or a live stream died, so a
+    supervisor knows to restart it.
+    """
+    ensure_directories()
+
+    ffmpeg_ok = ffmpeg_available()
+    if ffmpeg_ok:
+        print("✅ FFmpeg detected. Evidence clips will be streamed to browser-friendly MP4.")
+    else:
+        print("⚠️ FFmpeg not found. Videos will still be saved, but browser playback may fail.")
+
+    startup = StartupTimer(STARTUP_STARTED)
+    startup.record("imports", time.perf_counter() - STARTUP_STARTED)
+
+    # Models load in the background while the camera opens and capture
+    # starts filling the pre-event buffer
+    models = load_models(startup)
+
+    started = time.perf_counter()
+    cap = cv2.VideoCapture(source)
+    if not cap.isOpened():
+        print(f"❌ ERROR: Could not open video source: {source}")
+        return False
+    startup.record("camera open", time.perf_counter() - started)
+
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    if not fps or fps <= 1:
+        fps = 20.0
+
+    metrics = MetricsRegistry({"camera": camera_id or "default"})
+
+    preview = None
+    if preview_port:
+        try:
+            preview = PreviewServer(preview_port, metrics=metrics)
+        except OSError as e:
+            print(f"⚠️ Preview disabled: cannot listen on port {preview_port}: {e}")
+
+    live_source = is_live_source(source)
+    pipeline = DetectorPipeline(
+        cap=cap,
+        models=models,
+        fps=fps,
+        ffmpeg_ok=ffmpeg_ok,
+        live_source=live_source,
+        startup=startup,
+        camera_id=camera_id,
+        intersection_id=intersection_id,
+        line_position=line_position,
+        display=display,
+        preview=preview,
+        on_stats=on_stats,
+        metrics=metrics,
+    )
+
+    evidence_service = None
+    if EVIDENCE_MODE == "service" and start_service:
+        evidence_service = start_evidence_service()
+
+    pipeline.start()
+    if preview is not None:
+        preview.start()
+    models_ok = True
+
+    try:
+        try:
+            models.wait()
+            print("✅ System Online. Processing Video...")
+        except Exception as e:
+            # Let capture stop and the stages drain what they hold
+            print(f"❌ Failed to load models: {e}")
+            models_ok = False
+            pipeline.stop_event.set()
+
+        pipeline.run()
+    except KeyboardInterrupt:
+        pipeline.stop_event.set()
+
+    # A live camera only ends when asked to; otherwise its stream died
+    stream_died = live_source and not pipeline.stop_event.is_set()
 
     cap.release()
-    cv2.destroyAllWindows()
+    if preview is not None:
+        preview.stop()
+    if display:
+        cv2.destroyAllWindows()
+    stop_evidence_service(evidence_service)
     print("🛑 System stopped.")
+    return models_ok and not stream_died
+
+
+def main():
+    run_detector()
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s: %(message)s")
+    main()
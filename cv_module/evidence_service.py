@@ -0,0 +1,365 @@
+# cv_module/evidence_service.py
+"""
+Evidence encoding service backed by the evidence_job table.
+
+The detector spools each finished event to disk (clip frames as
+length-prefixed JPEGs, the vehicle crop as .npy) and queues an evidence_job
+row in the same transaction as the violation. This service claims due jobs,
+writes the JPEG snapshot and pipes the spooled JPEGs straight into ffmpeg
+for the H.264 MP4 (no intermediate AVI) in a process pool across cores, and
+fills in violation.image_path and video_path as each job completes. Jobs claimed
+by a service that died become due again when their lease runs out, so
+nothing is lost across detector or service crashes.
+
+Run from the project root:  python -m cv_module.evidence_service
+"""
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+import multiprocessing
+import os
+import shutil
+import sys
+import threading
+
+import cv2
+import numpy as np
+
+BASE_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = BASE_DIR.parent
+
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.append(str(PROJECT_ROOT))
+
+from cv_module.clip_writer import (
+    ffmpeg_available,
+    read_jpeg_spool,
+    save_video_clip,
+    stream_clip_to_mp4,
+    transcode_clip_file,
+    write_jpeg_spool,
+)
+from database.connection_pool import get_pools
+
+DB_PATH = PROJECT_ROOT / "database" / "itms_production.db"
+EVIDENCE_DIR = PROJECT_ROOT / "dashboard" / "evidence"
+SPOOL_DIR = BASE_DIR / "evidence_spool"
+
+MAX_WORKERS = os.cpu_count() or 2
+POLL_INTERVAL_SECONDS = 1.0
+MAX_ATTEMPTS = 3
+BACKOFF_BASE_SECONDS = 10
+BACKOFF_MAX_SECONDS = 10 * 60
+
+# A claimed job is hidden from other services for this long; a job whose
+# service died is retried once the lease runs out
+CLAIM_LEASE_SECONDS = 300
+
+
+# =========================================================
+# DETECTOR SIDE
+# =========================================================
+def spool_event(frames, snapshot, event_id, fps):
+    """
+    Writes an event's clip frames and snapshot crop to the spool directory.
+    Returns the job fields for enqueue_evidence_job, or None on failure.
+    """
+    SPOOL_DIR.mkdir(parents=True, exist_ok=True)
+
+    clip_spool_path = SPOOL_DIR / f"event_{event_id}.jpegs"
+    snapshot_spool_path = SPOOL_DIR / f"event_{event_id}_snapshot.npy"
+
+    if not write_jpeg_spool(frames, clip_spool_path):
+        return None
+
+    try:
+        np.save(snapshot_spool_path, snapshot)
+    except OSError as e:
+        print(f"❌ Could not spool snapshot: {e}")
+        clip_spool_path.unlink(missing_ok=True)
+        return None
+
+    return {
+        "clip_spool_path": str(clip_spool_path),
+        "snapshot_spool_path": str(snapshot_spool_path),
+        "video_basename": f"violation_{event_id}",
+        "fps": float(fps),
+    }
+
+
+def enqueue_evidence_job(conn, violation_id, image_filename, clip_spool_path,
+                         snapshot_spool_path, video_basename, fps):
+    """Queues the encode. The caller commits, normally with the violation insert."""
+    enqueue_evidence_jobs(conn, [{
+        "violation_id": violation_id,
+        "image_filename": image_filename,
+        "clip_spool_path": clip_spool_path,
+        "snapshot_spool_path": snapshot_spool_path,
+        "video_basename": video_basename,
+        "fps": fps,
+    }])
+
+
+def enqueue_evidence_jobs(conn, jobs):
+    """Batch form of enqueue_evidence_job: jobs are dicts of its arguments."""
+    conn.executemany(
+        """
+        INSERT INTO evidence_job
+        (violation_id, clip_spool_path, snapshot_spool_path, image_filename, video_basename, fps)
+        VALUES (?, ?, ?, ?, ?, ?)
+        """,
+        [
+            (
+                job["violation_id"], job["clip_spool_path"], job["snapshot_spool_path"],
+                job["image_filename"], job["video_basename"], job["fps"],
+            )
+            for job in jobs
+        ],
+    )
+
+
+# =========================================================
+# WORKER PROCESS
+# =========================================================
+def encode_evidence(job):
+    """
+    Runs in a pool process. Writes the JPEG snapshot and streams the spooled
+    JPEG frames into ffmpeg for the MP4 (or, without FFmpeg, muxes them into
+    a raw AVI). Returns the video filename to store.
+    Raises on failure so the service can retry.
+    """
+    EVIDENCE_DIR.mkdir(parents=True, exist_ok=True)
+
+    snapshot = np.load(job["snapshot_spool_path"])
+    if not cv2.imwrite(str(EVIDENCE_DIR / job["image_filename"]), snapshot):
+        raise RuntimeError(f"Could not write snapshot {job['image_filename']}")
+
+    clip_spool_path = Path(job["clip_spool_path"])
+    if clip_spool_path.suffix == ".avi":
+        return encode_legacy_spool(job, clip_spool_path)
+
+    frames = read_jpeg_spool(clip_spool_path)
+
+    if job["ffmpeg_ok"]:
+        video_filename = f"{job['video_basename']}.mp4"
+        if stream_clip_to_mp4(frames, EVIDENCE_DIR / video_filename, job["fps"]):
+            return video_filename
+        if job["attempt_count"] < MAX_ATTEMPTS:
+            raise RuntimeError(f"FFmpeg could not encode {clip_spool_path.name}")
+        print(f"⚠️ Giving up on MP4 for job {job['job_id']}. Keeping raw AVI.")
+
+    video_filename = f"{job['video_basename']}_raw.avi"
+    if not save_video_clip(frames, EVIDENCE_DIR / video_filename, job["fps"]):
+        raise RuntimeError(f"Could not write raw clip {video_filename}")
+    return video_filename
+
+
+def encode_legacy_spool(job, clip_spool_path):
+    """Jobs queued before the JPEG spool still point at an MJPG AVI spool."""
+    if job["ffmpeg_ok"]:
+        video_filename = f"{job['video_basename']}.mp4"
+        if transcode_clip_file(clip_spool_path, EVIDENCE_DIR / video_filename):
+            return video_filename
+        if job["attempt_count"] < MAX_ATTEMPTS:
+            raise RuntimeError(f"FFmpeg could not encode {clip_spool_path.name}")
+
+    video_filename = f"{job['video_basename']}_raw.avi"
+    shutil.copyfile(clip_spool_path, EVIDENCE_DIR / video_filename)
+    return video_filename
+
+
+# =========================================================
+# SERVICE
+# =========================================================
+def backoff_seconds(attempt_count: int) -> int:
+    return min(BACKOFF_BASE_SECONDS * 2 ** max(attempt_count - 1, 0), BACKOFF_MAX_SECONDS)
+
+
+def claim_jobs(conn, limit):
+    c = conn.cursor()
+    c.execute("BEGIN IMMEDIATE")
+
+    c.execute(
+        """
+        SELECT job_id, violation_id, clip_spool_path, snapshot_spool_path,
+               image_filename, video_basename, fps, attempt_count
+        FROM evidence_job
+        WHERE status = 'Queued'
+          AND next_attempt_at <= CURRENT_TIMESTAMP
+        ORDER BY next_attempt_at
+        LIMIT ?
+        """,
+        (limit,),
+    )
+    rows = c.fetchall()
+
+    if rows:
+        c.executemany(
+            """
+            UPDATE evidence_job
+            SET attempt_count = attempt_count + 1,
+                next_attempt_at = DATETIME('now', ?)
+            WHERE job_id = ?
+            """,
+            [(f"+{CLAIM_LEASE_SECONDS} seconds", row["job_id"]) for row in rows],
+        )
+
+    conn.commit()
+
+    jobs = []
+    for row in rows:
+        job = dict(row)
+        job["attempt_count"] += 1
+        jobs.append(job)
+    return jobs
+
+
+def complete_job(conn, job, video_filename):
+    conn.execute(
+        "UPDATE violation SET image_path = ?, video_path = ? WHERE violation_id = ?",
+        (job["image_filename"], video_filename, job["violation_id"]),
+    )
+    conn.execute(
+        """
+        UPDATE evidence_job
+        SET status = 'Done', error_message = NULL, next_attempt_at = NULL,
+            completed_at = CURRENT_TIMESTAMP
+        WHERE job_id = ?
+        """,
+        (job["job_id"],),
+    )
+    conn.commit()
+
+
+def fail_job(conn, job, error):
+    if job["attempt_count"] >= MAX_ATTEMPTS:
+        conn.execute(
+            """
+            UPDATE evidence_job
+            SET status = 'Failed', error_message = ?, next_attempt_at = NULL,
+                completed_at = CURRENT_TIMESTAMP
+            WHERE job_id = ?
+            """,
+            (error, job["job_id"]),
+        )
+        print(f"❌ Evidence job {job['job_id']} (V-{job['violation_id']}) failed: {error}")
+    else:
+        delay = backoff_seconds(job["attempt_count"])
+        conn.execute(
+            "UPDATE evidence_job SET error_message = ?, next_attempt_at = DATETIME('now', ?) "
+            "WHERE job_id = ?",
+            (error, f"+{delay} seconds", job["job_id"]),
+        )
+        print(
+            f"⚠️ Evidence job {job['job_id']} attempt {job['attempt_count']} failed; "
+            f"retrying in {delay}s: {error}"
+        )
+    conn.commit()
+
+
+def remove_spool_files(job):
+    for key in ("clip_spool_path", "snapshot_spool_path"):
+        try:
+            os.remove(job[key])
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"⚠️ Could not remove spool file {job[key]}: {e}")
+
+
+class EvidenceService:
+    def __init__(self, db_path=DB_PATH, max_workers=MAX_WORKERS):
+        self.pools = get_pools(db_path)
+        self.max_workers = max_workers
+        self.ffmpeg_ok = ffmpeg_available()
+        self.stop_event = threading.Event()
+
+        # spawn: workers must not inherit a forked copy of the caller's
+        # threads and locks (the detector runs many)
+        self.executor = ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+
+        self.completed = 0
+        self.failed = 0
+
+    def record(self, job, future):
+        error = None
+        try:
+            video_filename = future.result()
+        except Exception as e:
+            error = str(e) or e.__class__.__name__
+
+        with self.pools.write() as conn:
+            if error is None:
+                complete_job(conn, job, video_filename)
+            else:
+                fail_job(conn, job, error)
+
+        if error is None:
+            remove_spool_files(job)
+            self.completed += 1
+            print(f"🎞️ Evidence ready for V-{job['violation_id']}: {video_filename}")
+        elif job["attempt_count"] >= MAX_ATTEMPTS:
+            # Failed for good: nothing will read the spool again
+            remove_spool_files(job)
+            self.failed += 1
+
+    def step(self, in_flight, poll_interval):
+        capacity = self.max_workers * 2 - len(in_flight)
+        if capacity > 0 and not self.stop_event.is_set():
+            try:
+                with self.pools.write() as conn:
+                    jobs = claim_jobs(conn, capacity)
+            except Exception as e:
+                print(f"❌ Evidence service claim error: {e}")
+                jobs = []
+
+            for job in jobs:
+                job["ffmpeg_ok"] = self.ffmpeg_ok
+                in_flight[self.executor.submit(encode_evidence, job)] = job
+
+        if not in_flight:
+            self.stop_event.wait(poll_interval)
+            return
+
+        done, _ = wait(in_flight, timeout=poll_interval, return_when=FIRST_COMPLETED)
+        for future in done:
+            try:
+                self.record(in_flight.pop(future), future)
+            except Exception as e:
+                print(f"❌ Evidence service record error: {e}")
+
+    def run_forever(self, poll_interval=POLL_INTERVAL_SECONDS):
+        """
+        Keeps up to two jobs per worker in flight and records each as soon
+        as it finishes. After stop() or Ctrl+C it finishes and records the
+        in-flight jobs; unclaimed jobs stay queued for the next run.
+        """
+        in_flight = {}
+
+        print(
+            f"🎞️ Evidence service started (workers={self.max_workers}, "
+            f"ffmpeg={'yes' if self.ffmpeg_ok else 'no'})"
+        )
+
+        try:
+            while not self.stop_event.is_set() or in_flight:
+                try:
+                    self.step(in_flight, poll_interval)
+                except KeyboardInterrupt:
+                    print(f"🛑 Stopping evidence service after {len(in_flight)} in-flight jobs...")
+                    self.stop()
+
+        finally:
+            self.executor.shutdown(wait=True)
+            print(
+                f"🛑 Evidence service stopped (completed={self.completed}, failed={self.failed})."
+            )
+
+    def stop(self):
+        self.stop_event.set()
+
+
+if __name__ == "__main__":
+    EvidenceService().run_forever()
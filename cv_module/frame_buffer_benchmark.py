@@ -0,0 +1,143 @@
+# cv_module/frame_buffer_benchmark.py
+"""
+Compares the two clip buffer modes of the detector pipeline:
+
+  raw   frames stay as BGR arrays in the FrameRing; the clip writer
+        JPEG-encodes every frame through cv2.VideoWriter(MJPG)
+  jpeg  each frame is JPEG-encoded once on capture; the clip writer only
+        muxes the stored bytes
+
+Reports buffer memory for one clip window and CPU time per frame and per
+clip. Uses a synthetic traffic-like scene unless a video path is given.
+
+Run from the project root:  python -m cv_module.frame_buffer_benchmark [video]
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from cv_module.mjpeg_avi import write_mjpeg_avi
+
+WIDTH = 1920
+HEIGHT = 1080
+FPS = 20.0
+PRE_EVENT_SECONDS = 2
+POST_EVENT_SECONDS = 3
+JPEG_QUALITY = 90
+
+
+def synthetic_frames(count, width=WIDTH, height=HEIGHT):
+    """Static road-like background with a few moving blocks and sensor noise."""
+    rng = np.random.default_rng(1)
+
+    background = np.zeros((height, width, 3), dtype=np.uint8)
+    background[:] = np.linspace(60, 140, height, dtype=np.uint8)[:, None, None]
+    cv2.line(background, (0, int(height * 0.7)), (width, int(height * 0.7)), (255, 255, 255), 6)
+
+    for i in range(count):
+        frame = background.copy()
+        for lane in range(4):
+            x = (i * (12 + lane * 4) + lane * 300) % width
+            y = int(height * (0.3 + lane * 0.12))
+            cv2.rectangle(frame, (x, y), (x + 220, y + 120), (40 + lane * 50, 80, 200 - lane * 30), -1)
+        noise = rng.integers(0, 6, size=frame.shape, dtype=np.uint8)
+        yield cv2.add(frame, noise)
+
+
+def video_frames(path, count):
+    cap = cv2.VideoCapture(str(path))
+    try:
+        read = 0
+        while read < count:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            read += 1
+            yield frame
+    finally:
+        cap.release()
+
+
+def cpu_ms_per_frame(cpu_seconds, frames):
+    return round(cpu_seconds * 1000 / frames, 2) if frames else 0.0
+
+
+def bench_raw(frames, output_path, fps):
+    ring = np.empty((len(frames), *frames[0].shape), dtype=frames[0].dtype)
+
+    cpu_started = time.process_time()
+    for index, frame in enumerate(frames):
+        np.copyto(ring[index], frame)
+    capture_cpu = time.process_time() - cpu_started
+
+    height, width = frames[0].shape[:2]
+    cpu_started = time.process_time()
+    wall_started = time.perf_counter()
+    writer = cv2.VideoWriter(str(output_path), cv2.VideoWriter_fourcc(*"MJPG"), fps, (width, height))
+    for frame in ring:
+        writer.write(frame)
+    writer.release()
+
+    return {
+        "bufferBytes": int(ring.nbytes),
+        "captureCpuMsPerFrame": cpu_ms_per_frame(capture_cpu, len(frames)),
+        "clipWriteCpuSeconds": round(time.process_time() - cpu_started, 3),
+        "clipWriteWallSeconds": round(time.perf_counter() - wall_started, 3),
+        "clipBytes": output_path.stat().st_size,
+    }
+
+
+def bench_jpeg(frames, output_path, fps, quality):
+    cpu_started = time.process_time()
+    encoded = []
+    for frame in frames:
+        ok, buffer = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+        if ok:
+            encoded.append(buffer.tobytes())
+    capture_cpu = time.process_time() - cpu_started
+
+    cpu_started = time.process_time()
+    wall_started = time.perf_counter()
+    write_mjpeg_avi(encoded, output_path, fps)
+
+    return {
+        "bufferBytes": sum(len(data) for data in encoded),
+        "captureCpuMsPerFrame": cpu_ms_per_frame(capture_cpu, len(frames)),
+        "clipWriteCpuSeconds": round(time.process_time() - cpu_started, 3),
+        "clipWriteWallSeconds": round(time.perf_counter() - wall_started, 3),
+        "clipBytes": output_path.stat().st_size,
+    }
+
+
+def run_benchmark(source=None, fps=FPS, quality=JPEG_QUALITY):
+    frame_count = int((PRE_EVENT_SECONDS + POST_EVENT_SECONDS) * fps)
+    generator = video_frames(source, frame_count) if source else synthetic_frames(frame_count)
+    frames = list(generator)
+    if not frames:
+        raise RuntimeError(f"No frames read from {source}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        raw = bench_raw(frames, Path(tmp) / "raw.avi", fps)
+        jpeg = bench_jpeg(frames, Path(tmp) / "jpeg.avi", fps, quality)
+
+    height, width = frames[0].shape[:2]
+    return {
+        "source": str(source) if source else "synthetic",
+        "frameSize": f"{width}x{height}",
+        "clipFrames": len(frames),
+        "jpegQuality": quality,
+        "raw": raw,
+        "jpeg": jpeg,
+        "bufferMemoryRatio": round(raw["bufferBytes"] / jpeg["bufferBytes"], 1),
+        "cpuCores": os.cpu_count(),
+    }
+
+
+if __name__ == "__main__":
+    print(json.dumps(run_benchmark(sys.argv[1] if len(sys.argv) > 1 else None), indent=2))
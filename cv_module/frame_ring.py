@@ -0,0 +1,413 @@
+# cv_module/frame_ring.py
+"""
+Preallocated ring buffer of frames shared by every pipeline stage.
+
+Capture reads each frame straight into a ring slot. Packets going through
+detection and frames queued for the JPEG encoder hold a view of their
+slot, so capture waits for them (the queue sizes bound how many there
+are). Evidence events instead pin frames by sequence number and read
+them later through frames(), which copies one frame at a time: when
+capture needs a slot that is still pinned, the frame is spilled to a
+private copy and the slot reused, so a pinned frame is never overwritten
+and capture never waits on evidence.
+
+Memory is capacity * frame_bytes plus the spilled frames. Spills are not
+bounded by the ring: they grow with the evidence backlog (clips waiting
+to be written that reach back further than the ring), and the
+itms_ring_spills_total metric and the spilledFrames stat show it.
+
+JpegFrameStore is the compressed alternative for clip frames: the ring then
+only has to cover frames in flight through detection.
+"""
+import threading
+import time
+
+import numpy as np
+
+
+class FrameRing:
+    def __init__(self, capacity, stall_timeout=2.0):
+        if capacity < 2:
+            raise ValueError("FrameRing needs at least 2 slots")
+
+        self.capacity = capacity
+        self.stall_timeout = stall_timeout
+
+        self._slots = None
+        self._slot_seq = np.full(capacity, -1, dtype=np.int64)
+        self._holds = np.zeros(capacity, dtype=np.int32)
+        self._pins = np.zeros(capacity, dtype=np.int32)
+        self._spilled = {}     # seq -> [frame copy, pins]
+        self._cond = threading.Condition()
+        self._next_seq = 1
+
+        self.stalls = 0
+        self.spills = 0
+        self.forced_overwrites = 0
+
+    @property
+    def allocated(self):
+        return self._slots is not None
+
+    @property
+    def nbytes(self):
+        return self._slots.nbytes if self._slots is not None else 0
+
+    def allocate(self, shape, dtype=np.uint8):
+        self._slots = np.empty((self.capacity, *shape), dtype=dtype)
+
+    def reserve(self):
+        """
+        Returns (seq, slot) for the next frame. Waits while a packet holds
+        the slot; after stall_timeout the hold is dropped anyway so a
+        leaked hold cannot freeze capture. Pinned frames are spilled first.
+        """
+        with self._cond:
+            seq = self._next_seq
+            index = seq % self.capacity
+
+            if self._holds[index] > 0:
+                self.stalls += 1
+                deadline = time.monotonic() + self.stall_timeout
+                while self._holds[index] > 0:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.forced_overwrites += 1
+                        print(
+                            f"⚠️ Frame ring slot for #{self._slot_seq[index]} still held "
+                            f"after {self.stall_timeout:.1f}s; overwriting"
+                        )
+                        self._holds[index] = 0
+                        break
+                    self._cond.wait(remaining)
+
+            if self._pins[index] > 0 and self._slot_seq[index] >= 0:
+                self._spilled[int(self._slot_seq[index])] = [
+                    self._slots[index].copy(), int(self._pins[index])
+                ]
+                self.spills += 1
+            self._pins[index] = 0
+
+            # Invalidate while capture writes into it
+            self._slot_seq[index] = -1
+            return seq, self._slots[index]
+
+    def publish(self, seq, hold=False):
+        """hold: the caller keeps a view of the slot until unhold(seq)."""
+        with self._cond:
+            index = seq % self.capacity
+            self._slot_seq[index] = seq
+            if hold:
+                self._holds[index] += 1
+            self._next_seq = seq + 1
+
+    def hold(self, seq):
+        """Holds a resident frame like publish(hold=True). Returns False if it is gone."""
+        with self._cond:
+            index = seq % self.capacity
+            if self._slot_seq[index] == seq:
+                self._holds[index] += 1
+                return True
+            return False
+
+    def unhold(self, seq):
+        with self._cond:
+            index = seq % self.capacity
+            if self._slot_seq[index] == seq and self._holds[index] > 0:
+                self._holds[index] -= 1
+            self._cond.notify_all()
+
+    def pin(self, seq):
+        """Pins a resident frame. Returns False if it was already overwritten."""
+        with self._cond:
+            index = seq % self.capacity
+            if self._slot_seq[index] == seq:
+                self._pins[index] += 1
+                return True
+            spilled = self._spilled.get(seq)
+            if spilled is not None:
+                spilled[1] += 1
+                return True
+            return False
+
+    def release(self, seqs):
+        with self._cond:
+            for seq in seqs:
+                index = seq % self.capacity
+                if self._slot_seq[index] == seq:
+                    if self._pins[index] > 0:
+                        self._pins[index] -= 1
+                    continue
+                spilled = self._spilled.get(seq)
+                if spilled is not None:
+                    spilled[1] -= 1
+                    if spilled[1] <= 0:
+                        del self._spilled[seq]
+
+    def frame(self, seq):
+        """
+        View of a held frame. Callers must not draw on it. A pinned frame
+        can be spilled and its slot reused at any time, so read pinned
+        frames through frames() instead.
+        """
+        with self._cond:
+            index = seq % self.capacity
+            if self._slot_seq[index] == seq:
+                return self._slots[index]
+            spilled = self._spilled.get(seq)
+            if spilled is not None:
+                return spilled[0]
+        raise KeyError(f"Frame #{seq} is no longer in the ring")
+
+    def copy_frame(self, seq):
+        """
+        A frame that later captures cannot change: a copy taken under the
+        lock while it is resident, or its private spilled copy.
+        """
+        with self._cond:
+            index = seq % self.capacity
+            if self._slot_seq[index] == seq:
+                return self._slots[index].copy()
+            spilled = self._spilled.get(seq)
+            if spilled is not None:
+                return spilled[0]
+        raise KeyError(f"Frame #{seq} is no longer in the ring")
+
+    def frames(self, seqs):
+        """Pinned frames in order; any that are gone are skipped."""
+        with self._cond:
+            present = [
+                seq for seq in seqs
+                if self._slot_seq[seq % self.capacity] == seq or seq in self._spilled
+            ]
+        return PinnedFrames(self, present)
+
+    def stats(self):
+        with self._cond:
+            return {
+                "capacity": self.capacity,
+                "bytes": self.nbytes + sum(frame.nbytes for frame, _ in self._spilled.values()),
+                "pinnedSlots": int(np.count_nonzero(self._pins | self._holds)),
+                "spilledFrames": len(self._spilled),
+                "stalls": self.stalls,
+                "spills": self.spills,
+                "forcedOverwrites": self.forced_overwrites,
+            }
+
+
+class PinnedFrames:
+    """
+    Read-only sequence of pinned FrameRing frames for the clip writers.
+    Every access returns ring.copy_frame(seq), so a spill during a long
+    clip write cannot swap later captures into it, and only the frame
+    being written is copied at a time instead of the whole clip.
+    """
+
+    def __init__(self, ring, seqs):
+        self.ring = ring
+        self.seqs = list(seqs)
+
+    def __len__(self):
+        return len(self.seqs)
+
+    def __getitem__(self, index):
+        return self.ring.copy_frame(self.seqs[index])
+
+    def __iter__(self):
+        for seq in self.seqs:
+            yield self.ring.copy_frame(seq)
+
+
+class EvidenceRecorder:
+    """
+    Tracks which frames each violation clip needs, in a FrameRing or a
+    JpegFrameStore. Detection runs behind capture, so an event pins the
+    frames around its own trigger frame: pre-event and already-captured
+    post-event frames at once, the rest as capture publishes them. The
+    evidence stage releases the pins after writing the clip.
+    """
+
+    def __init__(self, store, pre_event_frames, post_event_frames):
+        self.store = store
+        self.pre_event_frames = pre_event_frames
+        self.post_event_frames = post_event_frames
+        self._pending = []
+        self._latest_seq = 0
+        self._lock = threading.Lock()
+
+    def push(self, seq):
+        """Called by capture after publishing a frame. Returns completed events."""
+        with self._lock:
+            self._latest_seq = seq
+
+            finished = []
+            for event in self._pending:
+                if self.store.pin(seq):
+                    event["frame_seqs"].append(seq)
+                event["remaining_frames"] -= 1
+                if event["remaining_frames"] <= 0:
+                    finished.append(event)
+
+            for event in finished:
+                self._pending.remove(event)
+
+            return finished
+
+    def pending(self):
+        """Events still waiting for post-event frames."""
+        with self._lock:
+            return len(self._pending)
+
+    def start_event(self, event, trigger_seq):
+        """
+        Pins the event's resident frames. Returns [event] if its clip is
+        already complete, else [].
+        """
+        first_seq = max(trigger_seq - self.pre_event_frames, 1)
+        last_seq = trigger_seq + self.post_event_frames
+
+        with self._lock:
+            available_to = min(last_seq, self._latest_seq)
+            event["frame_seqs"] = [
+                seq for seq in range(first_seq, available_to + 1) if self.store.pin(seq)
+            ]
+            event["remaining_frames"] = last_seq - max(available_to, trigger_seq)
+
+            if event["remaining_frames"] <= 0:
+                return [event]
+
+            self._pending.append(event)
+            return []
+
+    def flush(self):
+        """Hands back unfinished events, e.g. when the source ends."""
+        with self._lock:
+            pending, self._pending = self._pending, []
+            return pending
+
+
+_PENDING = object()
+
+
+class JpegFrameStore:
+    """
+    Compressed alternative to keeping clip frames in the FrameRing. Holds
+    one JPEG per sequence number, filled in by an encoder thread, with the
+    same pin/release/frames interface so EvidenceRecorder works with either.
+    A slot that is still pinned when its turn comes again moves its JPEG
+    aside instead of being overwritten.
+    """
+
+    def __init__(self, capacity, wait_timeout=5.0):
+        self.capacity = capacity
+        self.wait_timeout = wait_timeout
+
+        self._data = [None] * capacity
+        self._slot_seq = [-1] * capacity
+        self._pins = [0] * capacity
+        self._spilled = {}     # seq -> [data, pins]
+        self._cond = threading.Condition()
+
+        self.stalls = 0
+        self.spills = 0
+        self.forced_overwrites = 0
+
+    @property
+    def nbytes(self):
+        with self._cond:
+            return self._bytes()
+
+    def _bytes(self):
+        resident = sum(len(data) for data in self._data if isinstance(data, bytes))
+        spilled = sum(len(data) for data, _ in self._spilled.values() if isinstance(data, bytes))
+        return resident + spilled
+
+    def reserve(self, seq):
+        """Claims the slot for a just-captured frame before it is encoded."""
+        with self._cond:
+            index = seq % self.capacity
+
+            if self._pins[index] > 0 and self._slot_seq[index] >= 0:
+                self._spilled[self._slot_seq[index]] = [self._data[index], self._pins[index]]
+                self.spills += 1
+
+            self._pins[index] = 0
+            self._slot_seq[index] = seq
+            self._data[index] = _PENDING
+
+    def put(self, seq, data):
+        """Stores the encoded frame; data=None marks a frame that failed to encode."""
+        with self._cond:
+            index = seq % self.capacity
+            if self._slot_seq[index] == seq:
+                self._data[index] = data
+            elif seq in self._spilled:
+                self._spilled[seq][0] = data
+            self._cond.notify_all()
+
+    def pin(self, seq):
+        with self._cond:
+            index = seq % self.capacity
+            if self._slot_seq[index] == seq:
+                self._pins[index] += 1
+                return True
+            spilled = self._spilled.get(seq)
+            if spilled is not None:
+                spilled[1] += 1
+                return True
+            return False
+
+    def release(self, seqs):
+        with self._cond:
+            for seq in seqs:
+                index = seq % self.capacity
+                if self._slot_seq[index] == seq:
+                    if self._pins[index] > 0:
+                        self._pins[index] -= 1
+                    continue
+                spilled = self._spilled.get(seq)
+                if spilled is not None:
+                    spilled[1] -= 1
+                    if spilled[1] <= 0:
+                        del self._spilled[seq]
+
+    def _lookup(self, seq):
+        index = seq % self.capacity
+        if self._slot_seq[index] == seq:
+            return self._data[index]
+        spilled = self._spilled.get(seq)
+        return spilled[0] if spilled is not None else None
+
+    def frames(self, seqs):
+        """
+        Encoded frames for pinned seqs, waiting for any still being encoded.
+        Frames that failed to encode are skipped.
+        """
+        frames = []
+        deadline = time.monotonic() + self.wait_timeout
+
+        with self._cond:
+            for seq in seqs:
+                while self._lookup(seq) is _PENDING:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+
+                data = self._lookup(seq)
+                if isinstance(data, bytes):
+                    frames.append(data)
+
+        return frames
+
+    def stats(self):
+        with self._cond:
+            return {
+                "capacity": self.capacity,
+                "bytes": self._bytes(),
+                "pinnedSlots": sum(1 for pins in self._pins if pins),
+                "spilledFrames": len(self._spilled),
+                "stalls": self.stalls,
+                "spills": self.spills,
+                "forcedOverwrites": self.forced_overwrites,
+            }
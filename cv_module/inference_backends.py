@@ -0,0 +1,265 @@
+# cv_module/inference_backends.py
+"""
+Interchangeable CPU inference backends for the two detector models.
+
+  YOLO  "pytorch"     ultralytics with yolov8n.pt
+        "onnx"        ONNX Runtime with the exported yolov8n.onnx
+        "onnx-int8"   the same graph with int8 weights
+  CNN   "keras"       TensorFlow/Keras with the .h5 model
+        "tflite"      TFLite export (softmax included)
+        "tflite-int8" TFLite export with int8 post-training quantization
+
+Every YOLO backend exposes detect(image, imgsz=None) ->
+[((x1, y1, x2, y2), cls, conf), ...] in image pixels. Every CNN backend is
+a callable taking a float32 batch from cnn_input_batch() and returning an
+(N, classes) array of probabilities. Each backend imports its runtime
+only when loaded, so an ONNX/TFLite detector never imports torch or full
+TensorFlow. Export the models with cv_module/model_export.py.
+"""
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+YOLO_MODELS = {
+    "pytorch": "yolov8n.pt",
+    "onnx": "yolov8n.onnx",
+    "onnx-int8": "yolov8n_int8.onnx",
+}
+CNN_MODELS = {
+    "keras": "zimbabwe_traffic_model.h5",
+    "tflite": "zimbabwe_traffic_model.tflite",
+    "tflite-int8": "zimbabwe_traffic_model_int8.tflite",
+}
+
+CNN_INPUT_SIZE = (150, 150)
+
+# Output order of every CNN backend: column i of the probabilities
+CNN_CLASSES = ["ambulance", "civilian_car", "fire_truck", "police_car"]
+
+# ultralytics predict() defaults, so all YOLO backends return the same boxes
+YOLO_IMGSZ = 640
+YOLO_STRIDE = 32
+YOLO_CONF_THRESHOLD = 0.25
+YOLO_IOU_THRESHOLD = 0.7
+LETTERBOX_COLOR = (114, 114, 114)
+
+# 0 lets the runtime pick (one thread per physical core)
+INFERENCE_THREADS = 0
+
+
+# =========================================================
+# YOLO
+# =========================================================
+class UltralyticsYoloDetector:
+    def __init__(self, weights):
+        from ultralytics import YOLO
+
+        self.model = YOLO(weights)
+
+    def detect(self, image, imgsz=None):
+        options = {"imgsz": imgsz} if imgsz else {}
+        results = self.model(image, verbose=False, **options)
+        return [
+            (tuple(map(int, box.xyxy[0])), int(box.cls[0]), float(box.conf[0]))
+            for box in results[0].boxes
+        ]
+
+
+def letterbox(image, shape):
+    """
+    Resizes keeping the aspect ratio and pads to shape (h, w).
+    Returns (padded, scale, (pad_x, pad_y)).
+    """
+    height, width = image.shape[:2]
+    scale = min(shape[0] / height, shape[1] / width)
+    resized_w, resized_h = int(round(width * scale)), int(round(height * scale))
+
+    if (resized_w, resized_h) != (width, height):
+        image = cv2.resize(image, (resized_w, resized_h), interpolation=cv2.INTER_LINEAR)
+
+    pad_x = (shape[1] - resized_w) // 2
+    pad_y = (shape[0] - resized_h) // 2
+    padded = cv2.copyMakeBorder(
+        image, pad_y, shape[0] - resized_h - pad_y, pad_x, shape[1] - resized_w - pad_x,
+        cv2.BORDER_CONSTANT, value=LETTERBOX_COLOR,
+    )
+    return padded, scale, (pad_x, pad_y)
+
+
+def input_shape(image_shape, imgsz, stride=YOLO_STRIDE):
+    """Smallest stride-aligned (h, w) holding the image scaled to imgsz on its long side."""
+    height, width = image_shape[:2]
+    scale = imgsz / max(height, width)
+    return (
+        int(np.ceil(height * scale / stride) * stride),
+        int(np.ceil(width * scale / stride) * stride),
+    )
+
+
+class OnnxYoloDetector:
+    """
+    Runs an ultralytics YOLOv8 ONNX export with ONNX Runtime: letterbox,
+    one session run, then confidence filtering and class-aware NMS. A
+    dynamic-axes export takes rectangular inputs (e.g. the ROI band).
+    """
+
+    def __init__(self, path, threads=INFERENCE_THREADS):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(
+            str(path), sess_options=options, providers=["CPUExecutionProvider"]
+        )
+
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        height, width = model_input.shape[2:4]
+        # Static exports have a fixed square input; dynamic ones report names
+        self.fixed_shape = (height, width) if isinstance(height, int) and isinstance(width, int) else None
+
+    def detect(self, image, imgsz=None):
+        shape = self.fixed_shape or input_shape(image.shape, imgsz or YOLO_IMGSZ)
+        padded, scale, (pad_x, pad_y) = letterbox(image, shape)
+
+        blob = cv2.dnn.blobFromImage(padded, 1 / 255.0, swapRB=True)
+        output = self.session.run(None, {self.input_name: blob})[0][0].T
+
+        scores = output[:, 4:]
+        classes = scores.argmax(axis=1)
+        confidences = scores[np.arange(len(scores)), classes]
+        keep = confidences >= YOLO_CONF_THRESHOLD
+        if not keep.any():
+            return []
+
+        output, classes, confidences = output[keep], classes[keep], confidences[keep]
+        cx, cy, w, h = output[:, 0], output[:, 1], output[:, 2], output[:, 3]
+        boxes = np.stack([
+            (cx - w / 2 - pad_x) / scale,
+            (cy - h / 2 - pad_y) / scale,
+            (cx + w / 2 - pad_x) / scale,
+            (cy + h / 2 - pad_y) / scale,
+        ], axis=1)
+
+        # Class-aware NMS in one call: shift each class into its own region
+        offsets = classes[:, None] * 4096.0
+        shifted = boxes + offsets
+        rects = np.column_stack([shifted[:, :2], shifted[:, 2:] - shifted[:, :2]])
+        kept = cv2.dnn.NMSBoxes(
+            rects.tolist(), confidences.tolist(), YOLO_CONF_THRESHOLD, YOLO_IOU_THRESHOLD
+        )
+
+        height, width = image.shape[:2]
+        detections = []
+        for index in np.array(kept).flatten():
+            x1, y1, x2, y2 = boxes[index]
+            detections.append((
+                (
+                    int(np.clip(x1, 0, width)), int(np.clip(y1, 0, height)),
+                    int(np.clip(x2, 0, width)), int(np.clip(y2, 0, height)),
+                ),
+                int(classes[index]),
+                float(confidences[index]),
+            ))
+        return detections
+
+
+def warm_up_yolo(detector, shape=(YOLO_IMGSZ, YOLO_IMGSZ), imgsz=None):
+    """One inference on a blank frame of the given (h, w)."""
+    detector.detect(np.zeros((*shape, 3), dtype=np.uint8), imgsz=imgsz)
+
+
+def load_yolo(backend):
+    path = YOLO_MODELS[backend]
+    if backend == "pytorch":
+        return UltralyticsYoloDetector(path)
+
+    if not Path(path).exists():
+        raise FileNotFoundError(f"{path} not found. Run: python -m cv_module.model_export")
+    return OnnxYoloDetector(path)
+
+
+# =========================================================
+# EXEMPTION CNN
+# =========================================================
+def cnn_input_batch(crops):
+    return np.stack(
+        [cv2.resize(crop, CNN_INPUT_SIZE) for crop in crops]
+    ).astype(np.float32) / 255.0
+
+
+def keras_softmax_function(cnn_model):
+    """
+    The exemption CNN as a compiled tf.function with a dynamic batch
+    dimension, so one traced graph serves any number of crops. Also the
+    graph that is exported to TFLite.
+    """
+    import tensorflow as tf
+
+    @tf.function(
+        input_signature=[tf.TensorSpec(shape=(None, *CNN_INPUT_SIZE, 3), dtype=tf.float32)]
+    )
+    def predict(batch):
+        return tf.nn.softmax(cnn_model(batch, training=False), axis=-1)
+
+    return predict
+
+
+def keras_predictor(path):
+    import tensorflow as tf
+
+    predict = keras_softmax_function(tf.keras.models.load_model(path))
+    return lambda batch: predict(tf.constant(batch)).numpy()
+
+
+def tflite_interpreter_class():
+    """The lightest TFLite interpreter installed; full TensorFlow last."""
+    try:
+        from ai_edge_litert.interpreter import Interpreter
+    except ImportError:
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            import tensorflow as tf
+
+            Interpreter = tf.lite.Interpreter
+    return Interpreter
+
+
+class TfliteClassifier:
+    """Not thread-safe: call from one thread (the classify stage)."""
+
+    def __init__(self, path, threads=INFERENCE_THREADS):
+        Interpreter = tflite_interpreter_class()
+        self.interpreter = Interpreter(model_path=str(path), num_threads=threads or None)
+        self.input_index = self.interpreter.get_input_details()[0]["index"]
+        self.output_index = self.interpreter.get_output_details()[0]["index"]
+        self.batch_shape = None
+
+    def __call__(self, batch):
+        if batch.shape != self.batch_shape:
+            self.interpreter.resize_tensor_input(self.input_index, batch.shape)
+            self.interpreter.allocate_tensors()
+            self.batch_shape = batch.shape
+
+        self.interpreter.set_tensor(self.input_index, batch)
+        self.interpreter.invoke()
+        return self.interpreter.get_tensor(self.output_index).copy()
+
+
+def warm_up_cnn(predict):
+    """Traces the Keras graph / allocates the TFLite tensors for one crop."""
+    predict(np.zeros((1, *CNN_INPUT_SIZE, 3), dtype=np.float32))
+
+
+def load_cnn(backend):
+    path = CNN_MODELS[backend]
+    if not Path(path).exists():
+        hint = "" if backend == "keras" else " Run: python -m cv_module.model_export"
+        raise FileNotFoundError(f"{path} not found.{hint}")
+
+    if backend == "keras":
+        return keras_predictor(path)
+    return TfliteClassifier(path)
@@ -0,0 +1,194 @@
+# cv_module/metrics.py
+"""
+Low-overhead detector metrics: latency histograms, counters and gauges,
+rendered as Prometheus text (served on /metrics) and as a JSON summary
+(logged periodically and served on /metrics.json).
+
+Histograms use fixed buckets, so an observation is one bisect and a
+locked increment (about a microsecond). Quantiles in the JSON summary
+are interpolated from the buckets. Gauges and some counters are callbacks
+read at scrape time, so they cost nothing between scrapes.
+"""
+from bisect import bisect_left
+from contextlib import contextmanager
+import threading
+import time
+
+# Upper bounds in seconds; +Inf is implicit
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+FAMILIES = {
+    "itms_stage_seconds": ("histogram", "Time a pipeline stage spends on one item."),
+    "itms_step_seconds": ("histogram", "Latency of one processing step."),
+    "itms_frame_age_seconds": ("histogram", "Age of a frame when its detection finished."),
+    "itms_event_seconds": ("histogram", "Line crossing to violation logged."),
+    "itms_frames_captured_total": ("counter", "Frames read from the source."),
+    "itms_frames_detected_total": ("counter", "Frames YOLO ran on."),
+    "itms_frames_dropped_total": ("counter", "Items dropped by a full pipeline queue."),
+    "itms_events_triggered_total": ("counter", "Line crossings that started an evidence clip."),
+    "itms_events_logged_total": ("counter", "Violations written to the database."),
+    "itms_ocr_calls_total": ("counter", "OCR passes over vehicle crops."),
+    "itms_ring_stalls_total": ("counter", "Times capture waited for a ring slot held by a packet."),
+    "itms_ring_spills_total": ("counter", "Pinned clip frames copied aside so their slot could be reused."),
+    "itms_ring_forced_overwrites_total": ("counter", "Held ring slots overwritten after the stall timeout."),
+    "itms_events_queued": ("gauge", "Events waiting for post-event frames or the evidence stage."),
+    "itms_queue_depth": ("gauge", "Items waiting in a pipeline queue."),
+}
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        index = bisect_left(self.buckets, seconds)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += seconds
+            self.count += 1
+
+    def snapshot(self):
+        with self._lock:
+            return list(self.counts), self.sum, self.count
+
+    def quantile(self, q, counts=None, count=None):
+        if counts is None:
+            counts, _, count = self.snapshot()
+        if not count:
+            return 0.0
+
+        rank = q * count
+        cumulative = 0
+        for index, bucket_count in enumerate(counts):
+            if cumulative + bucket_count >= rank and bucket_count:
+                if index == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[index - 1] if index else 0.0
+                upper = self.buckets[index]
+                return lower + (upper - lower) * (rank - cumulative) / bucket_count
+            cumulative += bucket_count
+        return self.buckets[-1]
+
+
+class Counter:
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    escaped = (
+        (key, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for key, value in labels.items()
+    )
+    return "{" + ",".join(f'{key}="{value}"' for key, value in escaped) + "}"
+
+
+class MetricsRegistry:
+    def __init__(self, labels=None):
+        """labels: added to every series, e.g. {"camera": "north"}."""
+        self.labels = dict(labels or {})
+        self._series = {}      # (family, label items) -> Histogram | Counter | callable
+        self._lock = threading.Lock()
+
+    def _get(self, family, factory, labels):
+        key = (family, tuple(sorted(labels.items())))
+        series = self._series.get(key)
+        if series is None:
+            with self._lock:
+                series = self._series.setdefault(key, factory())
+        return series
+
+    def histogram(self, family, **labels):
+        return self._get(family, Histogram, labels)
+
+    def counter(self, family, **labels):
+        return self._get(family, Counter, labels)
+
+    def callback(self, family, fn, **labels):
+        """A counter or gauge whose value fn() is read at scrape time."""
+        with self._lock:
+            self._series[(family, tuple(sorted(labels.items())))] = fn
+
+    @contextmanager
+    def time(self, step):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.histogram("itms_step_seconds", step=step).observe(time.perf_counter() - started)
+
+    def _grouped(self):
+        with self._lock:
+            items = list(self._series.items())
+
+        grouped = {}
+        for (family, label_items), series in items:
+            grouped.setdefault(family, []).append(({**self.labels, **dict(label_items)}, series))
+        return grouped
+
+    def prometheus_text(self):
+        lines = []
+        for family, series_list in sorted(self._grouped().items()):
+            kind, help_text = FAMILIES.get(family, ("untyped", ""))
+            lines.append(f"# HELP {family} {help_text}")
+            lines.append(f"# TYPE {family} {kind}")
+
+            for labels, series in series_list:
+                if isinstance(series, Histogram):
+                    counts, total, count = series.snapshot()
+                    cumulative = 0
+                    for bound, bucket_count in zip(series.buckets + ("+Inf",), counts):
+                        cumulative += bucket_count
+                        lines.append(
+                            f"{family}_bucket{format_labels({**labels, 'le': bound})} {cumulative}"
+                        )
+                    lines.append(f"{family}_sum{format_labels(labels)} {total:.6f}")
+                    lines.append(f"{family}_count{format_labels(labels)} {count}")
+                elif isinstance(series, Counter):
+                    lines.append(f"{family}{format_labels(labels)} {series.value}")
+                else:
+                    lines.append(f"{family}{format_labels(labels)} {series()}")
+
+        return "\n".join(lines) + "\n"
+
+    def summary(self):
+        """
+        {"labels", "latency": {family: {label: {count, meanMs, p50Ms, p95Ms,
+        p99Ms}}}, "values": {family: {label: value}}}. Series are keyed by
+        their own label values, joined with "/".
+        """
+        latency = {}
+        values = {}
+
+        for family, series_list in sorted(self._grouped().items()):
+            for labels, series in series_list:
+                own = {key: value for key, value in labels.items() if key not in self.labels}
+                name = "/".join(str(value) for value in own.values()) or "all"
+
+                if isinstance(series, Histogram):
+                    counts, total, count = series.snapshot()
+                    latency.setdefault(family, {})[name] = {
+                        "count": count,
+                        "meanMs": round(total * 1000 / count, 2) if count else 0.0,
+                        "p50Ms": round(series.quantile(0.5, counts, count) * 1000, 2),
+                        "p95Ms": round(series.quantile(0.95, counts, count) * 1000, 2),
+                        "p99Ms": round(series.quantile(0.99, counts, count) * 1000, 2),
+                    }
+                else:
+                    value = series.value if isinstance(series, Counter) else series()
+                    values.setdefault(family, {})[name] = value
+
+        return {"labels": self.labels, "latency": latency, "values": values}
@@ -0,0 +1,135 @@
+# cv_module/mjpeg_avi.py
+"""
+Writes already-encoded JPEG frames into an MJPG AVI container without
+decoding them. This produces the same kind of file cv2.VideoWriter writes
+with the MJPG fourcc, but skips the per-frame re-encode.
+"""
+import struct
+
+AVIF_HASINDEX = 0x10
+AVIIF_KEYFRAME = 0x10
+
+# SOFn markers carry the frame size; C4 (DHT), C8 (JPG) and CC (DAC) do not
+_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def jpeg_dimensions(data):
+    """Returns (width, height) from a JPEG's SOF header."""
+    if data[:2] != b"\xff\xd8":
+        raise ValueError("Not a JPEG image")
+
+    pos = 2
+    while pos + 4 <= len(data):
+        if data[pos] != 0xFF:
+            raise ValueError("Corrupt JPEG marker stream")
+
+        marker = data[pos + 1]
+        if marker == 0xFF:
+            pos += 1
+            continue
+
+        length = struct.unpack(">H", data[pos + 2:pos + 4])[0]
+        if marker in _SOF_MARKERS:
+            height, width = struct.unpack(">HH", data[pos + 5:pos + 9])
+            return width, height
+
+        pos += 2 + length
+
+    raise ValueError("JPEG has no SOF header")
+
+
+def _chunk(fourcc, payload):
+    pad = b"\x00" if len(payload) % 2 else b""
+    return fourcc + struct.pack("<I", len(payload)) + payload + pad
+
+
+def _list(list_type, payload):
+    return b"LIST" + struct.pack("<I", len(payload) + 4) + list_type + payload
+
+
+def write_mjpeg_avi(jpeg_frames, output_path, fps, frame_size=None):
+    """
+    Muxes JPEG byte strings into an AVI at output_path.
+    frame_size=(width, height) is read from the first frame when omitted.
+    """
+    if not jpeg_frames:
+        raise ValueError("No frames to write")
+
+    width, height = frame_size or jpeg_dimensions(jpeg_frames[0])
+    frame_count = len(jpeg_frames)
+    max_frame = max(len(frame) for frame in jpeg_frames)
+
+    # Integer rate/scale keeps fractional rates such as 29.97 exact enough
+    scale = 1000
+    rate = int(round(fps * scale))
+
+    avih = struct.pack(
+        "<10I4I",
+        int(round(1_000_000 / fps)),   # microseconds per frame
+        int(max_frame * fps),          # max bytes per second
+        0,                             # padding granularity
+        AVIF_HASINDEX,
+        frame_count,
+        0,                             # initial frames
+        1,                             # streams
+        max_frame,                     # suggested buffer size
+        width,
+        height,
+        0, 0, 0, 0,
+    )
+
+    strh = struct.pack(
+        "<4s4sIHHIIIIIIiI4h",
+        b"vids",
+        b"MJPG",
+        0,             # flags
+        0,             # priority
+        0,             # language
+        0,             # initial frames
+        scale,
+        rate,
+        0,             # start
+        frame_count,
+        max_frame,
+        -1,            # quality: driver default
+        0,             # sample size: varies per frame
+        0, 0, width, height,
+    )
+
+    strf = struct.pack(
+        "<IiiHH4sIiiII",
+        40,            # BITMAPINFOHEADER size
+        width,
+        height,
+        1,             # planes
+        24,            # bit count
+        b"MJPG",
+        width * height * 3,
+        0, 0, 0, 0,
+    )
+
+    hdrl = _list(
+        b"hdrl",
+        _chunk(b"avih", avih) + _list(b"strl", _chunk(b"strh", strh) + _chunk(b"strf", strf)),
+    )
+
+    # idx1 offsets are relative to the 'movi' fourcc
+    index_entries = []
+    offset = 4
+    movi_size = 4
+    for frame in jpeg_frames:
+        index_entries.append(struct.pack("<4sIII", b"00dc", AVIIF_KEYFRAME, offset, len(frame)))
+        chunk_size = 8 + len(frame) + (len(frame) % 2)
+        offset += chunk_size
+        movi_size += chunk_size
+
+    idx1 = _chunk(b"idx1", b"".join(index_entries))
+    riff_size = 4 + len(hdrl) + 8 + movi_size + len(idx1)
+
+    with open(output_path, "wb") as f:
+        f.write(b"RIFF" + struct.pack("<I", riff_size) + b"AVI ")
+        f.write(hdrl)
+        f.write(b"LIST" + struct.pack("<I", movi_size) + b"movi")
+        for frame in jpeg_frames:
+            f.write(_chunk(b"00dc", bytes(frame)))
+        f.write(idx1)
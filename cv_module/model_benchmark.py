@@ -0,0 +1,210 @@
+# cv_module/model_benchmark.py
+"""
+Accuracy/latency comparison of the inference backends on sample crops.
+
+Every backend whose model file exists is run over the images in the
+samples directory (see cv_module/model_export.py) and compared with the
+reference backend (pytorch for YOLO, keras for the CNN):
+
+  CNN   per-crop and batched latency, top-1 agreement with keras, largest
+        probability difference, and accuracy when labels.csv holds
+        "filename,class" rows (class as in inference_backends.CNN_CLASSES)
+  YOLO  per-image latency, box count, and F1 of same-class IoU >= 0.5
+        matches against pytorch
+
+Run from the directory the detector runs in:
+    python -m cv_module.model_benchmark [samples_dir]
+"""
+import csv
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from cv_module.inference_backends import (
+    CNN_CLASSES,
+    CNN_MODELS,
+    YOLO_MODELS,
+    cnn_input_batch,
+    load_cnn,
+    load_yolo,
+)
+from cv_module.model_export import SAMPLES_DIR, load_sample_images
+from cv_module.tracker import iou
+
+CNN_BATCH_SIZE = 8
+MATCH_IOU = 0.5
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(int(round(pct / 100 * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def latency_summary(latencies):
+    latencies = sorted(latencies)
+    return {
+        "mean": round(sum(latencies) / len(latencies), 2),
+        "p50": round(percentile(latencies, 50), 2),
+        "p95": round(percentile(latencies, 95), 2),
+    }
+
+
+def timed_ms(fn, *args, **kwargs):
+    started = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, (time.perf_counter() - started) * 1000
+
+
+def load_labels(samples_dir):
+    labels_path = Path(samples_dir) / "labels.csv"
+    if not labels_path.exists():
+        return {}
+
+    labels = {}
+    with open(labels_path, newline="") as f:
+        for row in csv.reader(f):
+            if len(row) >= 2 and row[1].strip() in CNN_CLASSES:
+                labels[row[0].strip()] = CNN_CLASSES.index(row[1].strip())
+    return labels
+
+
+# =========================================================
+# CNN
+# =========================================================
+def run_cnn(predict, crops):
+    batches = [cnn_input_batch([crop]) for crop in crops]
+    predict(batches[0])   # warm-up (graph tracing / tensor allocation)
+
+    probabilities = []
+    single = []
+    for batch in batches:
+        scores, elapsed = timed_ms(predict, batch)
+        probabilities.append(scores[0])
+        single.append(elapsed)
+
+    batched = []
+    for start in range(0, len(crops), CNN_BATCH_SIZE):
+        chunk = cnn_input_batch(crops[start:start + CNN_BATCH_SIZE])
+        _, elapsed = timed_ms(predict, chunk)
+        batched.append(elapsed / len(chunk))
+
+    return np.stack(probabilities), {
+        "latencyMsPerCrop": latency_summary(single),
+        "batchedMsPerCrop": round(sum(batched) / len(batched), 2),
+    }
+
+
+def compare_cnn(samples, labels):
+    names = [name for name, _ in samples]
+    crops = [image for _, image in samples]
+
+    results = {}
+    reference = None
+
+    for backend in CNN_MODELS:
+        try:
+            predict = load_cnn(backend)
+        except (FileNotFoundError, ImportError) as e:
+            results[backend] = {"skipped": str(e)}
+            continue
+
+        probabilities, result = run_cnn(predict, crops)
+        predicted = probabilities.argmax(axis=1)
+
+        if backend == "keras":
+            reference = probabilities
+        elif reference is not None:
+            result["top1AgreementWithKeras"] = round(
+                float((predicted == reference.argmax(axis=1)).mean()), 3
+            )
+            result["maxProbabilityDiff"] = round(float(np.abs(probabilities - reference).max()), 4)
+
+        labelled = [(index, labels[name]) for index, name in enumerate(names) if name in labels]
+        if labelled:
+            result["accuracy"] = round(
+                sum(predicted[index] == label for index, label in labelled) / len(labelled), 3
+            )
+        results[backend] = result
+
+    return results
+
+
+# =========================================================
+# YOLO
+# =========================================================
+def match_f1(boxes, reference):
+    """F1 of greedy same-class IoU >= MATCH_IOU matches against reference."""
+    if not boxes and not reference:
+        return 1.0
+
+    unmatched = list(reference)
+    matched = 0
+    for bbox, cls, _ in sorted(boxes, key=lambda box: box[2], reverse=True):
+        best = max(
+            (ref for ref in unmatched if ref[1] == cls),
+            key=lambda ref: iou(bbox, ref[0]),
+            default=None,
+        )
+        if best is not None and iou(bbox, best[0]) >= MATCH_IOU:
+            unmatched.remove(best)
+            matched += 1
+
+    return 2 * matched / (len(boxes) + len(reference))
+
+
+def compare_yolo(samples):
+    images = [image for _, image in samples]
+
+    results = {}
+    reference = None
+
+    for backend in YOLO_MODELS:
+        try:
+            detector = load_yolo(backend)
+        except (FileNotFoundError, ImportError) as e:
+            results[backend] = {"skipped": str(e)}
+            continue
+
+        detector.detect(images[0])   # warm-up
+
+        outputs = []
+        latencies = []
+        for image in images:
+            boxes, elapsed = timed_ms(detector.detect, image)
+            outputs.append(boxes)
+            latencies.append(elapsed)
+
+        result = {
+            "latencyMsPerImage": latency_summary(latencies),
+            "boxes": sum(len(boxes) for boxes in outputs),
+        }
+        if backend == "pytorch":
+            reference = outputs
+        elif reference is not None:
+            result["f1VsPytorch"] = round(
+                sum(match_f1(boxes, ref) for boxes, ref in zip(outputs, reference)) / len(images), 3
+            )
+        results[backend] = result
+
+    return results
+
+
+def run_benchmark(samples_dir=SAMPLES_DIR):
+    samples = load_sample_images(samples_dir)
+    if not samples:
+        raise RuntimeError(f"No sample images in {samples_dir}")
+
+    return {
+        "samples": len(samples),
+        "cnn": compare_cnn(samples, load_labels(samples_dir)),
+        "yolo": compare_yolo(samples),
+    }
+
+
+if __name__ == "__main__":
+    print(json.dumps(run_benchmark(sys.argv[1] if len(sys.argv) > 1 else SAMPLES_DIR), indent=2))
@@ -0,0 +1,134 @@
+# cv_module/model_export.py
+"""
+Exports the detector models for the ONNX Runtime / TFLite backends in
+cv_module/inference_backends.py:
+
+  yolov8n.pt                 -> yolov8n.onnx (dynamic input size)
+                                yolov8n_int8.onnx (dynamic int8 weights)
+  zimbabwe_traffic_model.h5  -> zimbabwe_traffic_model.tflite
+                                zimbabwe_traffic_model_int8.tflite
+
+The int8 TFLite model is calibrated on the crops in the samples directory
+(any images OpenCV reads, e.g. cv_module/sample_crops); without samples
+only its weights are quantized.
+
+Run from the directory the detector runs in:
+    python -m cv_module.model_export [samples_dir]
+"""
+import json
+import shutil
+import sys
+from pathlib import Path
+
+import cv2
+
+from cv_module.inference_backends import (
+    CNN_MODELS,
+    YOLO_IMGSZ,
+    YOLO_MODELS,
+    cnn_input_batch,
+    keras_softmax_function,
+)
+
+BASE_DIR = Path(__file__).resolve().parent
+SAMPLES_DIR = BASE_DIR / "sample_crops"
+
+MAX_CALIBRATION_CROPS = 200
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".bmp"}
+
+
+def load_sample_images(samples_dir, limit=None):
+    """[(filename, BGR image)] for the images in samples_dir, by name."""
+    samples_dir = Path(samples_dir)
+    if not samples_dir.is_dir():
+        return []
+
+    images = []
+    for path in sorted(samples_dir.iterdir()):
+        if path.suffix.lower() not in IMAGE_SUFFIXES:
+            continue
+        image = cv2.imread(str(path))
+        if image is None:
+            print(f"⚠️ Skipping unreadable sample: {path.name}")
+            continue
+        images.append((path.name, image))
+        if limit and len(images) >= limit:
+            break
+    return images
+
+
+def export_yolo_onnx(weights=YOLO_MODELS["pytorch"], output_path=YOLO_MODELS["onnx"]):
+    from ultralytics import YOLO
+
+    YOLO(weights).export(format="onnx", imgsz=YOLO_IMGSZ, dynamic=True)
+
+    # ultralytics writes the export next to the weights
+    exported = Path(weights).with_suffix(".onnx")
+    if exported.resolve() != Path(output_path).resolve():
+        shutil.move(str(exported), output_path)
+    return output_path
+
+
+def quantize_yolo_onnx(input_path=YOLO_MODELS["onnx"], output_path=YOLO_MODELS["onnx-int8"]):
+    """
+    Dynamic quantization: int8 weights, activations quantized per run.
+    Needs no calibration set.
+    """
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    quantize_dynamic(str(input_path), str(output_path), weight_type=QuantType.QUInt8)
+    return output_path
+
+
+def export_cnn_tflite(keras_path=CNN_MODELS["keras"], output_path=CNN_MODELS["tflite"],
+                      int8=False, calibration_crops=None):
+    """
+    Converts the softmax-wrapped CNN graph. With int8, weights and (given
+    calibration crops) activations are quantized; input and output stay
+    float32 so callers are unchanged.
+    """
+    import tensorflow as tf
+
+    cnn_model = tf.keras.models.load_model(keras_path)
+    predict = keras_softmax_function(cnn_model)
+
+    converter = tf.lite.TFLiteConverter.from_concrete_functions(
+        [predict.get_concrete_function()], cnn_model
+    )
+
+    if int8:
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        if calibration_crops:
+            converter.representative_dataset = lambda: (
+                [cnn_input_batch([crop])] for crop in calibration_crops
+            )
+
+    Path(output_path).write_bytes(converter.convert())
+    return output_path
+
+
+def export_all(samples_dir=SAMPLES_DIR):
+    crops = [image for _, image in load_sample_images(samples_dir, MAX_CALIBRATION_CROPS)]
+    if not crops:
+        print(f"⚠️ No calibration crops in {samples_dir}. The int8 CNN gets weight-only quantization.")
+
+    exported = {}
+
+    print("... Exporting YOLO to ONNX ...")
+    exported["onnx"] = export_yolo_onnx()
+    exported["onnx-int8"] = quantize_yolo_onnx()
+
+    print("... Exporting exemption CNN to TFLite ...")
+    exported["tflite"] = export_cnn_tflite()
+    exported["tflite-int8"] = export_cnn_tflite(
+        output_path=CNN_MODELS["tflite-int8"], int8=True, calibration_crops=crops
+    )
+
+    return {
+        backend: {"path": str(path), "bytes": Path(path).stat().st_size}
+        for backend, path in exported.items()
+    }
+
+
+if __name__ == "__main__":
+    print(json.dumps(export_all(sys.argv[1] if len(sys.argv) > 1 else SAMPLES_DIR), indent=2))
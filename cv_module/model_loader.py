@@ -0,0 +1,82 @@
+# cv_module/model_loader.py
+"""
+Background model loading and a startup-time breakdown for the detector.
+
+Each model is imported, loaded and warmed up on its own thread while the
+camera opens and capture starts buffering; stages call get() and only
+wait for the model they need. Most load time is spent in native code
+(file I/O, graph building) that releases the GIL, so the loads overlap.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+
+
+class StartupTimer:
+    def __init__(self, started=None):
+        """started: time.perf_counter() at process start, if known."""
+        self.started = started if started is not None else time.perf_counter()
+        self.durations = []    # [(phase, seconds)]
+        self.milestones = []   # [(milestone, seconds since start)]
+        self.reported = False
+        self._lock = threading.Lock()
+
+    def record(self, phase, seconds):
+        with self._lock:
+            self.durations.append((phase, seconds))
+
+    def mark(self, milestone):
+        """Records the first time a milestone is reached."""
+        with self._lock:
+            if milestone not in (name for name, _ in self.milestones):
+                self.milestones.append((milestone, time.perf_counter() - self.started))
+
+    def report_once(self):
+        with self._lock:
+            if self.reported:
+                return
+            self.reported = True
+            durations = list(self.durations)
+            milestones = list(self.milestones)
+
+        parts = [f"{phase} {seconds:.2f}s" for phase, seconds in durations]
+        parts += [f"{milestone} at {seconds:.2f}s" for milestone, seconds in milestones]
+        print("⏱️ Startup: " + " | ".join(parts))
+
+
+class BackgroundLoader:
+    def __init__(self, loaders, timer):
+        """
+        loaders: {name: (load, warm_up)}. load() returns the model;
+        warm_up(model) runs one inference on dummy input, or is None.
+        """
+        self.timer = timer
+        executor = ThreadPoolExecutor(max_workers=len(loaders), thread_name_prefix="itms-load")
+        self._futures = {
+            name: executor.submit(self._load, name, load, warm_up)
+            for name, (load, warm_up) in loaders.items()
+        }
+        executor.shutdown(wait=False)
+
+    def _load(self, name, load, warm_up):
+        started = time.perf_counter()
+        model = load()
+        self.timer.record(f"{name} load", time.perf_counter() - started)
+
+        if warm_up is not None:
+            started = time.perf_counter()
+            warm_up(model)
+            self.timer.record(f"{name} warm-up", time.perf_counter() - started)
+
+        print(f"✅ {name} ready")
+        return model
+
+    def get(self, name):
+        """Waits for one model; raises if it failed to load."""
+        return self._futures[name].result()
+
+    def wait(self):
+        """Waits for all models; raises the first failure."""
+        for name in self._futures:
+            self.get(name)
+        self.timer.mark("models ready")
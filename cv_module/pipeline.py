@@ -0,0 +1,180 @@
+# cv_module/pipeline.py
+"""
+Threaded stage pipeline for the detector: bounded queues between worker
+threads, a drop policy for stages that must never stall, and per-stage
+throughput counters.
+"""
+import queue
+import threading
+import time
+
+# Passed down the pipeline to shut each stage down in order
+STOP = object()
+
+DROP_OLDEST = "drop_oldest"   # make room by discarding the oldest item
+DROP_NEWEST = "drop_newest"   # discard the incoming item
+BLOCK = "block"               # wait for room (backpressure)
+
+
+class StageQueue:
+    """
+    Bounded queue with an explicit overflow policy. STOP is always
+    delivered, whatever the policy. `on_drop(item)` is called for every
+    discarded item so it can release what it holds.
+    """
+
+    def __init__(self, name, maxsize, policy=BLOCK, on_drop=None):
+        if policy not in (DROP_OLDEST, DROP_NEWEST, BLOCK):
+            raise ValueError(f"Unknown drop policy: {policy}")
+
+        self.name = name
+        self.policy = policy
+        self.on_drop = on_drop
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def put(self, item):
+        """Returns False when the item (or an older one) was dropped."""
+        if item is STOP or self.policy == BLOCK:
+            self._queue.put(item)
+            return True
+
+        try:
+            self._queue.put_nowait(item)
+            return True
+        except queue.Full:
+            pass
+
+        with self._lock:
+            self.dropped += 1
+
+        if self.policy == DROP_NEWEST:
+            self._dropped(item)
+            return False
+
+        # DROP_OLDEST: evict one item and retry once; a concurrent consumer
+        # may already have made room
+        try:
+            evicted = self._queue.get_nowait()
+            if evicted is STOP:
+                self._queue.put(evicted)
+                self._dropped(item)
+                return False
+            self._dropped(evicted)
+        except queue.Empty:
+            pass
+
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self._dropped(item)
+        return False
+
+    def _dropped(self, item):
+        if self.on_drop is not None:
+            self.on_drop(item)
+
+    def get(self, timeout=None):
+        return self._queue.get(timeout=timeout)
+
+    def depth(self):
+        return self._queue.qsize()
+
+
+class StageStats:
+    def __init__(self, name, histogram=None):
+        """histogram: optional metrics Histogram that also gets every timing."""
+        self.name = name
+        self.histogram = histogram
+        self.processed = 0
+        self.busy_seconds = 0.0
+        self._lock = threading.Lock()
+        self._window_start = time.perf_counter()
+        self._window_processed = 0
+
+    def record(self, seconds):
+        with self._lock:
+            self.processed += 1
+            self._window_processed += 1
+            self.busy_seconds += seconds
+        if self.histogram is not None:
+            self.histogram.observe(seconds)
+
+    def snapshot(self):
+        """Totals plus the rate since the previous snapshot."""
+        with self._lock:
+            now = time.perf_counter()
+            elapsed = now - self._window_start
+            rate = self._window_processed / elapsed if elapsed > 0 else 0.0
+            self._window_start = now
+            self._window_processed = 0
+
+            return {
+                "stage": self.name,
+                "processed": self.processed,
+                "perSecond": round(rate, 2),
+                "avgMs": round(self.busy_seconds * 1000 / self.processed, 2) if self.processed else 0.0,
+            }
+
+
+class Stage(threading.Thread):
+    """
+    Pulls items from `inbox`, runs `handler(item)` and forwards any
+    non-None result to `outbox`. If the handler raises, `on_drop(item)`
+    is called. On STOP it calls `on_stop` (if given), forwards STOP and
+    exits.
+    """
+
+    def __init__(self, name, handler, inbox, outbox=None, on_stop=None, on_drop=None,
+                 histogram=None):
+        super().__init__(name=f"itms-{name}", daemon=True)
+        self.handler = handler
+        self.inbox = inbox
+        self.outbox = outbox
+        self.on_stop = on_stop
+        self.on_drop = on_drop
+        self.stats = StageStats(name, histogram)
+        self.error = None
+
+    def run(self):
+        try:
+            while True:
+                item = self.inbox.get()
+                if item is STOP:
+                    break
+
+                started = time.perf_counter()
+                try:
+                    result = self.handler(item)
+                except Exception as e:
+                    # One bad frame or event must not take the stage down
+                    print(f"❌ Stage '{self.stats.name}' error: {e}")
+                    result = None
+                    if self.on_drop is not None:
+                        self.on_drop(item)
+                self.stats.record(time.perf_counter() - started)
+
+                if result is not None and self.outbox is not None:
+                    self.outbox.put(result)
+
+            if self.on_stop is not None:
+                self.on_stop()
+
+        except Exception as e:
+            self.error = e
+            print(f"❌ Stage '{self.stats.name}' stopped: {e}")
+
+        finally:
+            if self.outbox is not None:
+                self.outbox.put(STOP)
+
+
+def format_pipeline_report(snapshots, queues):
+    """snapshots: StageStats.snapshot() dicts, taken once per report."""
+    parts = [
+        f"{s['stage']}={s['perSecond']:.1f}/s ({s['avgMs']:.1f}ms)"
+        for s in snapshots
+    ]
+    depths = [f"{q.name}={q.depth()}" + (f" drop={q.dropped}" if q.dropped else "") for q in queues]
+    return "📊 " + " | ".join(parts) + " || queues: " + ", ".join(depths)
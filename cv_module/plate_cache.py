@@ -0,0 +1,169 @@
+# cv_module/plate_cache.py
+"""
+Per-track OCR and classification cache.
+
+While a track is alive the detect stage offers its crop each frame and the
+cache keeps only the few best ones (sharp and large). When a violation
+needs the plate, OCR runs once on those crops and the normalized strings
+are voted on, weighted by OCR confidence. The result is stored under the
+track ID; the entry is evicted when the track dies, or after its plate is
+resolved if an event still needed it.
+"""
+import threading
+
+import cv2
+
+OCR_MAX_READS_PER_TRACK = 3
+MIN_OCR_CROP_AREA = 40 * 40
+
+
+def crop_score(crop):
+    """Sharpness (variance of the Laplacian) weighted by the crop's size."""
+    gray = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY)
+    sharpness = cv2.Laplacian(gray, cv2.CV_64F).var()
+    return sharpness * (crop.shape[0] * crop.shape[1]) ** 0.5
+
+
+def vote_plate(reads):
+    """
+    reads: [(normalized_text, confidence), ...]. Returns (text, support)
+    where support is the winner's share of the total confidence, or
+    ("UNKNOWN", 0.0) when nothing was read.
+    """
+    totals = {}
+    for text, confidence in reads:
+        if text and text != "UNKNOWN":
+            totals[text] = totals.get(text, 0.0) + max(confidence, 0.0)
+
+    if not totals:
+        return "UNKNOWN", 0.0
+
+    winner = max(totals, key=totals.get)
+    total = sum(totals.values())
+    return winner, (totals[winner] / total if total else 0.0)
+
+
+class _Entry:
+    __slots__ = ("candidates", "claimed", "dead", "plate", "support", "classification")
+
+    def __init__(self):
+        self.candidates = []      # [(score, crop)], best first
+        self.claimed = False      # an event is waiting for this plate
+        self.dead = False
+        self.plate = None
+        self.support = 0.0
+        self.classification = None
+
+
+class TrackPlateCache:
+    def __init__(self, read_plate, max_reads=OCR_MAX_READS_PER_TRACK, min_area=MIN_OCR_CROP_AREA):
+        """
+        read_plate(crop) -> (normalized_text, confidence) or None; one OCR call.
+        """
+        self.read_plate = read_plate
+        self.max_reads = max_reads
+        self.min_area = min_area
+
+        self._entries = {}
+        self._lock = threading.Lock()
+
+        self.ocr_calls = 0
+        self.resolved = 0
+
+    def offer(self, track_id, crop):
+        """Keeps the crop if it is among the track's best. Detect-stage thread."""
+        if crop.shape[0] * crop.shape[1] < self.min_area:
+            return
+
+        with self._lock:
+            entry = self._entries.get(track_id)
+            if entry is None:
+                entry = self._entries[track_id] = _Entry()
+            elif entry.plate is not None:
+                return
+            worst = entry.candidates[-1][0] if len(entry.candidates) >= self.max_reads else None
+
+        score = crop_score(crop)
+        if worst is not None and score <= worst:
+            return
+
+        # Crops are views into ring slots that will be reused
+        crop = crop.copy()
+
+        with self._lock:
+            if entry.plate is not None:
+                return
+            entry.candidates.append((score, crop))
+            entry.candidates.sort(key=lambda candidate: candidate[0], reverse=True)
+            del entry.candidates[self.max_reads:]
+
+    def claim(self, track_id):
+        """Marks that an event needs this track's plate, so eviction waits."""
+        with self._lock:
+            entry = self._entries.get(track_id)
+            if entry is None:
+                entry = self._entries[track_id] = _Entry()
+            entry.claimed = True
+
+    def set_classification(self, track_id, pred_class, confidence):
+        with self._lock:
+            entry = self._entries.get(track_id)
+            if entry is not None:
+                entry.classification = (pred_class, confidence)
+
+    def classification(self, track_id):
+        with self._lock:
+            entry = self._entries.get(track_id)
+            return entry.classification if entry is not None else None
+
+    def resolve(self, track_id):
+        """
+        Returns the voted plate for the track, running OCR on its best crops
+        the first time only. Slow; call it off the capture/detect path.
+        """
+        with self._lock:
+            entry = self._entries.get(track_id)
+            if entry is None:
+                return "UNKNOWN"
+            if entry.plate is not None:
+                return entry.plate
+            crops = [crop for _, crop in entry.candidates]
+
+        reads = []
+        for crop in crops:
+            result = self.read_plate(crop)
+            if result is not None:
+                reads.append(result)
+
+        plate, support = vote_plate(reads)
+
+        with self._lock:
+            self.ocr_calls += len(crops)
+            self.resolved += 1
+            entry.plate = plate
+            entry.support = support
+            entry.candidates = []
+            entry.claimed = False
+            if entry.dead:
+                self._entries.pop(track_id, None)
+
+        return plate
+
+    def evict(self, track_id):
+        """Track died. Claimed entries stay until their plate is resolved."""
+        with self._lock:
+            entry = self._entries.get(track_id)
+            if entry is None:
+                return
+            if entry.claimed:
+                entry.dead = True
+            else:
+                del self._entries[track_id]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "tracks": len(self._entries),
+                "ocrCalls": self.ocr_calls,
+                "resolved": self.resolved,
+            }
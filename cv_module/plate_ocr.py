@@ -0,0 +1,159 @@
+# cv_module/plate_ocr.py
+"""
+Plate OCR with fast plate localization, so the recognizer only sees the
+plate instead of the whole vehicle crop.
+
+Plates are high-contrast horizontal text on a flat background in the lower
+part of a vehicle. The heuristic looks for dense vertical edges there,
+closes them into blobs and keeps the blob whose shape and position look
+most like a plate.
+"""
+import cv2
+import numpy as np
+
+PLATE_ROI_HEIGHT = 48          # recognizer input height in pixels
+SEARCH_FROM = 0.35             # search the crop below this fraction of its height
+MIN_ASPECT = 1.8
+MAX_ASPECT = 7.0
+MIN_AREA_FRACTION = 0.004      # of the search region
+MAX_AREA_FRACTION = 0.25
+MIN_WIDTH_FRACTION = 0.08      # of the crop width
+PADDING = 0.08                 # grow the box by this fraction on each side
+
+
+def locate_plate(car_crop):
+    """
+    Returns the plate box (x1, y1, x2, y2) in car_crop coordinates, or
+    None when nothing plate-shaped is found.
+    """
+    height, width = car_crop.shape[:2]
+    if height < 20 or width < 20:
+        return None
+
+    top = int(height * SEARCH_FROM)
+    region = car_crop[top:, :]
+    region_area = region.shape[0] * region.shape[1]
+
+    gray = cv2.cvtColor(region, cv2.COLOR_BGR2GRAY)
+    gray = cv2.GaussianBlur(gray, (3, 3), 0)
+
+    # Characters give strong vertical edges; body panels mostly do not
+    edges = cv2.Sobel(gray, cv2.CV_16S, 1, 0, ksize=3)
+    edges = cv2.convertScaleAbs(edges)
+    _, mask = cv2.threshold(edges, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+
+    # Join the characters of one plate into a single blob
+    kernel_width = max(3, width // 12)
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (kernel_width, 3))
+    mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel)
+    mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, np.ones((3, 3), np.uint8))
+
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+    best = None
+    best_score = 0.0
+    for contour in contours:
+        x, y, w, h = cv2.boundingRect(contour)
+        if h == 0:
+            continue
+
+        aspect = w / h
+        area_fraction = (w * h) / region_area
+        if not (MIN_ASPECT <= aspect <= MAX_ASPECT):
+            continue
+        if not (MIN_AREA_FRACTION <= area_fraction <= MAX_AREA_FRACTION):
+            continue
+        if w < width * MIN_WIDTH_FRACTION:
+            continue
+
+        # Prefer dense edges, horizontally centred boxes
+        fill = cv2.countNonZero(mask[y:y + h, x:x + w]) / float(w * h)
+        centre_offset = abs((x + w / 2) - width / 2) / (width / 2)
+        score = fill * (1.0 - 0.5 * centre_offset) * area_fraction ** 0.25
+
+        if score > best_score:
+            best = (x, y, w, h)
+            best_score = score
+
+    if best is None:
+        return None
+
+    x, y, w, h = best
+    pad_x = int(w * PADDING)
+    pad_y = int(h * PADDING)
+    return (
+        max(x - pad_x, 0),
+        max(top + y - pad_y, 0),
+        min(x + w + pad_x, width),
+        min(top + y + h + pad_y, height),
+    )
+
+
+def plate_roi(car_crop, roi_height=PLATE_ROI_HEIGHT):
+    """
+    Localized plate, resized to a fixed height (aspect kept), or None.
+    """
+    box = locate_plate(car_crop)
+    if box is None:
+        return None
+
+    x1, y1, x2, y2 = box
+    roi = car_crop[y1:y2, x1:x2]
+    if roi.size == 0:
+        return None
+
+    scale = roi_height / float(roi.shape[0])
+    interpolation = cv2.INTER_AREA if scale < 1 else cv2.INTER_CUBIC
+    return cv2.resize(roi, (max(1, int(roi.shape[1] * scale)), roi_height), interpolation=interpolation)
+
+
+def normalize_plate_text(plate_text):
+    if not plate_text:
+        return "UNKNOWN"
+
+    cleaned = plate_text.upper().strip()
+    cleaned = cleaned.replace(" ", "")
+    return cleaned if cleaned else "UNKNOWN"
+
+
+def best_plate_read(ocr_res):
+    """Most confident (normalized text, confidence) from EasyOCR output, or None."""
+    if not ocr_res:
+        return None
+
+    _, text, confidence = max(ocr_res, key=lambda result: result[2])
+    plate_text = normalize_plate_text(text)
+    if plate_text == "UNKNOWN":
+        return None
+    return plate_text, float(confidence)
+
+
+def read_plate(reader, car_crop, localize=True, fallback=True):
+    """
+    One OCR pass over a vehicle crop. Returns (normalized text, confidence)
+    or None.
+
+    With localize, only the plate ROI goes to EasyOCR's recognizer and its
+    text detector is skipped. With fallback, a crop whose plate cannot be
+    localized or read is OCR'd whole, as before.
+    """
+    roi = plate_roi(car_crop) if localize else None
+
+    if roi is not None:
+        try:
+            result = best_plate_read(reader.recognize(roi))
+        except Exception:
+            result = None
+        if result is not None or not fallback:
+            return result
+
+    try:
+        return best_plate_read(reader.readtext(car_crop))
+    except Exception:
+        return None
+
+
+def warm_up(reader):
+    """Runs the recognizer and the full readtext path once on blank images."""
+    reader.recognize(np.zeros((PLATE_ROI_HEIGHT, PLATE_ROI_HEIGHT * 4, 3), dtype=np.uint8))
+    reader.readtext(np.zeros((160, 240, 3), dtype=np.uint8))
@@ -0,0 +1,132 @@
+# cv_module/plate_ocr_benchmark.py
+"""
+OCR latency and accuracy on recorded vehicle crops, with and without
+plate localization.
+
+Put the crops (any image format OpenCV reads) in a directory together with
+labels.csv holding "filename,plate" rows, e.g. crops saved from
+dashboard/evidence/violation_*.jpg and labelled by hand.
+
+Run from the project root:
+    python -m cv_module.plate_ocr_benchmark [crops_dir]
+"""
+import csv
+import json
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import easyocr
+
+from cv_module.plate_ocr import locate_plate, normalize_plate_text, read_plate
+
+BASE_DIR = Path(__file__).resolve().parent
+CROPS_DIR = BASE_DIR / "plate_crops"
+
+MODES = {
+    "fullCrop": {"localize": False, "fallback": False},
+    "localized": {"localize": True, "fallback": False},
+    "localizedWithFallback": {"localize": True, "fallback": True},
+}
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(int(round(pct / 100 * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def edit_distance(a, b):
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b),
+            ))
+        previous = current
+    return previous[-1]
+
+
+def load_crops(crops_dir):
+    labels_path = Path(crops_dir) / "labels.csv"
+    if not labels_path.exists():
+        raise FileNotFoundError(f"{labels_path} not found (expected filename,plate rows)")
+
+    crops = []
+    with open(labels_path, newline="") as f:
+        for row in csv.reader(f):
+            if len(row) < 2 or row[0].strip().lower() == "filename":
+                continue
+            image = cv2.imread(str(Path(crops_dir) / row[0].strip()))
+            if image is None:
+                print(f"⚠️ Skipping unreadable crop: {row[0]}")
+                continue
+            crops.append((row[0].strip(), image, normalize_plate_text(row[1])))
+    return crops
+
+
+def run_mode(reader, crops, localize, fallback):
+    latencies = []
+    exact = 0
+    char_errors = 0
+    char_total = 0
+
+    for _, image, expected in crops:
+        started = time.perf_counter()
+        result = read_plate(reader, image, localize=localize, fallback=fallback)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+        text = result[0] if result else "UNKNOWN"
+        exact += text == expected
+        char_errors += edit_distance(text, expected)
+        char_total += len(expected)
+
+    latencies.sort()
+    return {
+        "latencyMs": {
+            "mean": round(sum(latencies) / len(latencies), 1),
+            "p50": round(percentile(latencies, 50), 1),
+            "p95": round(percentile(latencies, 95), 1),
+        },
+        "exactMatch": round(exact / len(crops), 3),
+        "charAccuracy": round(1 - char_errors / char_total, 3) if char_total else 0.0,
+    }
+
+
+def run_benchmark(crops_dir=CROPS_DIR):
+    crops = load_crops(crops_dir)
+    if not crops:
+        raise RuntimeError(f"No labelled crops in {crops_dir}")
+
+    reader = easyocr.Reader(["en"], gpu=False)
+    # Warm up both code paths so model loading is not timed
+    read_plate(reader, crops[0][1], localize=False)
+    read_plate(reader, crops[0][1], localize=True, fallback=False)
+
+    results = {
+        name: run_mode(reader, crops, **options)
+        for name, options in MODES.items()
+    }
+
+    full = results["fullCrop"]
+    localized = results["localizedWithFallback"]
+    return {
+        "crops": len(crops),
+        "localizationRate": round(
+            sum(1 for _, image, _ in crops if locate_plate(image) is not None) / len(crops), 3
+        ),
+        "modes": results,
+        "meanLatencyReduction": round(
+            1 - localized["latencyMs"]["mean"] / full["latencyMs"]["mean"], 3
+        ) if full["latencyMs"]["mean"] else 0.0,
+        "exactMatchDelta": round(localized["exactMatch"] - full["exactMatch"], 3),
+    }
+
+
+if __name__ == "__main__":
+    print(json.dumps(run_benchmark(sys.argv[1] if len(sys.argv) > 1 else CROPS_DIR), indent=2))
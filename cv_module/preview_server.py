@@ -0,0 +1,195 @@
+# cv_module/preview_server.py
+"""
+On-demand annotated preview and metrics for a headless detector, served
+on a local HTTP port:
+
+  GET /              small HTML page showing the stream
+  GET /stream.mjpg   low-rate MJPEG stream (multipart/x-mixed-replace)
+  GET /latest.jpg    the most recent annotated frame
+  GET /metrics       Prometheus text (when given a MetricsRegistry)
+  GET /metrics.json  the same metrics as a JSON summary
+
+The detector asks wants_frame() before drawing anything. It is True only
+while a stream client is connected or /latest.jpg was fetched recently,
+and at most PREVIEW_MAX_FPS times a second, so an unwatched detector never
+draws or encodes a frame.
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import threading
+import time
+
+HOST = "127.0.0.1"
+PREVIEW_MAX_FPS = 5.0
+# /latest.jpg polling keeps the preview on for this long after each request
+LATEST_REQUEST_GRACE_SECONDS = 5.0
+FRAME_WAIT_SECONDS = 2.0
+BOUNDARY = "itmsframe"
+
+INDEX_HTML = b"""<!doctype html>
+<html><head><title>ITMS Camera Preview</title></head>
+<body style="margin:0;background:#111">
+<img src="/stream.mjpg" style="max-width:100%">
+</body></html>
+"""
+
+
+class PreviewServer:
+    def __init__(self, port, host=HOST, max_fps=PREVIEW_MAX_FPS, metrics=None):
+        self.host = host
+        self.port = port
+        self.metrics = metrics
+        self.min_interval = 1.0 / max_fps
+
+        self._condition = threading.Condition()
+        self._jpeg = None
+        self._frame_number = 0
+        self._last_published = 0.0
+        self._stream_clients = 0
+        self._latest_requested = float("-inf")
+        self._stopped = False
+
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}/"
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="itms-preview", daemon=True
+        )
+        self._thread.start()
+        print(f"🖥️ Preview available at {self.url} (annotates only while watched)")
+
+    def stop(self):
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+        self._server.shutdown()
+        self._server.server_close()
+
+    # -------------------------------------------------
+    # Detector side
+    # -------------------------------------------------
+    def watching(self):
+        with self._condition:
+            return (
+                self._stream_clients > 0
+                or time.monotonic() - self._latest_requested < LATEST_REQUEST_GRACE_SECONDS
+            )
+
+    def wants_frame(self):
+        """True when someone is watching and the rate limit allows a frame."""
+        return self.watching() and time.monotonic() - self._last_published >= self.min_interval
+
+    def publish(self, jpeg):
+        with self._condition:
+            self._jpeg = jpeg
+            self._frame_number += 1
+            self._last_published = time.monotonic()
+            self._condition.notify_all()
+
+    # -------------------------------------------------
+    # HTTP side
+    # -------------------------------------------------
+    def _has_fresh_frame(self):
+        return time.monotonic() - self._last_published < max(self.min_interval * 2, 0.5)
+
+    def _next_frame(self, after):
+        """Waits for a frame newer than `after`; returns (number, jpeg) or None."""
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self._frame_number > after or self._stopped, timeout=FRAME_WAIT_SECONDS
+            )
+            if self._frame_number <= after:
+                return None
+            return self._frame_number, self._jpeg
+
+    def _handler_class(self):
+        preview = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def send_bytes(self, content_type, body):
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("Cache-Control", "no-store")
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                path = self.path.split("?", 1)[0]
+                if path == "/":
+                    self.send_bytes("text/html; charset=utf-8", INDEX_HTML)
+                elif path == "/latest.jpg":
+                    self.send_latest()
+                elif path == "/stream.mjpg":
+                    self.send_stream()
+                elif path == "/metrics" and preview.metrics is not None:
+                    self.send_bytes(
+                        "text/plain; version=0.0.4; charset=utf-8",
+                        preview.metrics.prometheus_text().encode("utf-8"),
+                    )
+                elif path == "/metrics.json" and preview.metrics is not None:
+                    self.send_bytes(
+                        "application/json",
+                        json.dumps(preview.metrics.summary()).encode("utf-8"),
+                    )
+                else:
+                    self.send_error(404)
+
+            def send_latest(self):
+                with preview._condition:
+                    preview._latest_requested = time.monotonic()
+                    jpeg = preview._jpeg
+                    frame_number = preview._frame_number
+
+                # The first request after a pause waits for a fresh frame
+                if jpeg is None or not preview._has_fresh_frame():
+                    fresh = preview._next_frame(frame_number)
+                    if fresh is not None:
+                        jpeg = fresh[1]
+
+                if jpeg is None:
+                    self.send_error(503, "No frame yet")
+                else:
+                    self.send_bytes("image/jpeg", jpeg)
+
+            def send_stream(self):
+                self.send_response(200)
+                self.send_header("Content-Type", f"multipart/x-mixed-replace; boundary={BOUNDARY}")
+                self.send_header("Cache-Control", "no-store")
+                self.end_headers()
+
+                with preview._condition:
+                    preview._stream_clients += 1
+                    frame_number = preview._frame_number
+
+                try:
+                    while not preview._stopped:
+                        fresh = preview._next_frame(frame_number)
+                        if fresh is None:
+                            continue
+                        frame_number, jpeg = fresh
+                        self.wfile.write(
+                            (
+                                f"--{BOUNDARY}\r\n"
+                                "Content-Type: image/jpeg\r\n"
+                                f"Content-Length: {len(jpeg)}\r\n\r\n"
+                            ).encode("ascii")
+                            + jpeg
+                            + b"\r\n"
+                        )
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+                finally:
+                    with preview._condition:
+                        preview._stream_clients -= 1
+
+        return Handler
@@ -0,0 +1,365 @@
+# cv_module/replay_benchmark.py
+"""
+Offline replay benchmark for the whole detector pipeline.
+
+Drives DetectorPipeline headless and as fast as it will go (file-source
+BLOCK policy, so no frame is dropped) from a video file or a synthetic
+stream of vehicles driving down across the stop line. Models are stubs
+by default, so the numbers track the pipeline itself (capture, tracking,
+ROI scheduling, evidence spooling, DB writes) rather than the inference
+runtimes; --real-models loads the configured backends instead.
+
+The database, evidence directory and spool are temporary, so a replay
+never touches production data. Reports frames/sec, events/sec, peak RSS
+and p50/p95/p99 per stage and per step as JSON, e.g. for comparing runs
+before and after a change.
+
+Run from the directory the detector runs in:
+    python -m cv_module.replay_benchmark [video] [--frames N] [--real-models]
+        [--yolo-ms MS] [--cnn-ms MS] [--ocr-ms MS] [--verbose]
+"""
+import contextlib
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+try:
+    import resource
+except ImportError:   # Windows
+    resource = None
+
+from cv_module import detector, evidence_service
+from cv_module.clip_writer import ffmpeg_available
+from cv_module.model_loader import BackgroundLoader, StartupTimer
+from database.connection_pool import DatabasePools
+from database.migrate import migrate
+
+WIDTH = 1920
+HEIGHT = 1080
+FPS = 20.0
+SYNTHETIC_FRAMES = 600
+LANES = 4
+# Pixels per frame; lanes differ so vehicles cross the line at different times
+LANE_SPEEDS = (14, 18, 11, 16)
+PLATE_TEXT = "ABC 1234"
+
+# Stub YOLO finds the synthetic vehicle bodies by colour (BGR)
+VEHICLE_LOWER = (150, 0, 0)
+VEHICLE_UPPER = (255, 160, 90)
+MIN_VEHICLE_AREA = 40 * 40
+STUB_CONFIDENCE = 0.9
+STUB_CNN_CLASS = "civilian_car"
+
+
+# =========================================================
+# SYNTHETIC SOURCE
+# =========================================================
+def vehicle_boxes(index, width=WIDTH, height=HEIGHT):
+    """One vehicle per lane, re-entering at the top after it leaves the frame."""
+    lane_width = width // LANES
+    vehicle_w = int(lane_width * 0.55)
+    vehicle_h = int(vehicle_w * 0.7)
+
+    boxes = []
+    for lane, speed in enumerate(LANE_SPEEDS[:LANES]):
+        y = (index * speed + lane * height // LANES) % (height + vehicle_h) - vehicle_h
+        x = lane * lane_width + (lane_width - vehicle_w) // 2
+        boxes.append((lane, (x, y, x + vehicle_w, y + vehicle_h)))
+    return boxes
+
+
+class SyntheticCapture:
+    """
+    cv2.VideoCapture stand-in: grey road, stop line and coloured vehicles
+    with a readable plate. Renders into the ring slot passed to read().
+    """
+
+    def __init__(self, count=SYNTHETIC_FRAMES, width=WIDTH, height=HEIGHT, fps=FPS,
+                 line_position=detector.LINE_POSITION):
+        self.count = count
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.index = 0
+
+        self.background = np.zeros((height, width, 3), dtype=np.uint8)
+        self.background[:] = np.linspace(60, 140, height, dtype=np.uint8)[:, None, None]
+        line_y = int(height * line_position)
+        cv2.line(self.background, (0, line_y), (width, line_y), (255, 255, 255), 6)
+
+    def isOpened(self):
+        return True
+
+    def get(self, prop):
+        return {
+            cv2.CAP_PROP_FRAME_WIDTH: float(self.width),
+            cv2.CAP_PROP_FRAME_HEIGHT: float(self.height),
+            cv2.CAP_PROP_FPS: self.fps,
+            cv2.CAP_PROP_FRAME_COUNT: float(self.count),
+        }.get(prop, 0.0)
+
+    def read(self, image=None):
+        if self.index >= self.count:
+            return False, None
+
+        if image is None or image.shape != self.background.shape:
+            image = np.empty_like(self.background)
+        np.copyto(image, self.background)
+
+        for lane, (x1, y1, x2, y2) in vehicle_boxes(self.index, self.width, self.height):
+            cv2.rectangle(image, (x1, y1), (x2, y2), (200, 60 + lane * 25, 30), -1)
+
+            plate_w, plate_h = (x2 - x1) // 2, (y2 - y1) // 6
+            px, py = x1 + (x2 - x1 - plate_w) // 2, y2 - plate_h - 12
+            cv2.rectangle(image, (px, py), (px + plate_w, py + plate_h), (255, 255, 255), -1)
+            cv2.putText(
+                image, PLATE_TEXT, (px + 6, py + plate_h - 8),
+                cv2.FONT_HERSHEY_SIMPLEX, plate_h / 40, (0, 0, 0), 2,
+            )
+
+        self.index += 1
+        return True, image
+
+    def release(self):
+        pass
+
+
+class LimitedCapture:
+    """Stops a cv2.VideoCapture after max_frames frames."""
+
+    def __init__(self, cap, max_frames):
+        self.cap = cap
+        self.max_frames = max_frames
+        self.frames = 0
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def get(self, prop):
+        return self.cap.get(prop)
+
+    def read(self, image=None):
+        if self.frames >= self.max_frames:
+            return False, None
+        self.frames += 1
+        return self.cap.read(image)
+
+    def release(self):
+        self.cap.release()
+
+
+# =========================================================
+# STUB MODELS
+# =========================================================
+class StubYolo:
+    """Colour-threshold "detector" for the synthetic vehicles, reported as cars."""
+
+    def __init__(self, latency_ms=0.0):
+        self.latency = latency_ms / 1000
+
+    def detect(self, image, imgsz=None):
+        if self.latency:
+            time.sleep(self.latency)
+
+        mask = cv2.inRange(image, VEHICLE_LOWER, VEHICLE_UPPER)
+        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+        detections = []
+        for contour in contours:
+            x, y, w, h = cv2.boundingRect(contour)
+            if w * h >= MIN_VEHICLE_AREA:
+                detections.append(((x, y, x + w, y + h), 2, STUB_CONFIDENCE))
+        return detections
+
+
+class StubCnn:
+    def __init__(self, latency_ms=0.0):
+        self.latency = latency_ms / 1000
+        self.scores = np.zeros(len(detector.CNN_CLASSES), dtype=np.float32)
+        self.scores[detector.CNN_CLASSES.index(STUB_CNN_CLASS)] = 0.99
+
+    def __call__(self, batch):
+        if self.latency:
+            time.sleep(self.latency)
+        return np.tile(self.scores, (len(batch), 1))
+
+
+class StubOcrReader:
+    """Answers both EasyOCR calls read_plate() makes with PLATE_TEXT."""
+
+    def __init__(self, latency_ms=0.0):
+        self.latency = latency_ms / 1000
+
+    def _read(self, image):
+        if self.latency:
+            time.sleep(self.latency)
+        height, width = image.shape[:2]
+        return [([[0, 0], [width, 0], [width, height], [0, height]], PLATE_TEXT, 0.9)]
+
+    def recognize(self, image):
+        return self._read(image)
+
+    def readtext(self, image):
+        return self._read(image)
+
+
+def stub_models(timer, yolo_ms=0.0, cnn_ms=0.0, ocr_ms=0.0):
+    return BackgroundLoader(
+        {
+            "yolo": (lambda: StubYolo(yolo_ms), None),
+            "cnn": (lambda: StubCnn(cnn_ms), None),
+            "ocr": (lambda: StubOcrReader(ocr_ms), None),
+        },
+        timer,
+    )
+
+
+# =========================================================
+# REPLAY
+# =========================================================
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # KiB on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def open_source(source, max_frames):
+    if source is None:
+        return SyntheticCapture(max_frames or SYNTHETIC_FRAMES), "synthetic"
+
+    cap = cv2.VideoCapture(str(source))
+    if not cap.isOpened():
+        raise RuntimeError(f"Could not open video source: {source}")
+    return (LimitedCapture(cap, max_frames) if max_frames else cap), str(source)
+
+
+def prepare_database(db_path, intersection_id=detector.DEFAULT_INTERSECTION_ID):
+    conn = sqlite3.connect(db_path)
+    try:
+        migrate(conn)
+        conn.execute(
+            "INSERT INTO intersection (intersection_id, name, location, region) VALUES (?, ?, ?, ?)",
+            (intersection_id, "Replay Benchmark", "offline", "benchmark"),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def run_benchmark(source=None, max_frames=None, real_models=False,
+                  yolo_ms=0.0, cnn_ms=0.0, ocr_ms=0.0, verbose=False):
+    cap, source_name = open_source(source, max_frames)
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    if not fps or fps <= 1:
+        fps = FPS
+
+    with contextlib.ExitStack() as stack:
+        # The pipeline's per-event and report lines would bury the JSON
+        if not verbose:
+            stack.enter_context(contextlib.redirect_stdout(stack.enter_context(open(os.devnull, "w"))))
+        tmp = Path(stack.enter_context(tempfile.TemporaryDirectory()))
+        db_path = tmp / "replay.db"
+        prepare_database(db_path)
+
+        # Everything the pipeline writes goes to the temporary directory
+        saved = (detector.db_pools, detector.EVIDENCE_DIR, evidence_service.SPOOL_DIR)
+        pools = DatabasePools(db_path)
+        detector.db_pools = pools
+        detector.EVIDENCE_DIR = tmp / "evidence"
+        evidence_service.SPOOL_DIR = tmp / "spool"
+        detector.EVIDENCE_DIR.mkdir()
+
+        try:
+            timer = StartupTimer()
+            models = (
+                detector.load_models(timer) if real_models
+                else stub_models(timer, yolo_ms, cnn_ms, ocr_ms)
+            )
+            # Loading is not part of the replay
+            models.wait()
+
+            pipeline = detector.DetectorPipeline(
+                cap=cap,
+                models=models,
+                fps=fps,
+                ffmpeg_ok=ffmpeg_available(),
+                live_source=False,
+                startup=timer,
+                camera_id="replay",
+                display=False,
+            )
+
+            started = time.perf_counter()
+            pipeline.start()
+            pipeline.run()
+            wall = time.perf_counter() - started
+        finally:
+            cap.release()
+            pools.close()
+            detector.db_pools, detector.EVIDENCE_DIR, evidence_service.SPOOL_DIR = saved
+
+    summary = pipeline.metrics.summary()
+    values = summary["values"]
+    frames = pipeline.capture_stats.processed
+    triggered = values.get("itms_events_triggered_total", {}).get("all", 0)
+    logged = values.get("itms_events_logged_total", {}).get("all", 0)
+
+    return {
+        "source": source_name,
+        "models": "real" if real_models else "stub",
+        "stubLatencyMs": None if real_models else {"yolo": yolo_ms, "cnn": cnn_ms, "ocr": ocr_ms},
+        "config": {
+            "detectionMode": detector.DETECTION_MODE,
+            "detectStride": detector.DETECT_STRIDE,
+            "frameBufferMode": detector.FRAME_BUFFER_MODE,
+            "evidenceMode": detector.EVIDENCE_MODE,
+            "yoloBackend": detector.YOLO_BACKEND if real_models else None,
+            "cnnBackend": detector.CNN_BACKEND if real_models else None,
+        },
+        "frames": frames,
+        "yoloFrames": pipeline.scheduler.detections,
+        "wallSeconds": round(wall, 3),
+        "fps": round(frames / wall, 1) if wall else 0.0,
+        "eventsTriggered": triggered,
+        "eventsLogged": logged,
+        "eventsPerSecond": round(logged / wall, 2) if wall else 0.0,
+        "peakRssMb": peak_rss_mb(),
+        "dropped": sum(q.dropped for q in pipeline.queues()),
+        "stages": summary["latency"].get("itms_stage_seconds", {}),
+        "steps": summary["latency"].get("itms_step_seconds", {}),
+        "eventLatency": summary["latency"].get("itms_event_seconds", {}).get("all"),
+    }
+
+
+def parse_args(argv):
+    options = {"source": None, "max_frames": None, "real_models": False, "verbose": False}
+    flags = {"--yolo-ms": "yolo_ms", "--cnn-ms": "cnn_ms", "--ocr-ms": "ocr_ms"}
+
+    args = iter(argv)
+    for arg in args:
+        if arg == "--frames":
+            options["max_frames"] = int(next(args))
+        elif arg in flags:
+            options[flags[arg]] = float(next(args))
+        elif arg == "--real-models":
+            options["real_models"] = True
+        elif arg == "--verbose":
+            options["verbose"] = True
+        elif arg.startswith("--"):
+            raise SystemExit(f"Unknown option {arg}\n{__doc__}")
+        else:
+            options["source"] = arg
+    return options
+
+
+if __name__ == "__main__":
+    print(json.dumps(run_benchmark(**parse_args(sys.argv[1:])), indent=2))
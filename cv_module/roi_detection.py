@@ -0,0 +1,97 @@
+# cv_module/roi_detection.py
+"""
+Helpers for the detector's "roi" detection mode.
+
+Triggers only depend on boxes near the enforcement line, so YOLO does not
+need the whole frame on every frame:
+
+  - roi_band() picks a horizontal band around the line; only that band is
+    passed to YOLO, letterboxed to a smaller imgsz.
+  - MotionGate diffs a thin, downscaled strip around the line between
+    consecutive frames.
+  - DetectionScheduler runs YOLO every Nth frame, and on every frame while
+    there is motion at the line or a track is about to cross it. The
+    tracker predicts boxes on the skipped frames.
+"""
+import cv2
+
+MOTION_STRIP_FRACTION = 0.08     # strip half-height, fraction of frame height
+MOTION_SCALE = 0.25
+MOTION_PIXEL_DELTA = 25
+MOTION_MIN_CHANGED_FRACTION = 0.01
+
+
+def roi_band(height, line_y, above_fraction, below_fraction):
+    """(top, bottom) rows of the detection band, clamped to the frame."""
+    top = max(int(line_y - above_fraction * height), 0)
+    bottom = min(int(line_y + below_fraction * height), height)
+    return top, bottom
+
+
+class MotionGate:
+    def __init__(self, height, line_y, strip_fraction=MOTION_STRIP_FRACTION,
+                 scale=MOTION_SCALE, pixel_delta=MOTION_PIXEL_DELTA,
+                 min_changed_fraction=MOTION_MIN_CHANGED_FRACTION):
+        self.top, self.bottom = roi_band(height, line_y, strip_fraction, strip_fraction)
+        self.scale = scale
+        self.pixel_delta = pixel_delta
+        self.min_changed_fraction = min_changed_fraction
+        self.previous = None
+
+    def update(self, frame):
+        """True when the strip around the line changed since the last call."""
+        strip = cv2.resize(
+            frame[self.top:self.bottom], None, fx=self.scale, fy=self.scale,
+            interpolation=cv2.INTER_AREA,
+        )
+        gray = cv2.GaussianBlur(cv2.cvtColor(strip, cv2.COLOR_BGR2GRAY), (5, 5), 0)
+
+        previous = self.previous
+        self.previous = gray
+        if previous is None or previous.shape != gray.shape:
+            return True
+
+        _, changed = cv2.threshold(
+            cv2.absdiff(gray, previous), self.pixel_delta, 255, cv2.THRESH_BINARY
+        )
+        return cv2.countNonZero(changed) >= self.min_changed_fraction * changed.size
+
+
+class DetectionScheduler:
+    def __init__(self, stride, motion_gate=None):
+        """
+        stride: run detection at least every stride-th frame (1 = every frame).
+        motion_gate: optional MotionGate that forces full-rate detection.
+        """
+        self.stride = max(int(stride), 1)
+        self.motion_gate = motion_gate
+        self._since_detection = self.stride   # detect on the first frame
+
+        self.frames = 0
+        self.detections = 0
+        self.forced = 0
+
+    def should_detect(self, frame, track_near_line=False):
+        """Call once per frame, in order. Detect-stage thread."""
+        self.frames += 1
+
+        # The gate sees every frame so its reference strip stays current
+        motion = self.motion_gate.update(frame) if self.motion_gate is not None else False
+        due = self._since_detection + 1 >= self.stride
+
+        if not (due or motion or track_near_line):
+            self._since_detection += 1
+            return False
+
+        if not due:
+            self.forced += 1
+        self._since_detection = 0
+        self.detections += 1
+        return True
+
+    def stats(self):
+        return {
+            "frames": self.frames,
+            "detections": self.detections,
+            "forced": self.forced,
+        }
@@ -0,0 +1,292 @@
+# cv_module/supervisor.py
+"""
+Runs one detector worker process per camera listed in the manifest, so a
+single edge box can cover every approach of a junction.
+
+Each worker is a headless cv_module.detector.run_detector with its own
+source, intersection and line position. A worker that crashes, fails to
+load or loses its live stream is restarted with exponential backoff; a
+file source that simply ends is not. One evidence service is shared by all
+workers. Every STATS_INTERVAL_SECONDS the supervisor prints each camera's
+capture FPS, YOLO rate and queue depths.
+
+Weights: each worker process loads its own models. The TFLite backends
+mmap the model file, so those weights are shared through the page cache;
+PyTorch, Keras and ONNX Runtime keep a private copy per process. Inference
+threads are split across workers so they do not oversubscribe the cores.
+
+Manifest (JSON list), e.g. cv_module/cameras.json:
+    [{"camera_id": "north", "source": "rtsp://...", "intersection_id": 1,
+      "line_position": 0.7, "preview_port": 8091}]
+preview_port is optional; without it a camera has no preview server.
+
+Run from the project root:  python -m cv_module.supervisor [manifest]
+"""
+from pathlib import Path
+import json
+import multiprocessing
+import os
+import queue
+import signal
+import sys
+import time
+
+BASE_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = BASE_DIR.parent
+
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.append(str(PROJECT_ROOT))
+
+CAMERA_MANIFEST = BASE_DIR / "cameras.json"
+
+STATS_INTERVAL_SECONDS = 10
+POLL_INTERVAL_SECONDS = 1.0
+RESTART_BACKOFF_BASE_SECONDS = 2
+RESTART_BACKOFF_MAX_SECONDS = 60
+# A worker that stays up this long starts its backoff from the beginning
+STABLE_RUN_SECONDS = 120
+WORKER_STOP_TIMEOUT_SECONDS = 150
+
+# Set before the worker imports torch / TensorFlow / OpenCV
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "TF_NUM_INTRAOP_THREADS", "OPENCV_FOR_THREADS_NUM")
+
+
+def load_manifest(path=CAMERA_MANIFEST):
+    with open(path) as f:
+        entries = json.load(f)
+
+    if not isinstance(entries, list) or not entries:
+        raise ValueError(f"{path} must hold a non-empty JSON list of cameras")
+
+    cameras = []
+    for index, entry in enumerate(entries):
+        if "source" not in entry:
+            raise ValueError(f"Camera #{index + 1} in {path} has no source")
+
+        line_position = float(entry.get("line_position", 0.7))
+        if not 0 < line_position < 1:
+            raise ValueError(f"Camera #{index + 1}: line_position must be between 0 and 1")
+
+        cameras.append({
+            "camera_id": str(entry.get("camera_id", f"cam{index + 1}")),
+            "source": entry["source"],
+            "intersection_id": int(entry.get("intersection_id", 1)),
+            "line_position": line_position,
+            "preview_port": int(entry["preview_port"]) if entry.get("preview_port") else None,
+        })
+
+    camera_ids = [camera["camera_id"] for camera in cameras]
+    if len(set(camera_ids)) != len(camera_ids):
+        raise ValueError(f"Duplicate camera_id in {path}")
+
+    ports = [camera["preview_port"] for camera in cameras if camera["preview_port"]]
+    if len(set(ports)) != len(ports):
+        raise ValueError(f"Duplicate preview_port in {path}")
+
+    return cameras
+
+
+def backoff_seconds(failures: int) -> int:
+    return min(RESTART_BACKOFF_BASE_SECONDS * 2 ** max(failures - 1, 0), RESTART_BACKOFF_MAX_SECONDS)
+
+
+# =========================================================
+# WORKER PROCESS
+# =========================================================
+def run_camera(camera, stats_queue, threads):
+    for name in THREAD_ENV_VARS:
+        os.environ[name] = str(threads)
+
+    # Imported here so the thread settings apply to the model runtimes
+    from cv_module import detector, inference_backends
+
+    inference_backends.INFERENCE_THREADS = threads
+
+    def send_stats(summary):
+        try:
+            stats_queue.put_nowait(summary)
+        except queue.Full:
+            pass
+
+    ok = detector.run_detector(
+        source=camera["source"],
+        intersection_id=camera["intersection_id"],
+        line_position=camera["line_position"],
+        camera_id=camera["camera_id"],
+        display=False,
+        preview_port=camera["preview_port"],
+        start_service=False,
+        on_stats=send_stats,
+    )
+    sys.exit(0 if ok else 1)
+
+
+# =========================================================
+# SUPERVISOR
+# =========================================================
+class Worker:
+    def __init__(self, camera):
+        self.camera = camera
+        self.process = None
+        self.started_at = None
+        self.failures = 0
+        self.restarts = 0
+        self.restart_at = 0.0
+        self.finished = False
+        self.stats = None
+
+
+class Supervisor:
+    def __init__(self, cameras):
+        # spawn: each worker gets a clean interpreter with its own runtimes
+        self.context = multiprocessing.get_context("spawn")
+        self.stats_queue = self.context.Queue(maxsize=len(cameras) * 16)
+        self.workers = [Worker(camera) for camera in cameras]
+        self.threads = max((os.cpu_count() or 1) // len(cameras), 1)
+        self.stopping = False
+
+    def start_worker(self, worker):
+        worker.process = self.context.Process(
+            target=run_camera,
+            args=(worker.camera, self.stats_queue, self.threads),
+            name=f"itms-camera-{worker.camera['camera_id']}",
+        )
+        worker.process.start()
+        worker.started_at = time.monotonic()
+        print(
+            f"📷 Camera {worker.camera['camera_id']} started (pid={worker.process.pid}, "
+            f"source={worker.camera['source']}, threads={self.threads})"
+        )
+
+    def check_worker(self, worker, now):
+        if worker.finished:
+            return
+
+        if worker.process is None:
+            if now >= worker.restart_at:
+                self.start_worker(worker)
+            return
+
+        if worker.process.is_alive():
+            return
+
+        exit_code = worker.process.exitcode
+        worker.process = None
+
+        if exit_code == 0:
+            worker.finished = True
+            print(f"🏁 Camera {worker.camera['camera_id']} finished its source.")
+            return
+
+        if now - worker.started_at >= STABLE_RUN_SECONDS:
+            worker.failures = 0
+        worker.failures += 1
+        worker.restarts += 1
+
+        delay = backoff_seconds(worker.failures)
+        worker.restart_at = now + delay
+        print(
+            f"⚠️ Camera {worker.camera['camera_id']} exited with code {exit_code}; "
+            f"restarting in {delay}s"
+        )
+
+    def drain_stats(self):
+        by_camera = {worker.camera["camera_id"]: worker for worker in self.workers}
+        while True:
+            try:
+                summary = self.stats_queue.get_nowait()
+            except queue.Empty:
+                return
+            worker = by_camera.get(summary.get("camera"))
+            if worker is not None:
+                worker.stats = summary
+
+    def report(self):
+        for worker in self.workers:
+            camera_id = worker.camera["camera_id"]
+            state = "finished" if worker.finished else "running" if worker.process else "restarting"
+            stats = worker.stats
+            if stats is None:
+                print(f"📊 {camera_id}: {state}, restarts={worker.restarts}, no stats yet")
+                continue
+
+            queues = ", ".join(f"{name}={depth}" for name, depth in stats["queues"].items())
+            print(
+                f"📊 {camera_id}: {state}, {stats['fps']:.1f} fps, "
+                f"detect={stats['stages'].get('detect', 0.0):.1f}/s, "
+                f"yolo {stats['yoloFrames']}/{stats['frames']} frames, "
+                f"queues: {queues}, dropped={stats['dropped']}, restarts={worker.restarts}"
+            )
+
+    def signal_workers(self):
+        for worker in self.workers:
+            if worker.process is not None and worker.process.is_alive():
+                if os.name == "nt":
+                    worker.process.terminate()
+                else:
+                    os.kill(worker.process.pid, signal.SIGINT)
+
+    def stop_workers(self, forward_signal):
+        """
+        forward_signal: send SIGINT to the workers. Not needed after Ctrl+C,
+        which the terminal already delivered to the whole process group.
+        """
+        self.stopping = True
+        if forward_signal:
+            self.signal_workers()
+
+        deadline = time.monotonic() + WORKER_STOP_TIMEOUT_SECONDS
+        for worker in self.workers:
+            if worker.process is None:
+                continue
+            worker.process.join(max(deadline - time.monotonic(), 0))
+            if worker.process.is_alive():
+                print(f"⚠️ Camera {worker.camera['camera_id']} did not stop in time; terminating.")
+                worker.process.terminate()
+                worker.process.join()
+
+    def run_forever(self):
+        from cv_module.detector import start_evidence_service, stop_evidence_service
+
+        evidence_service = start_evidence_service()
+
+        # A service manager stops us with SIGTERM; treat it like Ctrl+C
+        # but pass it on, since the workers did not receive it
+        def on_sigterm(signum, frame):
+            raise SystemExit(0)
+
+        signal.signal(signal.SIGTERM, on_sigterm)
+
+        next_report = time.monotonic() + STATS_INTERVAL_SECONDS
+        forward_signal = True
+
+        try:
+            while not all(worker.finished for worker in self.workers):
+                now = time.monotonic()
+                for worker in self.workers:
+                    self.check_worker(worker, now)
+
+                self.drain_stats()
+                if now >= next_report:
+                    self.report()
+                    next_report = now + STATS_INTERVAL_SECONDS
+
+                time.sleep(POLL_INTERVAL_SECONDS)
+
+        except KeyboardInterrupt:
+            forward_signal = False
+            print("🛑 Stopping cameras...")
+
+        except SystemExit:
+            print("🛑 Stopping cameras...")
+
+        finally:
+            self.stop_workers(forward_signal)
+            self.drain_stats()
+            self.report()
+            stop_evidence_service(evidence_service)
+            print("🛑 Supervisor stopped.")
+
+
+if __name__ == "__main__":
+    Supervisor(load_manifest(sys.argv[1] if len(sys.argv) > 1 else CAMERA_MANIFEST)).run_forever()
@@ -0,0 +1,56 @@
+# cv_module/test_evidence_service.py
+import numpy as np
+import pytest
+
+from cv_module import evidence_service
+from cv_module.clip_writer import read_jpeg_spool, write_jpeg_spool
+
+
+@pytest.fixture
+def dirs(tmp_path, monkeypatch):
+    monkeypatch.setattr(evidence_service, "SPOOL_DIR", tmp_path / "spool")
+    monkeypatch.setattr(evidence_service, "EVIDENCE_DIR", tmp_path / "evidence")
+    return tmp_path
+
+
+def bgr_frames(count):
+    return [np.full((16, 24, 3), index * 20, dtype=np.uint8) for index in range(count)]
+
+
+def test_spool_round_trips_jpeg_bytes_unchanged(tmp_path):
+    frames = [b"\xff\xd8first\xff\xd9", b"\xff\xd8second\xff\xd9"]
+
+    assert write_jpeg_spool(frames, tmp_path / "clip.jpegs")
+
+    assert read_jpeg_spool(tmp_path / "clip.jpegs") == frames
+
+
+def test_truncated_spool_is_rejected(tmp_path):
+    path = tmp_path / "clip.jpegs"
+    write_jpeg_spool([b"\xff\xd8frame\xff\xd9"], path)
+    path.write_bytes(path.read_bytes()[:-3])
+
+    with pytest.raises(ValueError):
+        read_jpeg_spool(path)
+
+
+def test_spooled_event_encodes_without_an_intermediate_avi(dirs):
+    spool = evidence_service.spool_event(bgr_frames(5), bgr_frames(1)[0], 7, fps=10)
+
+    assert spool is not None
+    assert not any(path.suffix == ".avi" for path in (dirs / "spool").iterdir())
+    assert len(read_jpeg_spool(spool["clip_spool_path"])) == 5
+
+    job = {
+        **spool,
+        "job_id": 1,
+        "violation_id": 1,
+        "image_filename": "violation_7.jpg",
+        "attempt_count": 1,
+        "ffmpeg_ok": False,
+    }
+    video_filename = evidence_service.encode_evidence(job)
+
+    assert video_filename == "violation_7_raw.avi"
+    assert (dirs / "evidence" / video_filename).stat().st_size > 0
+    assert (dirs / "evidence" / "violation_7.jpg").exists()
@@ -0,0 +1,87 @@
+# cv_module/test_frame_ring.py
+import numpy as np
+
+from cv_module.frame_ring import FrameRing, JpegFrameStore
+
+
+def capture(ring, count):
+    """Publishes count frames whose pixels hold their own seq."""
+    seqs = []
+    for _ in range(count):
+        seq, slot = ring.reserve()
+        slot[:] = seq
+        ring.publish(seq)
+        seqs.append(seq)
+    return seqs
+
+
+def make_ring(capacity=4):
+    ring = FrameRing(capacity, stall_timeout=0.05)
+    ring.allocate((2, 2), np.int64)
+    return ring
+
+
+def test_clip_frames_survive_later_captures():
+    ring = make_ring()
+    seqs = capture(ring, 3)
+    for seq in seqs:
+        assert ring.pin(seq)
+
+    frames = ring.frames(seqs)
+    first = frames[0]
+    capture(ring, 12)
+
+    assert [int(frame[0, 0]) for frame in frames] == [1, 2, 3]
+    assert int(first[0, 0]) == 1
+    assert ring.stats()["spilledFrames"] == 3
+    assert ring.forced_overwrites == 0
+
+
+def test_frames_read_while_resident_are_copies():
+    ring = make_ring()
+    (seq,) = capture(ring, 1)
+    ring.pin(seq)
+
+    frame = ring.frames([seq])[0]
+    frame[:] = -1
+
+    assert int(ring.frames([seq])[0][0, 0]) == seq
+
+
+def test_released_frames_are_not_spilled():
+    ring = make_ring()
+    seqs = capture(ring, 3)
+    for seq in seqs:
+        ring.pin(seq)
+    ring.release(seqs)
+
+    capture(ring, 8)
+
+    assert ring.spills == 0
+    assert len(ring.frames(seqs)) == 0
+
+
+def test_held_slot_makes_capture_wait_then_forces_overwrite():
+    ring = make_ring(capacity=2)
+    (seq,) = capture(ring, 1)
+    assert ring.hold(seq)
+
+    capture(ring, 2)
+
+    assert ring.stalls == 1
+    assert ring.forced_overwrites == 1
+
+
+def test_jpeg_store_spills_pinned_data():
+    store = JpegFrameStore(2)
+    store.reserve(1)
+    store.put(1, b"one")
+    store.pin(1)
+
+    for seq in (2, 3, 4):
+        store.reserve(seq)
+        store.put(seq, b"later")
+
+    assert store.frames([1]) == [b"one"]
+    store.release([1])
+    assert store.frames([1]) == []
@@ -0,0 +1,68 @@
+# cv_module/test_tracker.py
+from cv_module.tracker import IouTracker, Track
+
+LINE_Y = 100
+
+
+def box(bottom, left=10, height=40):
+    return (left, bottom - height, left + 40, bottom)
+
+
+def drive(tracker, bottoms):
+    """Feeds one vehicle through the tracker; returns the crossing flags."""
+    crossings = []
+    for bottom in bottoms:
+        (track,) = tracker.update([(box(bottom), "car")])
+        crossings.append(track.crossed_line(LINE_Y))
+    return crossings
+
+
+def test_crossing_fires_once_per_track():
+    tracker = IouTracker()
+
+    crossings = drive(tracker, [80, 90, 100, 110, 120, 130])
+
+    assert crossings == [False, False, False, True, False, False]
+    assert len(tracker.tracks) == 1
+
+
+def test_moving_back_over_the_line_does_not_fire_again():
+    tracker = IouTracker()
+
+    assert drive(tracker, [90, 105, 95, 108]) == [False, True, False, False]
+
+
+def test_track_first_seen_below_the_line_never_fires():
+    tracker = IouTracker()
+
+    assert drive(tracker, [120, 130, 140]) == [False, False, False]
+
+
+def test_first_update_has_no_previous_position():
+    track = Track(1, box(120), "car")
+
+    assert track.crossed_line(LINE_Y) is False
+
+
+def test_predicted_frames_do_not_count_as_crossings():
+    tracker = IouTracker()
+    drive(tracker, [80, 90])
+
+    (track,) = tracker.predict()
+    assert track.bbox[3] > 90
+    # prev_bottom only moves on detection frames
+    assert track.crossed_line(LINE_Y) is False
+
+    (track,) = tracker.update([(box(110), "car")])
+    assert track.crossed_line(LINE_Y) is True
+
+
+def test_separate_vehicles_each_fire_once():
+    tracker = IouTracker()
+    fired = []
+
+    for bottom in (85, 95, 105, 115):
+        tracks = tracker.update([(box(bottom), "car"), (box(bottom - 10, left=300), "bus")])
+        fired.extend(track.track_id for track in tracks if track.crossed_line(LINE_Y))
+
+    assert sorted(fired) == [1, 2]
@@ -0,0 +1,198 @@
+# cv_module/test_violation_writer.py
+from pathlib import Path
+import sqlite3
+import threading
+
+import pytest
+
+from cv_module.violation_writer import ViolationWriter
+
+
+class RecordingBatchWriter:
+    def __init__(self, fail_on=()):
+        self.batches = []
+        self.fail_on = set(fail_on)
+
+    def __call__(self, records):
+        self.batches.append(list(records))
+        if self.fail_on & set(records):
+            raise RuntimeError("batch rejected")
+        return [record * 10 for record in records]
+
+
+def test_batches_by_size_and_flushes_the_rest_on_close():
+    write_batch = RecordingBatchWriter()
+    writer = ViolationWriter(write_batch, batch_size=3, flush_interval=60)
+    writer.start()
+
+    for record in range(1, 8):
+        writer.submit(record)
+    writer.close()
+
+    assert write_batch.batches == [[1, 2, 3], [4, 5, 6], [7]]
+    assert writer.stats() == {"batches": 3, "written": 7, "failed": 0, "pending": 0}
+
+
+def test_lone_record_is_flushed_after_the_interval():
+    written = threading.Event()
+    writer = ViolationWriter(
+        RecordingBatchWriter(),
+        batch_size=32,
+        flush_interval=0.05,
+        on_written=lambda record, violation_id: written.set(),
+    )
+    writer.start()
+
+    writer.submit(1)
+    try:
+        assert written.wait(timeout=5)
+        assert writer.stats()["written"] == 1
+    finally:
+        writer.close()
+
+
+def test_on_written_gets_each_record_with_its_id():
+    results = []
+    writer = ViolationWriter(
+        RecordingBatchWriter(fail_on={5}),
+        batch_size=2,
+        flush_interval=60,
+        on_written=lambda record, violation_id: results.append((record, violation_id)),
+    )
+    writer.start()
+
+    for record in (1, 2, 5, 6):
+        writer.submit(record)
+    writer.close()
+
+    assert results == [(1, 10), (2, 20), (5, None), (6, None)]
+    assert writer.stats()["failed"] == 2
+
+
+def test_callback_errors_do_not_stop_the_writer():
+    def on_written(record, violation_id):
+        raise ValueError("callback bug")
+
+    writer = ViolationWriter(RecordingBatchWriter(), batch_size=1, on_written=on_written)
+    writer.start()
+
+    for record in (1, 2):
+        writer.submit(record)
+    writer.close()
+
+    assert writer.stats()["written"] == 2
+
+
+# ---------------------------------------------------------
+# The detector's write_batch: one transaction, single-record retry
+# ---------------------------------------------------------
+@pytest.fixture
+def detector(tmp_path, monkeypatch):
+    # The detector module imports OpenCV; without it only the tests
+    # above run
+    pytest.importorskip("cv2")
+    from cv_module import detector
+    from database.connection_pool import DatabasePools
+    from database.migrate import migrate
+
+    pools = DatabasePools(tmp_path / "itms.db")
+    with pools.write() as conn:
+        migrate(conn)
+        conn.execute("INSERT INTO intersection (intersection_id, name) VALUES (1, 'Main St')")
+        conn.commit()
+
+    monkeypatch.setattr(detector, "db_pools", pools)
+    yield detector
+    pools.close()
+
+
+def stored_ids(detector):
+    with detector.db_pools.read() as conn:
+        return [row[0] for row in conn.execute("SELECT violation_id FROM violation ORDER BY 1")]
+
+
+def test_write_violations_uses_consecutive_ids(detector):
+    records = [detector.violation_record(f"ABC-{n}", "car", 90.0, None) for n in range(3)]
+
+    violation_ids = detector.write_violations(records)
+
+    assert violation_ids == [1, 2, 3]
+    assert stored_ids(detector) == [1, 2, 3]
+
+
+def test_failed_batch_is_retried_one_record_at_a_time(detector):
+    records = [detector.violation_record(f"ABC-{n}", "car", 90.0, None) for n in range(3)]
+    # Not bindable: fails the executemany for the whole batch
+    records[1]["timestamp"] = object()
+
+    violation_ids = detector.write_violations(records)
+
+    assert violation_ids[1] is None
+    assert None not in (violation_ids[0], violation_ids[2])
+    assert stored_ids(detector) == sorted([violation_ids[0], violation_ids[2]])
+
+
+def test_unknown_intersection_is_skipped_not_retried(detector):
+    records = [
+        detector.violation_record("ABC-1", "car", 90.0, None, intersection_id=1),
+        detector.violation_record("ABC-2", "car", 90.0, None, intersection_id=99),
+    ]
+
+    assert detector.write_violations(records) == [1, None]
+
+
+def locked_until(detector, monkeypatch, failures):
+    """Makes insert_violations hit "database is locked" for the first calls."""
+    insert_violations = detector.insert_violations
+    calls = []
+
+    def flaky_insert(conn, records):
+        calls.append(len(records))
+        if len(calls) <= failures:
+            raise sqlite3.OperationalError("database is locked")
+        return insert_violations(conn, records)
+
+    monkeypatch.setattr(detector, "insert_violations", flaky_insert)
+    monkeypatch.setattr(detector, "WRITE_BUSY_BACKOFF_SECONDS", 0)
+    return calls
+
+
+def spooled_record(detector, tmp_path, intersection_id=1):
+    spool = {}
+    for key in ("clip_spool_path", "snapshot_spool_path"):
+        path = tmp_path / f"{key}.bin"
+        path.write_bytes(b"spool")
+        spool[key] = str(path)
+    spool.update(video_basename="violation_1", fps=10.0)
+    return detector.violation_record(
+        "ABC-1", "car", 90.0, None, evidence_spool=spool, intersection_id=intersection_id
+    )
+
+
+def spool_exists(record):
+    spool = record["evidence_spool"]
+    return all(Path(spool[key]).exists() for key in ("clip_spool_path", "snapshot_spool_path"))
+
+
+def test_locked_database_is_retried_with_backoff(detector, monkeypatch):
+    calls = locked_until(detector, monkeypatch, failures=2)
+    records = [detector.violation_record(f"ABC-{n}", "car", 90.0, None) for n in range(2)]
+
+    assert detector.write_violations(records) == [1, 2]
+    assert calls == [2, 2, 2]
+
+
+def test_record_that_stays_locked_keeps_its_spool(detector, monkeypatch, tmp_path):
+    locked_until(detector, monkeypatch, failures=detector.WRITE_BUSY_RETRIES + 1)
+    record = spooled_record(detector, tmp_path)
+
+    assert detector.write_violations([record]) == [None]
+    assert spool_exists(record)
+    assert stored_ids(detector) == []
+
+
+def test_unknown_intersection_removes_its_spool(detector, tmp_path):
+    record = spooled_record(detector, tmp_path, intersection_id=99)
+
+    assert detector.write_violations([record]) == [None]
+    assert not spool_exists(record)
@@ -0,0 +1,175 @@
+# cv_module/tracker.py
+"""
+Lightweight IoU multi-object tracker with a centroid fallback.
+
+Gives each vehicle a persistent track ID so line crossing is decided once
+per vehicle instead of once per box. Matching is greedy: best IoU first,
+then nearest centroid for boxes that moved too far to overlap (e.g. when
+frames were dropped under load). Between detection frames, predict()
+moves each track along its last measured velocity so boxes stay on the
+vehicles when detection runs only every few frames.
+"""
+from itertools import count
+
+
+def iou(a, b):
+    x1 = max(a[0], b[0])
+    y1 = max(a[1], b[1])
+    x2 = min(a[2], b[2])
+    y2 = min(a[3], b[3])
+
+    inter = max(0, x2 - x1) * max(0, y2 - y1)
+    if inter == 0:
+        return 0.0
+
+    area_a = (a[2] - a[0]) * (a[3] - a[1])
+    area_b = (b[2] - b[0]) * (b[3] - b[1])
+    return inter / float(area_a + area_b - inter)
+
+
+def centroid(box):
+    return (box[0] + box[2]) / 2.0, (box[1] + box[3]) / 2.0
+
+
+class Track:
+    __slots__ = (
+        "track_id", "bbox", "cls", "hits", "misses", "prev_bottom", "crossed",
+        "detected", "velocity", "predicted",
+    )
+
+    def __init__(self, track_id, bbox, cls):
+        self.track_id = track_id
+        self.bbox = bbox
+        self.cls = cls
+        self.hits = 1
+        self.misses = 0
+        self.prev_bottom = None
+        self.crossed = False
+        self.detected = bbox          # last detected box; bbox may be predicted
+        self.velocity = (0.0, 0.0, 0.0, 0.0)
+        self.predicted = 0            # frames predicted since the last detection
+
+    def update(self, bbox, cls):
+        # Crossing and velocity use the last detected box, not a prediction
+        frames = self.predicted + 1
+        self.velocity = tuple((new - old) / frames for new, old in zip(bbox, self.detected))
+        self.prev_bottom = self.detected[3]
+        self.bbox = bbox
+        self.detected = bbox
+        self.predicted = 0
+        self.cls = cls
+        self.hits += 1
+        self.misses = 0
+
+    def predict(self):
+        self.predicted += 1
+        self.bbox = tuple(
+            int(round(edge + speed * self.predicted))
+            for edge, speed in zip(self.detected, self.velocity)
+        )
+
+    def crossed_line(self, line_y):
+        """
+        True exactly once: on the update where the box bottom first moves
+        from above (or on) the line to below it.
+        """
+        if self.crossed or self.prev_bottom is None:
+            return False
+
+        if self.prev_bottom <= line_y < self.bbox[3]:
+            self.crossed = True
+            return True
+        return False
+
+
+class IouTracker:
+    def __init__(self, iou_threshold=0.3, max_misses=15, max_centroid_distance=1.0, on_removed=None):
+        """
+        max_centroid_distance is relative to the track's box diagonal.
+        on_removed(track) is called when a track expires.
+        """
+        self.iou_threshold = iou_threshold
+        self.max_misses = max_misses
+        self.max_centroid_distance = max_centroid_distance
+        self.on_removed = on_removed
+
+        self.tracks = {}
+        self._ids = count(1)
+
+    def _match(self, detections):
+        """Greedy IoU matching, then centroid matching for the leftovers."""
+        matches = {}
+        free_tracks = set(self.tracks)
+        free_detections = set(range(len(detections)))
+
+        candidates = []
+        for track_id, track in self.tracks.items():
+            for index, (bbox, _) in enumerate(detections):
+                overlap = iou(track.bbox, bbox)
+                if overlap >= self.iou_threshold:
+                    candidates.append((overlap, track_id, index))
+
+        for _, track_id, index in sorted(candidates, reverse=True):
+            if track_id in free_tracks and index in free_detections:
+                matches[index] = track_id
+                free_tracks.discard(track_id)
+                free_detections.discard(index)
+
+        candidates = []
+        for track_id in free_tracks:
+            track = self.tracks[track_id]
+            tx, ty = centroid(track.bbox)
+            diagonal = ((track.bbox[2] - track.bbox[0]) ** 2 + (track.bbox[3] - track.bbox[1]) ** 2) ** 0.5
+            for index in free_detections:
+                dx, dy = centroid(detections[index][0])
+                distance = ((tx - dx) ** 2 + (ty - dy) ** 2) ** 0.5
+                if distance <= self.max_centroid_distance * diagonal:
+                    candidates.append((distance, track_id, index))
+
+        for _, track_id, index in sorted(candidates):
+            if track_id in free_tracks and index in free_detections:
+                matches[index] = track_id
+                free_tracks.discard(track_id)
+                free_detections.discard(index)
+
+        return matches, free_tracks, free_detections
+
+    def update(self, detections):
+        """
+        detections: [((x1, y1, x2, y2), cls), ...] for one frame.
+        Returns the tracks seen in this frame, in detection order.
+        """
+        matches, missed_tracks, new_detections = self._match(detections)
+
+        for track_id in missed_tracks:
+            track = self.tracks[track_id]
+            track.misses += 1
+            if track.misses > self.max_misses:
+                del self.tracks[track_id]
+                if self.on_removed is not None:
+                    self.on_removed(track)
+
+        seen = []
+        for index, (bbox, cls) in enumerate(detections):
+            if index in new_detections:
+                track = Track(next(self._ids), bbox, cls)
+                self.tracks[track.track_id] = track
+            else:
+                track = self.tracks[matches[index]]
+                track.update(bbox, cls)
+            seen.append(track)
+
+        return seen
+
+    def predict(self):
+        """
+        Advances every track one frame without a detection. Returns the
+        tracks matched on the last detection frame, with predicted boxes.
+        Misses are not counted: only detection frames can expire a track.
+        """
+        moving = []
+        for track in self.tracks.values():
+            if track.misses == 0:
+                track.predict()
+                moving.append(track)
+        return moving
@@ -0,0 +1,107 @@
+# cv_module/violation_writer.py
+"""
+Batched violation writes for the detector pipeline.
+
+The evidence stage submits finished events and moves on. A writer thread
+collects them and hands them to write_batch every batch_size events or
+flush_interval seconds after the first one arrived, whichever comes
+first, so a burst of crossings costs one transaction and one commit
+(one WAL fsync) instead of one per event. A lone event waits at most
+flush_interval before it is written.
+"""
+import queue
+import threading
+import time
+
+from cv_module.pipeline import STOP
+
+VIOLATION_BATCH_SIZE = 32
+VIOLATION_FLUSH_INTERVAL_SECONDS = 0.25
+
+
+class ViolationWriter:
+    def __init__(self, write_batch, batch_size=VIOLATION_BATCH_SIZE,
+                 flush_interval=VIOLATION_FLUSH_INTERVAL_SECONDS, on_written=None):
+        """
+        write_batch(records) returns [violation_id or None, ...] in record
+        order. on_written(record, violation_id) runs on the writer thread
+        for every record once its batch is done.
+        """
+        self.write_batch = write_batch
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.on_written = on_written
+
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="itms-violation-writer", daemon=True)
+
+        self.batches = 0
+        self.written = 0
+        self.failed = 0
+
+    def start(self):
+        self._thread.start()
+
+    def submit(self, record):
+        self._queue.put(record)
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def close(self):
+        """Writes everything submitted so far, then stops the thread."""
+        self._queue.put(STOP)
+        self._thread.join()
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "written": self.written,
+            "failed": self.failed,
+            "pending": self.pending(),
+        }
+
+    def _run(self):
+        batch = []
+        deadline = None
+        stopping = False
+
+        while not stopping:
+            timeout = max(deadline - time.monotonic(), 0) if batch else None
+            try:
+                record = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                record = None
+
+            if record is STOP:
+                stopping = True
+            elif record is not None:
+                if not batch:
+                    deadline = time.monotonic() + self.flush_interval
+                batch.append(record)
+
+            if batch and (
+                stopping or len(batch) >= self.batch_size or time.monotonic() >= deadline
+            ):
+                self._flush(batch)
+                batch = []
+
+    def _flush(self, batch):
+        try:
+            violation_ids = self.write_batch(batch)
+        except Exception as e:
+            print(f"❌ Violation batch of {len(batch)} failed: {e}")
+            violation_ids = [None] * len(batch)
+
+        self.batches += 1
+        for record, violation_id in zip(batch, violation_ids):
+            if violation_id is None:
+                self.failed += 1
+            else:
+                self.written += 1
+
+            if self.on_written is not None:
+                try:
+                    self.on_written(record, violation_id)
+                except Exception as e:
+                    print(f"⚠️ Violation callback error: {e}")
@@ -53,11 +53,13 @@ def execute_query(query, params=()):
         conn.close()
 
 # --- FETCH KPI METRICS ---
-df_all = fetch_data("SELECT * FROM violation")
-if not df_all.empty:
-    total_flagged = len(df_all[df_all['status'] == 'Pending'])
-    total_approved = len(df_all[df_all['status'].isin(['Approved', 'AutoApproved'])])
-    total_rejected = len(df_all[df_all['status'] == 'Rejected'])
+# violation_status_counts is kept current by triggers, one row per status
+df_counts = fetch_data("SELECT status, count FROM violation_status_counts")
+if not df_counts.empty:
+    status_counts = dict(zip(df_counts['status'], df_counts['count']))
+    total_flagged = int(status_counts.get('Pending', 0))
+    total_approved = int(status_counts.get('Approved', 0) + status_counts.get('AutoApproved', 0))
+    total_rejected = int(status_counts.get('Rejected', 0))
 else:
     total_flagged = total_approved = total_rejected = 0
 
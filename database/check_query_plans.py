@@ -0,0 +1,232 @@
+import re
+import sqlite3
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# Make project root importable when run as a script from database/
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.append(str(PROJECT_ROOT))
+
+from api.violation_pages import build_evidence_search_query, build_page_query
+from database.migrate import migrate
+
+CURSOR = ("2026-01-01 00:00:00", 100)
+TAIL_CURSOR = (None, 100)
+
+
+def page_queries(endpoint, status=None):
+    """Every segment fetch_violation_page can run for one status filter."""
+    return [
+        (f"{endpoint} (first page)", *build_page_query(51, status)),
+        (f"{endpoint} (after cursor)", *build_page_query(51, status, CURSOR)),
+        (f"{endpoint} (NULL-timestamp tail)", *build_page_query(51, status, dated=False)),
+        (
+            f"{endpoint} (NULL-timestamp tail, after cursor)",
+            *build_page_query(51, status, TAIL_CURSOR, dated=False),
+        ),
+    ]
+
+
+# (name, sql, params) for every query an API endpoint runs against a
+# table that grows. The violation list and evidence search SQL comes from
+# the builders api/main.py uses; keep the rest in sync with it.
+ENDPOINT_QUERIES = [
+    (
+        "GET /api/stats",
+        "SELECT status, count FROM violation_status_counts",
+        (),
+    ),
+    (
+        "GET /api/stats?intersectionId=&dateFrom=",
+        """
+        SELECT status, SUM(count) as count
+        FROM violation_daily_status_counts
+        WHERE 1=1 AND intersection_id = ? AND day >= DATE(?)
+        GROUP BY status
+        """,
+        (1, "2026-01-01"),
+    ),
+    *page_queries("GET /api/violations"),
+    *page_queries("GET /api/review-queue?status=Pending", "Pending"),
+    *page_queries("GET /api/violations?status=Approved", "Approved"),
+    (
+        "GET /api/evidence-search?dateFrom=&dateTo=",
+        *build_evidence_search_query(date_from="2026-01-01", date_to="2026-01-31"),
+    ),
+    (
+        "GET /api/evidence-search?status=Pending&dateFrom=",
+        *build_evidence_search_query(date_from="2026-01-01", status="Pending"),
+    ),
+    (
+        "GET /api/evidence-search?status=Approved&dateTo=",
+        *build_evidence_search_query(date_to="2026-01-31", status="Approved"),
+    ),
+    # LIKE '%...%' filters rows while walking the timestamp index
+    (
+        "GET /api/evidence-search?plateNumber=&intersection=",
+        *build_evidence_search_query(plate_number="ABC", intersection="main"),
+    ),
+    (
+        "GET /api/evidence-search?plateNumber=&status=Approved",
+        *build_evidence_search_query(plate_number="ABC", status="Approved"),
+    ),
+    (
+        "POST /api/review-queue/{id}/decision",
+        """
+        SELECT violation_id, status, reviewer_user_id, reviewed_at, review_note
+        FROM violation
+        WHERE violation_id = ?
+        """,
+        (1,),
+    ),
+    (
+        "SMS live-row lookup",
+        """
+        SELECT notification_id, violation_id, status, recipient_phone, request_count
+        FROM notification_log
+        WHERE violation_id IN (?, ?)
+          AND channel = 'SMS'
+          AND status IN ('Queued', 'Sent', 'Skipped')
+        """,
+        (1, 2),
+    ),
+    (
+        "SMS worker claim",
+        """
+        SELECT notification_id, violation_id, attempt_count, requested_by, request_note
+        FROM notification_log
+        WHERE status = 'Queued'
+          AND next_attempt_at <= CURRENT_TIMESTAMP
+        ORDER BY next_attempt_at
+        LIMIT ?
+        """,
+        (50,),
+    ),
+    (
+        "evidence service: claim due jobs",
+        """
+        SELECT job_id, violation_id, clip_spool_path, snapshot_spool_path,
+               image_filename, video_basename, fps, attempt_count
+        FROM evidence_job
+        WHERE status = 'Queued'
+          AND next_attempt_at <= CURRENT_TIMESTAMP
+        ORDER BY next_attempt_at
+        LIMIT ?
+        """,
+        (8,),
+    ),
+    (
+        "POST /api/notifications/sms/resend-approved-today",
+        """
+        SELECT violation_id
+        FROM violation
+        WHERE (status = 'Approved' AND reviewed_at >= ? AND reviewed_at < ?)
+           OR (status = 'AutoApproved' AND timestamp >= ? AND timestamp < ?)
+        """,
+        ("2026-01-01 00:00:00", "2026-01-02 00:00:00") * 2,
+    ),
+    (
+        "GET /api/notifications/sms",
+        """
+        SELECT n.notification_id, n.violation_id, n.status, n.created_at
+        FROM notification_log n
+        WHERE n.channel = 'SMS'
+          AND n.status != 'Superseded'
+        ORDER BY n.created_at DESC
+        """,
+        (),
+    ),
+    (
+        "GET /api/audit-log",
+        """
+        SELECT a.audit_id, a.timestamp, a.action_type, u.full_name as actor_name
+        FROM audit_log a
+        LEFT JOIN system_user u ON a.user_id = u.user_id
+        ORDER BY a.timestamp DESC
+        """,
+        (),
+    ),
+]
+
+# Known exceptions: endpoint name -> why its plan is accepted as is.
+# These are still explained and reported, but do not fail the check.
+# Empty for now: a substring LIKE in the evidence search cannot seek, but
+# it walks the timestamp index in order (+v.status IN keeps it there), so
+# it needs no exception.
+ALLOWED_PLANS = {}
+
+# "SCAN v" with no index is a full table scan. "SCAN v USING [COVERING]
+# INDEX ..." walks an index in order and is allowed.
+FULL_SCAN_PATTERN = re.compile(r"^SCAN (\w+)$")
+
+# Tables whose size does not grow with traffic; scanning them is fine.
+BOUNDED_TABLES = {"violation_status_counts"}
+TEMP_SORT_PATTERN = re.compile(r"USE TEMP B-TREE FOR ORDER BY")
+
+
+def explain(conn, sql, params):
+    c = conn.cursor()
+    c.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+    return [row[3] for row in c.fetchall()]
+
+
+def check_query_plans(conn):
+    """
+    Returns a list of (name, problem, plan) for every endpoint query that
+    falls back to a full table scan or sorts its whole result set, except
+    the ones listed in ALLOWED_PLANS.
+    """
+    failures = []
+
+    for name, sql, params in ENDPOINT_QUERIES:
+        if name in ALLOWED_PLANS:
+            continue
+
+        plan = explain(conn, sql, params)
+
+        for detail in plan:
+            full_scan = FULL_SCAN_PATTERN.match(detail.strip())
+            if full_scan and full_scan.group(1) not in BOUNDED_TABLES:
+                failures.append((name, f"full scan: {detail}", plan))
+            elif TEMP_SORT_PATTERN.search(detail):
+                failures.append((name, f"unindexed sort: {detail}", plan))
+
+    return failures
+
+
+def main(db_path=None):
+    # Default to a throwaway database migrated to the latest version so the
+    # check reflects the schema in migrate.py, not whatever is on disk.
+    conn = sqlite3.connect(str(db_path) if db_path else ":memory:")
+    try:
+        migrate(conn)
+        failures = check_query_plans(conn)
+        allowed = {
+            name: explain(conn, sql, params)
+            for name, sql, params in ENDPOINT_QUERIES
+            if name in ALLOWED_PLANS
+        }
+    finally:
+        conn.close()
+
+    for name, plan in allowed.items():
+        print(f"⚠️ {name}: allowed, {ALLOWED_PLANS[name]}")
+        for detail in plan:
+            print(f"     {detail}")
+
+    if not failures:
+        checked = len(ENDPOINT_QUERIES) - len(allowed)
+        print(f"✅ All {checked} checked endpoint queries use an index.")
+        return 0
+
+    for name, problem, plan in failures:
+        print(f"❌ {name}: {problem}")
+        for detail in plan:
+            print(f"     {detail}")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1] if len(sys.argv) > 1 else None))
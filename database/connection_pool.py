@@ -0,0 +1,232 @@
+from contextlib import contextmanager
+from pathlib import Path
+import queue
+import sqlite3
+import threading
+import time
+
+DB_PATH = Path(__file__).resolve().parent / "itms_production.db"
+
+BUSY_TIMEOUT_MS = 5000
+CACHE_SIZE_KIB = 16 * 1024          # negative cache_size is in KiB
+MMAP_SIZE_BYTES = 256 * 1024 * 1024
+DEFAULT_READ_POOL_SIZE = 8
+
+
+class PoolTimeout(Exception):
+    """Raised when no pooled connection frees up within the timeout."""
+
+
+def configure_connection(conn, read_only=False):
+    """
+    Apply the PRAGMAs every ITMS connection should run with. The journal
+    mode is not set here: enable_wal sets it once for the database file.
+    """
+    conn.row_factory = sqlite3.Row
+    conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS};")
+    conn.execute("PRAGMA foreign_keys = ON;")
+    conn.execute("PRAGMA synchronous = NORMAL;")
+    conn.execute(f"PRAGMA cache_size = -{CACHE_SIZE_KIB};")
+    conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE_BYTES};")
+    conn.execute("PRAGMA temp_store = MEMORY;")
+
+    if read_only:
+        conn.execute("PRAGMA query_only = ON;")
+
+    return conn
+
+
+def enable_wal(db_path):
+    """
+    Switch the database file to WAL, which lets readers proceed while the
+    single writer commits. The mode is stored in the file, so this runs
+    once per pool set, before its first connection (reader or writer)
+    is opened.
+    """
+    conn = sqlite3.connect(str(db_path), timeout=BUSY_TIMEOUT_MS / 1000)
+    try:
+        conn.execute("PRAGMA journal_mode = WAL;")
+    finally:
+        conn.close()
+
+
+class ConnectionPool:
+    """
+    A bounded set of reusable SQLite connections.
+
+    A thread checks a connection out for the duration of a `with` block and
+    hands it back afterwards, so connections are opened once and reused
+    across requests. Time spent waiting for a free connection is recorded.
+    """
+
+    def __init__(self, db_path, size, read_only=False, timeout=10.0, name=None,
+                 before_open=None):
+        """before_open() runs before each new connection is opened."""
+        self.db_path = str(db_path)
+        self.size = size
+        self.read_only = read_only
+        self.timeout = timeout
+        self.name = name or ("read" if read_only else "write")
+        self.before_open = before_open
+
+        self._idle = queue.LifoQueue(maxsize=size)
+        self._created = 0
+        self._lock = threading.Lock()
+
+        self._acquisitions = 0
+        self._timeouts = 0
+        self._in_use = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    def _open(self):
+        # Connections move between the threads of the API worker pool, but
+        # only one thread holds a given connection at a time.
+        if self.before_open is not None:
+            self.before_open()
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=BUSY_TIMEOUT_MS / 1000,
+            check_same_thread=False,
+        )
+        return configure_connection(conn, read_only=self.read_only)
+
+    def _checkout(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                create = True
+            else:
+                create = False
+
+        if create:
+            try:
+                return self._open()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            with self._lock:
+                self._timeouts += 1
+            raise PoolTimeout(
+                f"No {self.name} connection available after {self.timeout:.1f}s"
+            )
+
+    def _checkin(self, conn):
+        if conn.in_transaction:
+            # Whatever the caller did not commit is abandoned
+            conn.rollback()
+        self._idle.put_nowait(conn)
+
+    @contextmanager
+    def connection(self):
+        started = time.perf_counter()
+        conn = self._checkout()
+        waited = time.perf_counter() - started
+
+        with self._lock:
+            self._acquisitions += 1
+            self._in_use += 1
+            self._total_wait += waited
+            self._max_wait = max(self._max_wait, waited)
+
+        try:
+            yield conn
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            with self._lock:
+                self._in_use -= 1
+            self._checkin(conn)
+
+    def stats(self):
+        with self._lock:
+            acquisitions = self._acquisitions
+            return {
+                "name": self.name,
+                "size": self.size,
+                "open": self._created,
+                "inUse": self._in_use,
+                "acquisitions": acquisitions,
+                "timeouts": self._timeouts,
+                "totalWaitMs": round(self._total_wait * 1000, 3),
+                "avgWaitMs": round(self._total_wait * 1000 / acquisitions, 3) if acquisitions else 0.0,
+                "maxWaitMs": round(self._max_wait * 1000, 3),
+            }
+
+    def close(self):
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._created -= 1
+
+
+class DatabasePools:
+    """
+    Read pool for queries plus a single serialized writer for one database.
+    """
+
+    def __init__(self, db_path=DB_PATH, read_size=DEFAULT_READ_POOL_SIZE):
+        self.db_path = db_path
+        self._wal_enabled = False
+        self._wal_lock = threading.Lock()
+        self.writer = ConnectionPool(
+            db_path, size=1, name="write", before_open=self._ensure_wal
+        )
+        self.reader = ConnectionPool(
+            db_path, size=read_size, read_only=True, name="read", before_open=self._ensure_wal
+        )
+
+    def _ensure_wal(self):
+        # Pools open lazily, so importing a module that builds them does
+        # not touch the database file
+        with self._wal_lock:
+            if not self._wal_enabled:
+                enable_wal(self.db_path)
+                self._wal_enabled = True
+
+    def read(self):
+        return self.reader.connection()
+
+    def write(self):
+        return self.writer.connection()
+
+    def stats(self):
+        return {
+            "dbPath": str(self.db_path),
+            "read": self.reader.stats(),
+            "write": self.writer.stats(),
+        }
+
+    def close(self):
+        self.reader.close()
+        self.writer.close()
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pools(db_path=DB_PATH, read_size=DEFAULT_READ_POOL_SIZE):
+    """Process-wide pools, one set per database file."""
+    key = str(Path(db_path).resolve())
+    with _pools_lock:
+        pools = _pools.get(key)
+        if pools is None:
+            pools = DatabasePools(db_path, read_size=read_size)
+            _pools[key] = pools
+        return pools
@@ -0,0 +1,532 @@
+from pathlib import Path
+import sqlite3
+
+DB_PATH = Path(__file__).resolve().parent / "itms_production.db"
+
+# Each migration is (version, description, [statements]).
+# Versions are applied in order, once, each inside its own transaction.
+# Never edit a migration that has shipped; append a new one instead.
+MIGRATIONS = [
+    (
+        1,
+        "Baseline ERD schema",
+        [
+            """
+            CREATE TABLE IF NOT EXISTS driver (
+                driver_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                full_name TEXT NOT NULL,
+                national_id TEXT UNIQUE NOT NULL,
+                phone_number TEXT
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS system_user (
+                user_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                full_name TEXT NOT NULL,
+                role TEXT CHECK(role IN ('Admin', 'Officer', 'Operator')),
+                username TEXT UNIQUE NOT NULL,
+                password_hash TEXT NOT NULL,
+                is_active BOOLEAN DEFAULT 1
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS intersection (
+                intersection_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                location TEXT,
+                region TEXT
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS vehicle (
+                plate_number TEXT PRIMARY KEY,
+                model TEXT,
+                color TEXT,
+                owner_id INTEGER,
+                is_exempt BOOLEAN DEFAULT 0,
+                FOREIGN KEY (owner_id) REFERENCES driver(driver_id)
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS traffic_stats (
+                stat_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                intersection_id INTEGER,
+                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                avg_queue_length INTEGER,
+                phase_duration INTEGER,
+                FOREIGN KEY (intersection_id) REFERENCES intersection(intersection_id)
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS violation (
+                violation_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                plate_number TEXT,
+                intersection_id INTEGER,
+                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                image_path TEXT,
+                video_path TEXT,
+                confidence_score REAL,
+                decision_type TEXT CHECK(decision_type IN ('Auto', 'Flagged', 'LoggedOnly')),
+                status TEXT CHECK(status IN ('Pending', 'Approved', 'Rejected', 'AutoApproved', 'Paid')),
+                fine_amount REAL,
+                reviewer_user_id INTEGER,
+                reviewed_at DATETIME,
+                review_note TEXT,
+                FOREIGN KEY (plate_number) REFERENCES vehicle(plate_number),
+                FOREIGN KEY (intersection_id) REFERENCES intersection(intersection_id),
+                FOREIGN KEY (reviewer_user_id) REFERENCES system_user(user_id)
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS system_config (
+                config_key TEXT PRIMARY KEY,
+                config_value TEXT,
+                updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                updated_by INTEGER,
+                FOREIGN KEY (updated_by) REFERENCES system_user(user_id)
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS audit_log (
+                audit_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                user_id INTEGER,
+                action_type TEXT,
+                entity_type TEXT,
+                entity_id TEXT,
+                old_value JSON,
+                new_value JSON,
+                note TEXT,
+                FOREIGN KEY (user_id) REFERENCES system_user(user_id)
+            )
+            """,
+        ],
+    ),
+    (
+        2,
+        "notification_log table",
+        [
+            """
+            CREATE TABLE IF NOT EXISTS notification_log (
+                notification_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                violation_id INTEGER NOT NULL,
+                channel TEXT NOT NULL CHECK(channel IN ('SMS')),
+                recipient_phone TEXT,
+                message_text TEXT,
+                status TEXT NOT NULL CHECK(status IN ('Queued', 'Sent', 'Failed', 'Skipped')),
+                provider TEXT,
+                provider_message_id TEXT,
+                error_message TEXT,
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                sent_at DATETIME,
+                FOREIGN KEY (violation_id) REFERENCES violation(violation_id)
+            )
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS idx_notification_log_violation_id
+            ON notification_log(violation_id)
+            """,
+        ],
+    ),
+    (
+        3,
+        "Covering indexes for API access paths",
+        [
+            # Keyset pages ordered by (timestamp, violation_id) DESC
+            """
+            CREATE INDEX IF NOT EXISTS idx_violation_timestamp_id
+            ON violation(timestamp DESC, violation_id DESC)
+            """,
+            # Single-status pages; its (status) prefix also covers
+            # /api/stats GROUP BY status, so no separate status index
+            """
+            CREATE INDEX IF NOT EXISTS idx_violation_status_timestamp_id
+            ON violation(status, timestamp DESC, violation_id DESC)
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS idx_violation_intersection_timestamp
+            ON violation(intersection_id, timestamp)
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS idx_audit_log_timestamp
+            ON audit_log(timestamp)
+            """,
+            # Superseded by the composite index below
+            "DROP INDEX IF EXISTS idx_notification_log_violation_id",
+            """
+            CREATE INDEX IF NOT EXISTS idx_notification_log_violation_channel_status
+            ON notification_log(violation_id, channel, status, created_at)
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS idx_notification_log_channel_created_at
+            ON notification_log(channel, created_at)
+            """,
+        ],
+    ),
+    (
+        4,
+        "Trigger-maintained violation status counters",
+        [
+            # Whole-table totals, one row per status: what /api/stats reads
+            """
+            CREATE TABLE IF NOT EXISTS violation_status_counts (
+                status TEXT PRIMARY KEY,
+                count INTEGER NOT NULL DEFAULT 0
+            )
+            """,
+            # Same counts split by intersection and day (intersection 0 = none)
+            """
+            CREATE TABLE IF NOT EXISTS violation_daily_status_counts (
+                intersection_id INTEGER NOT NULL,
+                day TEXT NOT NULL,
+                status TEXT NOT NULL,
+                count INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (intersection_id, day, status)
+            ) WITHOUT ROWID
+            """,
+            """
+            INSERT INTO violation_status_counts (status, count)
+            SELECT status, COUNT(*)
+            FROM violation
+            WHERE status IS NOT NULL
+            GROUP BY status
+            """,
+            """
+            INSERT INTO violation_daily_status_counts (intersection_id, day, status, count)
+            SELECT COALESCE(intersection_id, 0), COALESCE(DATE(timestamp), ''), status, COUNT(*)
+            FROM violation
+            WHERE status IS NOT NULL
+            GROUP BY 1, 2, 3
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS trg_violation_counts_insert
+            AFTER INSERT ON violation
+            WHEN NEW.status IS NOT NULL
+            BEGIN
+                INSERT INTO violation_status_counts (status, count)
+                VALUES (NEW.status, 1)
+                ON CONFLICT(status) DO UPDATE SET count = count + 1;
+
+                INSERT INTO violation_daily_status_counts (intersection_id, day, status, count)
+                VALUES (COALESCE(NEW.intersection_id, 0), COALESCE(DATE(NEW.timestamp), ''), NEW.status, 1)
+                ON CONFLICT(intersection_id, day, status) DO UPDATE SET count = count + 1;
+            END
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS trg_violation_counts_delete
+            AFTER DELETE ON violation
+            WHEN OLD.status IS NOT NULL
+            BEGIN
+                UPDATE violation_status_counts
+                SET count = count - 1
+                WHERE status = OLD.status;
+
+                UPDATE violation_daily_status_counts
+                SET count = count - 1
+                WHERE intersection_id = COALESCE(OLD.intersection_id, 0)
+                  AND day = COALESCE(DATE(OLD.timestamp), '')
+                  AND status = OLD.status;
+            END
+            """,
+            # An update is a delete of the old bucket plus an insert into the new one
+            """
+            CREATE TRIGGER IF NOT EXISTS trg_violation_counts_update_old
+            AFTER UPDATE OF status, intersection_id, timestamp ON violation
+            WHEN OLD.status IS NOT NULL
+            BEGIN
+                UPDATE violation_status_counts
+                SET count = count - 1
+                WHERE status = OLD.status;
+
+                UPDATE violation_daily_status_counts
+                SET count = count - 1
+                WHERE intersection_id = COALESCE(OLD.intersection_id, 0)
+                  AND day = COALESCE(DATE(OLD.timestamp), '')
+                  AND status = OLD.status;
+            END
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS trg_violation_counts_update_new
+            AFTER UPDATE OF status, intersection_id, timestamp ON violation
+            WHEN NEW.status IS NOT NULL
+            BEGIN
+                INSERT INTO violation_status_counts (status, count)
+                VALUES (NEW.status, 1)
+                ON CONFLICT(status) DO UPDATE SET count = count + 1;
+
+                INSERT INTO violation_daily_status_counts (intersection_id, day, status, count)
+                VALUES (COALESCE(NEW.intersection_id, 0), COALESCE(DATE(NEW.timestamp), ''), NEW.status, 1)
+                ON CONFLICT(intersection_id, day, status) DO UPDATE SET count = count + 1;
+            END
+            """,
+        ],
+    ),
+    (
+        5,
+        "SMS outbox retry bookkeeping",
+        [
+            "ALTER TABLE notification_log ADD COLUMN attempt_count INTEGER NOT NULL DEFAULT 0",
+            "ALTER TABLE notification_log ADD COLUMN next_attempt_at DATETIME",
+            "ALTER TABLE notification_log ADD COLUMN requested_by INTEGER REFERENCES system_user(user_id)",
+            "ALTER TABLE notification_log ADD COLUMN request_note TEXT",
+            # The worker drains due Queued rows in created order
+            """
+            CREATE INDEX IF NOT EXISTS idx_notification_log_status_next_attempt
+            ON notification_log(status, next_attempt_at)
+            """,
+        ],
+    ),
+    (
+        6,
+        "Index for approved-today lookups",
+        [
+            """
+            CREATE INDEX IF NOT EXISTS idx_violation_status_reviewed_at
+            ON violation(status, reviewed_at)
+            """,
+        ],
+    ),
+    (
+        7,
+        "Idempotent SMS: one live notification_log row per violation and channel",
+        [
+            # Rebuild the table to add request_count/last_requested_at and
+            # widen the status CHECK with 'Superseded': duplicates are
+            # retired to it below, never deleted, so no Sent row is lost.
+            """
+            CREATE TABLE notification_log_new (
+                notification_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                violation_id INTEGER NOT NULL,
+                channel TEXT NOT NULL CHECK(channel IN ('SMS')),
+                recipient_phone TEXT,
+                message_text TEXT,
+                status TEXT NOT NULL
+                    CHECK(status IN ('Queued', 'Sent', 'Failed', 'Skipped', 'Superseded')),
+                provider TEXT,
+                provider_message_id TEXT,
+                error_message TEXT,
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                sent_at DATETIME,
+                attempt_count INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at DATETIME,
+                requested_by INTEGER REFERENCES system_user(user_id),
+                request_note TEXT,
+                request_count INTEGER NOT NULL DEFAULT 1,
+                last_requested_at DATETIME,
+                FOREIGN KEY (violation_id) REFERENCES violation(violation_id)
+            )
+            """,
+            """
+            INSERT INTO notification_log_new (
+                notification_id, violation_id, channel, recipient_phone,
+                message_text, status, provider, provider_message_id,
+                error_message, created_at, sent_at, attempt_count,
+                next_attempt_at, requested_by, request_note
+            )
+            SELECT
+                notification_id, violation_id, channel, recipient_phone,
+                message_text, status, provider, provider_message_id,
+                error_message, created_at, sent_at, attempt_count,
+                next_attempt_at, requested_by, request_note
+            FROM notification_log
+            """,
+            "DROP TABLE notification_log",
+            "ALTER TABLE notification_log_new RENAME TO notification_log",
+            """
+            CREATE INDEX IF NOT EXISTS idx_notification_log_violation_channel_status
+            ON notification_log(violation_id, channel, status, created_at)
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS idx_notification_log_channel_created_at
+            ON notification_log(channel, created_at)
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS idx_notification_log_status_next_attempt
+            ON notification_log(status, next_attempt_at)
+            """,
+            # Collapse existing duplicates before the unique index goes on.
+            # Live rows: keep the first Sent row, else the newest Queued,
+            # else the newest Skipped. Failed rows: keep the newest, which
+            # reserve_sms re-arms on the next request. The others fold into
+            # the kept row's request_count and become Superseded.
+            """
+            CREATE TEMP TABLE notification_keep AS
+            SELECT
+                n.violation_id,
+                n.channel,
+                'live' AS kind,
+                COALESCE(
+                    (SELECT MIN(s.notification_id) FROM notification_log s
+                     WHERE s.violation_id = n.violation_id AND s.channel = n.channel
+                       AND s.status = 'Sent'),
+                    (SELECT MAX(q.notification_id) FROM notification_log q
+                     WHERE q.violation_id = n.violation_id AND q.channel = n.channel
+                       AND q.status = 'Queued'),
+                    MAX(n.notification_id)
+                ) AS keep_id,
+                COUNT(*) AS total
+            FROM notification_log n
+            WHERE n.status IN ('Queued', 'Sent', 'Skipped')
+            GROUP BY n.violation_id, n.channel
+            HAVING COUNT(*) > 1
+            UNION ALL
+            SELECT violation_id, channel, 'failed', MAX(notification_id), COUNT(*)
+            FROM notification_log
+            WHERE status = 'Failed'
+            GROUP BY violation_id, channel
+            HAVING COUNT(*) > 1
+            """,
+            """
+            UPDATE notification_log
+            SET request_count = (
+                    SELECT k.total FROM notification_keep k
+                    WHERE k.keep_id = notification_log.notification_id
+                ),
+                last_requested_at = CURRENT_TIMESTAMP
+            WHERE notification_id IN (SELECT keep_id FROM notification_keep)
+            """,
+            """
+            UPDATE notification_log
+            SET status = 'Superseded'
+            WHERE notification_id NOT IN (SELECT keep_id FROM notification_keep)
+              AND EXISTS (
+                  SELECT 1 FROM notification_keep k
+                  WHERE k.violation_id = notification_log.violation_id
+                    AND k.channel = notification_log.channel
+                    AND k.kind = CASE
+                        WHEN notification_log.status = 'Failed' THEN 'failed'
+                        WHEN notification_log.status IN ('Queued', 'Sent', 'Skipped') THEN 'live'
+                    END
+              )
+            """,
+            "DROP TABLE notification_keep",
+            # The idempotency key. Failed and Superseded rows stay out so a
+            # failed SMS can be requested again; reserve_sms re-arms the
+            # Failed row rather than adding one per retry.
+            """
+            CREATE UNIQUE INDEX IF NOT EXISTS uq_notification_log_live
+            ON notification_log(violation_id, channel)
+            WHERE status IN ('Queued', 'Sent', 'Skipped')
+            """,
+        ],
+    ),
+    (
+        8,
+        "Evidence encoding job queue",
+        [
+            # One job per violation. Spool paths point at the clip frames and
+            # snapshot the detector left on disk; the encoder service turns
+            # them into the files violation.image_path/video_path name.
+            """
+            CREATE TABLE IF NOT EXISTS evidence_job (
+                job_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                violation_id INTEGER NOT NULL UNIQUE,
+                clip_spool_path TEXT NOT NULL,
+                snapshot_spool_path TEXT NOT NULL,
+                image_filename TEXT NOT NULL,
+                video_basename TEXT NOT NULL,
+                fps REAL NOT NULL,
+                status TEXT NOT NULL DEFAULT 'Queued'
+                    CHECK(status IN ('Queued', 'Done', 'Failed')),
+                attempt_count INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                error_message TEXT,
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                completed_at DATETIME,
+                FOREIGN KEY (violation_id) REFERENCES violation(violation_id)
+            )
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS idx_evidence_job_status_next_attempt
+            ON evidence_job(status, next_attempt_at)
+            """,
+        ],
+    ),
+]
+
+
+def ensure_migrations_table(conn):
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+
+
+def applied_versions(conn):
+    c = conn.cursor()
+    c.execute("SELECT version FROM schema_migrations")
+    return {row[0] for row in c.fetchall()}
+
+
+def current_version(conn) -> int:
+    ensure_migrations_table(conn)
+    c = conn.cursor()
+    c.execute("SELECT COALESCE(MAX(version), 0) FROM schema_migrations")
+    return c.fetchone()[0]
+
+
+def migrate(conn, target_version=None):
+    """
+    Apply every pending migration up to target_version (default: latest).
+    Returns the list of versions applied by this call.
+    """
+    # Manage transactions explicitly so DDL + bookkeeping commit together
+    previous_isolation = conn.isolation_level
+    conn.isolation_level = None
+
+    try:
+        conn.execute("PRAGMA foreign_keys = ON;")
+        ensure_migrations_table(conn)
+        done = applied_versions(conn)
+
+        applied = []
+        for version, description, statements in sorted(MIGRATIONS, key=lambda m: m[0]):
+            if version in done:
+                continue
+            if target_version is not None and version > target_version:
+                break
+
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                for statement in statements:
+                    conn.execute(statement)
+                conn.execute(
+                    "INSERT INTO schema_migrations (version, description) VALUES (?, ?)",
+                    (version, description),
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+            applied.append(version)
+            print(f"✅ Applied migration {version}: {description}")
+
+        return applied
+
+    finally:
+        conn.isolation_level = previous_isolation
+
+
+def migrate_database(db_path=DB_PATH, target_version=None):
+    conn = sqlite3.connect(db_path)
+    try:
+        applied = migrate(conn, target_version)
+        version = current_version(conn)
+    finally:
+        conn.close()
+
+    if applied:
+        print(f"✅ Database '{db_path}' migrated to version {version}.")
+    else:
+        print(f"✅ Database '{db_path}' already at version {version}.")
+    return applied
+
+
+if __name__ == "__main__":
+    migrate_database()
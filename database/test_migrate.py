@@ -0,0 +1,87 @@
+# database/test_migrate.py
+import sqlite3
+
+import pytest
+
+from database.check_query_plans import check_query_plans
+from database.migrate import MIGRATIONS, current_version, migrate
+
+LATEST_VERSION = max(version for version, _, _ in MIGRATIONS)
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = sqlite3.connect(tmp_path / "itms.db")
+    conn.row_factory = sqlite3.Row
+    yield conn
+    conn.close()
+
+
+def schema(conn):
+    return sorted(
+        tuple(row)
+        for row in conn.execute("SELECT type, name, sql FROM sqlite_master ORDER BY name")
+    )
+
+
+def test_migrate_applies_each_version_once(conn):
+    assert migrate(conn) == sorted(version for version, _, _ in MIGRATIONS)
+    before = schema(conn)
+
+    assert migrate(conn) == []
+    assert schema(conn) == before
+    assert current_version(conn) == LATEST_VERSION
+
+
+def test_migrate_resumes_from_target_version(conn):
+    assert migrate(conn, target_version=3) == [1, 2, 3]
+    assert current_version(conn) == 3
+
+    assert migrate(conn) == list(range(4, LATEST_VERSION + 1))
+    assert current_version(conn) == LATEST_VERSION
+
+
+def test_failed_migration_rolls_back(conn, monkeypatch):
+    migrate(conn, target_version=1)
+    broken = (2, "broken", ["CREATE TABLE half_done (id INTEGER)", "NOT SQL"])
+    monkeypatch.setattr("database.migrate.MIGRATIONS", [MIGRATIONS[0], broken])
+
+    with pytest.raises(sqlite3.OperationalError):
+        migrate(conn)
+
+    assert current_version(conn) == 1
+    tables = {row["name"] for row in conn.execute("SELECT name FROM sqlite_master")}
+    assert "half_done" not in tables
+
+
+def test_duplicate_sms_rows_are_superseded_not_deleted(conn):
+    migrate(conn, target_version=6)
+    conn.execute("INSERT INTO violation (violation_id, status) VALUES (1, 'Approved')")
+    conn.execute("INSERT INTO violation (violation_id, status) VALUES (2, 'Approved')")
+    for violation_id, status in [
+        (1, "Sent"), (1, "Sent"), (1, "Skipped"), (2, "Failed"), (2, "Failed"),
+    ]:
+        conn.execute(
+            "INSERT INTO notification_log (violation_id, channel, status) VALUES (?, 'SMS', ?)",
+            (violation_id, status),
+        )
+    conn.commit()
+
+    migrate(conn)
+
+    rows = conn.execute(
+        "SELECT notification_id, status, request_count FROM notification_log ORDER BY notification_id"
+    ).fetchall()
+    assert [tuple(row) for row in rows] == [
+        (1, "Sent", 3),
+        (2, "Superseded", 1),
+        (3, "Superseded", 1),
+        (4, "Superseded", 1),
+        (5, "Failed", 2),
+    ]
+
+
+def test_endpoint_queries_use_indexes(conn):
+    migrate(conn)
+
+    assert check_query_plans(conn) == []
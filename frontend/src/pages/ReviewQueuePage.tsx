@@ -1,5 +1,5 @@
 // src/pages/ReviewQueuePage.tsx
-import { useEffect, useMemo, useState } from "react";
+import { useEffect, useMemo, useRef, useState } from "react";
 import {
   ClipboardCheck,
   Search,
@@ -24,6 +24,7 @@ import {
   type ReviewStatus,
   type ConfidenceLevel,
 } from "../services/reviewQueue";
+import { getStats, type Stats } from "../services/violations";
 
 type StatusFilter = "All" | ReviewStatus;
 
@@ -38,28 +39,81 @@ export function ReviewQueuePage() {
   const [selectedCaseId, setSelectedCaseId] = useState<string | null>(null);
   const [reviewNote, setReviewNote] = useState("");
 
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [stats, setStats] = useState<Stats>({ Flagged: 0, Approved: 0, Rejected: 0 });
+
+  // Responses for a status filter the user has already left are ignored
+  const latestRequest = useRef(0);
+
+  async function refreshStats() {
+    try {
+      setStats(await getStats());
+    } catch (err) {
+      console.error("Failed to load review stats:", err);
+    }
+  }
+
+  // Status filtering runs on the server so every page matches it, and a
+  // new filter starts again from the first page
   useEffect(() => {
     async function loadCases() {
+      const request = ++latestRequest.current;
+
       try {
         setLoading(true);
         setError(null);
 
-        const data = await getReviewQueue();
-        setCases(data);
+        const { items: data, nextCursor: cursor } = await getReviewQueue({
+          status: statusFilter,
+        });
+        if (request !== latestRequest.current) return;
 
-        if (data.length > 0 && !selectedCaseId) {
-          setSelectedCaseId(data[0].id);
-        }
+        setCases(data);
+        setNextCursor(cursor);
+        setSelectedCaseId((prev) =>
+          prev && data.some((item) => item.id === prev) ? prev : data[0]?.id ?? null
+        );
       } catch (err) {
+        if (request !== latestRequest.current) return;
         console.error("Failed to load review queue:", err);
         setError("Failed to load review queue from backend.");
       } finally {
-        setLoading(false);
+        if (request === latestRequest.current) setLoading(false);
       }
     }
 
     loadCases();
-  }, [selectedCaseId]);
+  }, [statusFilter]);
+
+  // The KPI cards count every case, not just the pages loaded so far
+  useEffect(() => {
+    refreshStats();
+  }, []);
+
+  async function loadMore() {
+    if (!nextCursor) return;
+    const request = latestRequest.current;
+
+    try {
+      setLoadingMore(true);
+      setError(null);
+
+      const page = await getReviewQueue({ after: nextCursor, status: statusFilter });
+      if (request !== latestRequest.current) return;
+
+      setCases((prev) => {
+        const seen = new Set(prev.map((item) => item.id));
+        return [...prev, ...page.items.filter((item) => !seen.has(item.id))];
+      });
+      setNextCursor(page.nextCursor);
+    } catch (err) {
+      console.error("Failed to load more review cases:", err);
+      setError("Failed to load more review cases from backend.");
+    } finally {
+      setLoadingMore(false);
+    }
+  }
 
   const filteredCases = useMemo(() => {
     return cases.filter((item) => {
@@ -69,12 +123,9 @@ export function ReviewQueuePage() {
         item.intersection.toLowerCase().includes(searchTerm.toLowerCase()) ||
         item.time.toLowerCase().includes(searchTerm.toLowerCase());
 
-      const matchesStatus =
-        statusFilter === "All" ? true : item.reviewStatus === statusFilter;
-
-      return matchesSearch && matchesStatus;
+      return matchesSearch;
     });
-  }, [cases, searchTerm, statusFilter]);
+  }, [cases, searchTerm]);
 
   const selectedCase =
     filteredCases.find((item) => item.id === selectedCaseId) ||
@@ -85,9 +136,11 @@ export function ReviewQueuePage() {
     setReviewNote(selectedCase?.notes ?? "");
   }, [selectedCase?.id, selectedCase?.notes]);
 
-  const pendingCount = cases.filter((item) => item.reviewStatus === "Pending").length;
-  const approvedCount = cases.filter((item) => item.reviewStatus === "Approved").length;
-  const rejectedCount = cases.filter((item) => item.reviewStatus === "Rejected").length;
+  // /api/stats reports pending cases as "Flagged"
+  const pendingCount = stats.Flagged;
+  const approvedCount = stats.Approved;
+  const rejectedCount = stats.Rejected;
+  const totalCount = pendingCount + approvedCount + rejectedCount;
 
   function getStatusClasses(status: ReviewStatus) {
     if (status === "Pending") {
@@ -132,6 +185,7 @@ export function ReviewQueuePage() {
             : item
         )
       );
+      refreshStats();
     } catch (err) {
       console.error("Failed to submit review decision:", err);
       setError("Failed to save review decision.");
@@ -173,7 +227,7 @@ export function ReviewQueuePage() {
       <section className="grid grid-cols-1 gap-4 md:grid-cols-2 xl:grid-cols-4">
         <StatCard
           label="Total Review Cases"
-          value={loading ? "..." : cases.length.toString()}
+          value={loading ? "..." : totalCount.toString()}
           sublabel="Cases surfaced for human verification"
         />
         <StatCard
@@ -307,6 +361,18 @@ export function ReviewQueuePage() {
               </table>
             </div>
           )}
+
+          {!loading && nextCursor && (
+            <div className="border-t border-gray-200 px-6 py-4 text-center">
+              <button
+                onClick={loadMore}
+                disabled={loadingMore}
+                className="rounded-lg border border-gray-300 bg-white px-4 py-2 text-sm font-medium text-gray-700 transition hover:bg-gray-50 disabled:cursor-not-allowed disabled:opacity-60"
+              >
+                {loadingMore ? "Loading..." : "Load more"}
+              </button>
+            </div>
+          )}
         </div>
 
         <div className="rounded-xl border border-gray-200 bg-white p-6 shadow-sm">
@@ -1,5 +1,5 @@
 // src/pages/Violations.tsx
-import { useEffect, useMemo, useState } from "react";
+import { useEffect, useMemo, useRef, useState } from "react";
 import {
   AlertTriangle,
   CheckCircle2,
@@ -18,6 +18,7 @@ import {
   getSmsNotifications,
   getStats,
   getViolations,
+  resendApprovedTodaySms,
   sendViolationSms,
   type SmsNotification,
   type Stats,
@@ -33,7 +34,10 @@ export function ViolationsPage() {
   const [stats, setStats] = useState<Stats>({ Flagged: 0, Approved: 0, Rejected: 0 });
   const [smsNotifications, setSmsNotifications] = useState<SmsNotification[]>([]);
 
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [smsSending, setSmsSending] = useState(false);
   const [pageError, setPageError] = useState<string | null>(null);
   const [smsMessage, setSmsMessage] = useState<string | null>(null);
@@ -41,17 +45,28 @@ export function ViolationsPage() {
   const [searchTerm, setSearchTerm] = useState("");
   const [statusFilter, setStatusFilter] = useState<StatusFilter>("All");
 
-  async function loadData() {
+  // Responses for a status filter the user has already left are ignored
+  const latestRequest = useRef(0);
+
+  async function loadData(status: StatusFilter) {
+    const request = ++latestRequest.current;
+
     try {
+      setLoading(true);
       setPageError(null);
 
-      const [violationsData, statsData, smsData] = await Promise.all([
-        getViolations(),
+      // Status filtering runs on the server so every page matches it;
+      // the KPI cards read the counter tables behind /api/stats
+      const [violationsPage, statsData, smsData] = await Promise.all([
+        getViolations({ status }),
         getStats(),
         getSmsNotifications(),
       ]);
+      if (request !== latestRequest.current) return;
 
+      const violationsData = violationsPage.items;
       setViolations(violationsData);
+      setNextCursor(violationsPage.nextCursor);
       setStats(statsData);
       setSmsNotifications(smsData);
 
@@ -60,16 +75,42 @@ export function ViolationsPage() {
         return stillExists ? prev : violationsData[0]?.id ?? null;
       });
     } catch (error) {
+      if (request !== latestRequest.current) return;
       console.error("Error loading violations page data:", error);
       setPageError("Failed to load violations or SMS data from backend.");
     } finally {
-      setLoading(false);
+      if (request === latestRequest.current) setLoading(false);
+    }
+  }
+
+  async function loadMore() {
+    if (!nextCursor) return;
+    const request = latestRequest.current;
+
+    try {
+      setLoadingMore(true);
+      setPageError(null);
+
+      const page = await getViolations({ after: nextCursor, status: statusFilter });
+      if (request !== latestRequest.current) return;
+
+      setViolations((prev) => {
+        const seen = new Set(prev.map((item) => item.id));
+        return [...prev, ...page.items.filter((item) => !seen.has(item.id))];
+      });
+      setNextCursor(page.nextCursor);
+    } catch (error) {
+      console.error("Error loading more violations:", error);
+      setPageError("Failed to load more violations from backend.");
+    } finally {
+      setLoadingMore(false);
     }
   }
 
+  // A new filter starts again from the first page
   useEffect(() => {
-    loadData();
-  }, []);
+    loadData(statusFilter);
+  }, [statusFilter]);
 
   const filteredViolations = useMemo(() => {
     return violations.filter((violation) => {
@@ -79,12 +120,9 @@ export function ViolationsPage() {
         violation.intersection.toLowerCase().includes(searchTerm.toLowerCase()) ||
         violation.time.toLowerCase().includes(searchTerm.toLowerCase());
 
-      const matchesStatus =
-        statusFilter === "All" ? true : violation.status === statusFilter;
-
-      return matchesSearch && matchesStatus;
+      return matchesSearch;
     });
-  }, [violations, searchTerm, statusFilter]);
+  }, [violations, searchTerm]);
 
   const selectedViolation =
     filteredViolations.find((violation) => violation.id === selectedViolationId) ||
@@ -168,6 +206,25 @@ export function ViolationsPage() {
     }
   }
 
+  async function handleResendApprovedToday() {
+    try {
+      setSmsSending(true);
+      setSmsMessage(null);
+      setPageError(null);
+
+      const result = await resendApprovedTodaySms();
+      setSmsMessage(result.message);
+
+      const smsData = await getSmsNotifications();
+      setSmsNotifications(smsData);
+    } catch (error) {
+      console.error("Failed to resend today's approved SMS:", error);
+      setPageError("Failed to queue SMS for today's approved cases.");
+    } finally {
+      setSmsSending(false);
+    }
+  }
+
   const currentSmsStatus = getCurrentSmsStatus();
 
   return (
@@ -185,9 +242,20 @@ export function ViolationsPage() {
           </p>
         </div>
 
-        <div className="rounded-xl border border-yellow-200 bg-yellow-50 px-4 py-3">
-          <p className="text-sm font-medium text-yellow-900">Pending Reviews</p>
-          <p className="mt-1 text-2xl font-semibold text-yellow-800">{stats.Flagged}</p>
+        <div className="flex flex-col items-stretch gap-3">
+          <div className="rounded-xl border border-yellow-200 bg-yellow-50 px-4 py-3">
+            <p className="text-sm font-medium text-yellow-900">Pending Reviews</p>
+            <p className="mt-1 text-2xl font-semibold text-yellow-800">{stats.Flagged}</p>
+          </div>
+
+          <button
+            onClick={handleResendApprovedToday}
+            disabled={smsSending}
+            className="inline-flex items-center justify-center gap-2 rounded-lg border border-gray-300 bg-white px-4 py-2 text-sm font-medium text-gray-700 transition hover:bg-gray-50 disabled:opacity-50"
+          >
+            <Smartphone className="h-4 w-4" />
+            {smsSending ? "Queuing..." : "Resend Today's Approved SMS"}
+          </button>
         </div>
       </section>
 
@@ -355,6 +423,18 @@ export function ViolationsPage() {
               </table>
             </div>
           )}
+
+          {!loading && nextCursor && (
+            <div className="border-t border-gray-200 px-6 py-4 text-center">
+              <button
+                onClick={loadMore}
+                disabled={loadingMore}
+                className="rounded-lg border border-gray-300 bg-white px-4 py-2 text-sm font-medium text-gray-700 transition hover:bg-gray-50 disabled:cursor-not-allowed disabled:opacity-60"
+              >
+                {loadingMore ? "Loading..." : "Load more"}
+              </button>
+            </div>
+          )}
         </div>
 
         <div className="rounded-xl border border-gray-200 bg-white p-6 shadow-sm">
@@ -3,6 +3,28 @@
 export const API_ORIGIN = "http://127.0.0.1:8000";
 export const API_BASE_URL = `${API_ORIGIN}/api`;
 
+export interface CursorPage<T> {
+  items: T[];
+  nextCursor: string | null;
+}
+
+export interface CursorPageParams {
+  limit?: number;
+  after?: string | null;
+  status?: string;
+}
+
+export function buildPageQuery(params: CursorPageParams = {}): string {
+  const searchParams = new URLSearchParams();
+
+  if (params.limit) searchParams.set("limit", String(params.limit));
+  if (params.after) searchParams.set("after", params.after);
+  if (params.status && params.status !== "All") searchParams.set("status", params.status);
+
+  const query = searchParams.toString();
+  return query ? `?${query}` : "";
+}
+
 export async function fetchJson<T>(endpoint: string): Promise<T> {
   const response = await fetch(`${API_BASE_URL}${endpoint}`);
 
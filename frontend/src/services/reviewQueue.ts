@@ -1,6 +1,12 @@
 // src/services/reviewQueue.ts
 
-import { fetchJson, postJson } from "./api";
+import {
+  buildPageQuery,
+  fetchJson,
+  postJson,
+  type CursorPage,
+  type CursorPageParams,
+} from "./api";
 
 export type ReviewStatus = "Pending" | "Approved" | "Rejected";
 export type ConfidenceLevel = "High" | "Medium" | "Low";
@@ -24,8 +30,10 @@ interface ReviewDecisionResponse {
   status: ReviewStatus;
 }
 
-export function getReviewQueue(): Promise<ReviewCase[]> {
-  return fetchJson<ReviewCase[]>("/review-queue");
+export function getReviewQueue(
+  params: CursorPageParams = {}
+): Promise<CursorPage<ReviewCase>> {
+  return fetchJson<CursorPage<ReviewCase>>(`/review-queue${buildPageQuery(params)}`);
 }
 
 export function submitReviewDecision(
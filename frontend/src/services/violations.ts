@@ -1,5 +1,11 @@
 // src/services/violations.ts
-import { fetchJson, postJson } from "./api";
+import {
+  buildPageQuery,
+  fetchJson,
+  postJson,
+  type CursorPage,
+  type CursorPageParams,
+} from "./api";
 
 export interface Violation {
   id: string;
@@ -27,18 +33,27 @@ export interface SmsNotification {
   errorMessage: string | null;
   createdAt: string | null;
   sentAt: string | null;
+  requestCount: number;
 }
 
 export interface SendSmsResponse {
   ok: boolean;
-  status: "Sent" | "Skipped" | "Failed";
+  status: "Queued" | "Skipped" | "Failed";
   message: string;
   recipientPhone: string | null;
   notificationId: number | null;
 }
 
-export function getViolations(): Promise<Violation[]> {
-  return fetchJson<Violation[]>("/violations");
+export interface BulkSmsResponse {
+  message: string;
+  total: number;
+  summary: Record<"Queued" | "Skipped" | "Failed", number>;
+}
+
+export function getViolations(
+  params: CursorPageParams = {}
+): Promise<CursorPage<Violation>> {
+  return fetchJson<CursorPage<Violation>>(`/violations${buildPageQuery(params)}`);
 }
 
 export function getStats(): Promise<Stats> {
@@ -51,4 +66,8 @@ export function getSmsNotifications(): Promise<SmsNotification[]> {
 
 export function sendViolationSms(violationId: string): Promise<SendSmsResponse> {
   return postJson<SendSmsResponse>(`/violations/${violationId}/send-sms`, {});
+}
+
+export function resendApprovedTodaySms(note?: string): Promise<BulkSmsResponse> {
+  return postJson<BulkSmsResponse>("/notifications/sms/resend-approved-today", { note });
 }
\ No newline at end of file